@@ -0,0 +1,76 @@
+"""Audio Streaming Helpers
+=========================
+Chunked WAV streaming cho /v1/audio/speech (stream=true).
+
+Input được tách câu bằng ``split_text_into_chunks``; mỗi chunk tổng hợp xong
+sẽ được đẩy ngay xuống client dưới dạng PCM 16-bit, nên client bắt đầu phát
+sau câu đầu tiên thay vì sau cả đoạn văn.
+"""
+
+import os
+import struct
+import tempfile
+from typing import Callable, Iterator, List
+
+import numpy as np
+import soundfile as sf
+
+from src.core.text_chunking import split_text_into_chunks
+
+# Streaming WAV không biết trước độ dài -> dùng size tối đa (đa số player chấp nhận)
+_UNKNOWN_SIZE = 0xFFFFFFFF
+PCM_BLOCK_FRAMES = 4096
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    """RIFF/WAVE header cho PCM stream với data size 'unknown'"""
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    return (
+        b"RIFF" + struct.pack("<I", _UNKNOWN_SIZE) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, block_align, bits_per_sample)
+        + b"data" + struct.pack("<I", _UNKNOWN_SIZE)
+    )
+
+
+def _read_pcm16(path: str, sample_rate: int) -> np.ndarray:
+    """Đọc file audio về int16 mono; resample tuyến tính nếu sample rate lệch"""
+    data, file_rate = sf.read(path, dtype="float32", always_2d=True)
+    data = data.mean(axis=1)
+    if file_rate != sample_rate and len(data):
+        target_len = int(round(len(data) * sample_rate / file_rate))
+        data = np.interp(np.linspace(0, len(data) - 1, target_len), np.arange(len(data)), data)
+    return (np.clip(data, -1.0, 1.0) * 32767).astype("<i2")
+
+
+def iter_speech_stream(text: str,
+                       synthesize_chunk: Callable[[str, str], str],
+                       max_chunk_size: int = 250) -> Iterator[bytes]:
+    """
+    Yield WAV header + PCM frames, chunk by chunk.
+
+    Args:
+        text: Input text
+        synthesize_chunk: callable(chunk_text, output_path) -> audio path đã sinh
+        max_chunk_size: Số ký tự tối đa mỗi chunk
+    """
+    chunks: List[str] = split_text_into_chunks(text, max_chunk_size) or [text]
+    sample_rate = None
+
+    with tempfile.TemporaryDirectory(prefix="vs_stream_") as tmp_dir:
+        for index, chunk in enumerate(chunks):
+            chunk_path = synthesize_chunk(chunk, os.path.join(tmp_dir, f"chunk_{index:04d}.wav"))
+
+            if sample_rate is None:
+                # Header theo sample rate của chunk đầu tiên
+                sample_rate = sf.info(chunk_path).samplerate
+                yield wav_stream_header(sample_rate)
+
+            pcm = _read_pcm16(chunk_path, sample_rate)
+            for start in range(0, len(pcm), PCM_BLOCK_FRAMES):
+                yield pcm[start:start + PCM_BLOCK_FRAMES].tobytes()
+
+            try:
+                os.remove(chunk_path)
+            except OSError:
+                pass
@@ -3,7 +3,8 @@ from __future__ import annotations
 """Emotion API Router
 =======================
 CRUD + Import/Export cho Emotion Library (Phase 1)
-Lưu trữ đơn giản bằng JSON file trên đĩa (backend/configs/emotions/custom_emotions.json).
+Lưu trữ bằng JSON file trên đĩa (backend/configs/emotions/custom_emotions.json),
+cache trong memory qua ``EmotionStore``.
 """
 
 import json
@@ -15,6 +16,8 @@ from fastapi import APIRouter, HTTPException, UploadFile, File
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel, Field
 
+from .emotion_store import EmotionStore
+
 # --- File paths ---
 EMOTION_DIR = Path(__file__).resolve().parents[1] / "configs" / "emotions"
 EMOTION_DIR.mkdir(parents=True, exist_ok=True)
@@ -68,44 +71,8 @@ def _load_93_default_emotions():
         return {}
 
 
-def _load_emotions() -> Dict[str, Any]:
-    """Load emotions file. If file is list, convert to dict keyed by id."""
-    with open(EMOTION_FILE, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            data = {}
-
-    # If empty, load 93 default emotions
-    if not data:
-        default_emotions = _load_93_default_emotions()
-        if default_emotions:
-            _save_emotions(default_emotions)
-            return default_emotions
-
-    # Auto unwrap if wrapped by export_info
-    if isinstance(data, dict) and "emotions" in data and len(data) == 2 and "export_info" in data:
-        data = data["emotions"]
-
-    # If list, convert to dict keyed by id
-    if isinstance(data, list):
-        converted = {}
-        for item in data:
-            if isinstance(item, dict):
-                emo_id = item.get("id") or str(uuid.uuid4())
-                item["id"] = emo_id
-                converted[emo_id] = item
-        # Save converted format for future
-        _save_emotions(converted)
-        return converted
-    elif isinstance(data, dict):
-        return data
-    else:
-        return {}
-
-
-def _save_emotions(data: Dict[str, Any]):
-    EMOTION_FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+# Library giữ trong memory; file chỉ được đọc lại khi đổi mtime/inode, ghi atomic + debounce
+emotion_store = EmotionStore(EMOTION_FILE, default_loader=_load_93_default_emotions)
 
 
 # --- Router ---
@@ -115,74 +82,36 @@ router = APIRouter(prefix="/v1/emotions", tags=["emotions"])
 @router.get("/")
 async def list_emotions() -> Dict[str, Any]:
     """Trả về toàn bộ emotion library"""
-    return _load_emotions()
+    return emotion_store.all()
 
 
 @router.post("/")
 async def create_emotion(emotion: Emotion):
-    data = _load_emotions()
-    if emotion.id in data:
+    if not emotion_store.create(emotion.id, emotion.dict()):
         raise HTTPException(status_code=400, detail="Emotion ID already exists")
-    data[emotion.id] = emotion.dict()
-    _save_emotions(data)
     return {"success": True, "id": emotion.id}
 
 
 @router.put("/{emotion_id}")
 async def update_emotion(emotion_id: str, emotion: Emotion):
-    data = _load_emotions()
-
-    existing = data.get(emotion_id, {})
     # Preserve existing category if not provided in payload
     updated_fields = emotion.dict(exclude_unset=True, exclude_defaults=True)
-    merged = {**existing, **updated_fields}
-
-    merged["id"] = emotion_id  # ensure correct id
-    data[emotion_id] = merged
-    _save_emotions(data)
+    emotion_store.update(emotion_id, updated_fields)
     return {"success": True}
 
 
 @router.delete("/{emotion_id}")
 async def delete_emotion(emotion_id: str):
-    emotions = _load_emotions()
-
-    # If data wrapped with 'emotions', work inside it
-    container = emotions
-    if isinstance(emotions, dict) and "emotions" in emotions and len(emotions) > 1:
-        container = emotions["emotions"]
-
-    found = False
-    # Direct key match
-    if emotion_id in container:
-        del container[emotion_id]
-        found = True
-    else:
-        # Search by inner 'id' or 'name'
-        for key, val in list(container.items()):
-            if (
-                isinstance(val, dict)
-                and (val.get("id") == emotion_id or val.get("name") == emotion_id)
-            ):
-                del container[key]
-                found = True
-                break
-
-    if not found:
+    # Key trực tiếp, hoặc theo inner 'id' / 'name'
+    if not emotion_store.delete(emotion_id):
         raise HTTPException(status_code=404, detail="Emotion not found")
-
-    # Save outer structure if wrapped
-    if container is not emotions and "emotions" in emotions:
-        emotions["emotions"] = container
-
-    _save_emotions(emotions)
     return {"message": "Deleted"}
 
 
 @router.delete("/all")
 async def delete_all_emotions():
     """Xóa toàn bộ emotion library"""
-    _save_emotions({})
+    emotion_store.replace_all({})
     return {"message": "All emotions deleted", "count": 0}
 
 
@@ -212,7 +141,7 @@ async def import_emotions(file: UploadFile = File(...)):
         else:
             raise ValueError("Invalid format")
         
-        _save_emotions(normalized)
+        emotion_store.replace_all(normalized)
         return {"success": True, "count": len(normalized)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -223,4 +152,5 @@ async def export_emotions():
     """Xuất file JSON emotions hiện tại"""
     if not EMOTION_FILE.exists():
         raise HTTPException(status_code=404, detail="Emotion file not found")
+    emotion_store.flush()  # file phải có các thay đổi đang chờ ghi
     return FileResponse(path=EMOTION_FILE, filename="emotion_library.json", media_type="application/json") 
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""Emotion Store
+=================
+Emotion library giữ trong memory cho API server, thay cho việc đọc/parse lại
+``custom_emotions.json`` ở mỗi request.
+
+- Index O(1) theo key / id / name / alias (không phân biệt hoa thường)
+- ``get()`` chỉ đọc memory - hot path synthesis không chạm filesystem
+- File bị sửa từ bên ngoài (mtime/inode/size đổi) -> reload; kiểm tra khi gọi ``all()``
+  và bởi watcher thread mỗi ``VS_EMOTION_WATCH_INTERVAL`` giây
+- Ghi atomic (temp file + ``os.replace``) và debounce ``VS_EMOTION_SAVE_DELAY`` giây:
+  nhiều thao tác CRUD liên tiếp chỉ ghi file một lần
+"""
+
+import json
+import os
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+FileSignature = Tuple[int, int, int]  # (st_mtime_ns, st_ino, st_size)
+
+
+class EmotionStore:
+    def __init__(self, path: Path, default_loader: Optional[Callable[[], Dict[str, Any]]] = None,
+                 save_delay: Optional[float] = None, watch_interval: Optional[float] = None):
+        self.path = Path(path)
+        self.default_loader = default_loader
+        self.save_delay = save_delay if save_delay is not None else float(os.getenv("VS_EMOTION_SAVE_DELAY", "0.5"))
+        self.watch_interval = (watch_interval if watch_interval is not None
+                               else float(os.getenv("VS_EMOTION_WATCH_INTERVAL", "2.0")))
+        self._lock = threading.RLock()
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[str, str] = {}
+        self._signature: Optional[FileSignature] = None
+        self._loaded = False
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.version = 0  # tăng mỗi lần library đổi (reload hoặc CRUD)
+        self.stats = {"reloads": 0, "saves": 0, "lookups": 0, "misses": 0}
+
+    # ---- file I/O ----
+
+    def _file_signature(self) -> Optional[FileSignature]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    @staticmethod
+    def _normalize(data: Any) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """Đưa mọi format (export wrapper, list) về dict keyed by id. Trả về (data, đã convert)"""
+        if isinstance(data, dict) and "emotions" in data and len(data) == 2 and "export_info" in data:
+            data = data["emotions"]
+
+        if isinstance(data, list):
+            converted = {}
+            for item in data:
+                if isinstance(item, dict):
+                    emo_id = item.get("id") or str(uuid.uuid4())
+                    item["id"] = emo_id
+                    converted[emo_id] = item
+            return converted, True
+        if isinstance(data, dict):
+            return {key: val for key, val in data.items() if isinstance(val, dict)}, False
+        return {}, False
+
+    def _read_file(self):
+        """Gọi khi đang giữ lock"""
+        signature = self._file_signature()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raw = {}
+
+        data, converted = self._normalize(raw)
+        if not data and self.default_loader:
+            data, converted = self.default_loader(), True
+
+        self._set_data(data)
+        self._signature = signature
+        self._loaded = True
+        self.stats["reloads"] += 1
+        if converted and data:
+            # Lưu lại format chuẩn cho lần sau
+            self._schedule_save()
+
+    def _write_file(self):
+        """Ghi atomic: temp file cùng thư mục rồi os.replace. Gọi khi đang giữ lock"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".emotions_", suffix=".tmp", dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._signature = self._file_signature()
+        self._dirty = False
+        self.stats["saves"] += 1
+
+    # ---- index ----
+
+    def _set_data(self, data: Dict[str, Dict[str, Any]]):
+        self._data = data
+        self._rebuild_index()
+        self.version += 1
+
+    def _rebuild_index(self):
+        index: Dict[str, str] = {}
+        for key, item in self._data.items():
+            names = [key, item.get("id"), item.get("name")] + list(item.get("aliases") or [])
+            for name in names:
+                if isinstance(name, str) and name:
+                    # key/id thật luôn thắng alias trùng tên
+                    index.setdefault(name.lower(), key)
+            index[key.lower()] = key
+        self._index = index
+
+    def _resolve_key(self, name: str) -> Optional[str]:
+        return self._index.get(name.lower()) if name else None
+
+    # ---- reload ----
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._read_file()
+                    self._start_watcher()
+
+    def reload_if_changed(self) -> bool:
+        """Reload nếu file đổi từ bên ngoài. Thay đổi chưa flush trong memory được ưu tiên."""
+        self._ensure_loaded()
+        with self._lock:
+            if self._dirty or self._file_signature() == self._signature:
+                return False
+            self._read_file()
+            return True
+
+    def _start_watcher(self):
+        if self.watch_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(target=self._watch_loop, name="emotion-store-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"[WARNING] Emotion store reload failed: {e}")
+
+    # ---- debounced save ----
+
+    def _schedule_save(self):
+        """Đánh dấu dirty và hẹn ghi file sau save_delay giây (gọi khi đang giữ lock)"""
+        self._dirty = True
+        self.version += 1
+        if self.save_delay <= 0:
+            self._write_file()
+            return
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Ghi ngay các thay đổi đang chờ (export, shutdown)"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._write_file()
+
+    def shutdown(self):
+        self._stop.set()
+        self.flush()
+
+    # ---- read API ----
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Tra emotion theo key/id/name/alias - chỉ đọc memory"""
+        self._ensure_loaded()
+        key = self._resolve_key(name)
+        self.stats["lookups"] += 1
+        if key is None:
+            self.stats["misses"] += 1
+            return None
+        return self._data.get(key)
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        self.reload_if_changed()
+        with self._lock:
+            return dict(self._data)
+
+    def __contains__(self, name: str) -> bool:
+        self._ensure_loaded()
+        return self._resolve_key(name) is not None
+
+    # ---- write API ----
+
+    def create(self, emotion_id: str, item: Dict[str, Any]) -> bool:
+        """False nếu id đã tồn tại"""
+        self.reload_if_changed()
+        with self._lock:
+            if emotion_id in self._data:
+                return False
+            self._data[emotion_id] = item
+            self._rebuild_index()
+            self._schedule_save()
+            return True
+
+    def update(self, emotion_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge fields vào emotion (tạo mới nếu chưa có)"""
+        self.reload_if_changed()
+        with self._lock:
+            merged = {**self._data.get(emotion_id, {}), **fields, "id": emotion_id}
+            self._data[emotion_id] = merged
+            self._rebuild_index()
+            self._schedule_save()
+            return merged
+
+    def delete(self, name: str) -> bool:
+        """Xóa theo key/id/name; False nếu không tìm thấy"""
+        self.reload_if_changed()
+        with self._lock:
+            key = name if name in self._data else self._resolve_key(name)
+            if key is None or key not in self._data:
+                return False
+            del self._data[key]
+            self._rebuild_index()
+            self._schedule_save()
+            return True
+
+    def replace_all(self, data: Dict[str, Dict[str, Any]]):
+        self._ensure_loaded()
+        with self._lock:
+            self._set_data(dict(data))
+            self._schedule_save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "count": len(self._data), "version": self.version, "dirty": self._dirty}
@@ -8,16 +8,17 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from uuid import uuid4
+import asyncio
 import os
 
-from src.tts.enhanced_voice_generator import (
-    EnhancedVoiceGenerator,
-    VoiceGenerationRequest,
-)
-from .emotion_api import router as emotion_router
+from src.core.lazy_imports import BackgroundWarmup
+from .audio_stream import iter_speech_stream
+from .emotion_api import emotion_store, router as emotion_router
+from .synthesis_executor import SynthesisQueueFull, synthesis_executor
 from .voice_api import router as voice_router
 
 
@@ -43,52 +44,121 @@ class AudioSpeechRequest(BaseModel):
     voice_id: str | None = None
     emotion: str | None = None
     inner: bool = False
+    stream: bool = False  # Chunked WAV streaming (phát ngay sau câu đầu tiên)
 
 
 # --- Generator instance ---
-generator = EnhancedVoiceGenerator()
+def _create_generator():
+    # Import ở đây: enhanced_voice_generator kéo theo torch/Chatterbox, không để chặn lúc mở socket
+    from src.tts.enhanced_voice_generator import EnhancedVoiceGenerator
+
+    return EnhancedVoiceGenerator()
+
+
+# Warm-up ở background khi startup; request đầu tiên chờ warm-up nếu chưa xong
+generator_warmup = BackgroundWarmup("voice-generator", _create_generator)
+
+
+def _get_generator():
+    try:
+        return generator_warmup.get()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@app.on_event("startup")
+def start_warmup():
+    emotion_store.reload_if_changed()  # nạp emotion library trước request đầu tiên
+    if os.getenv("VS_EAGER_WARMUP", "1") != "0":
+        generator_warmup.start()
 
 
 @app.post("/v1/audio/speech", response_class=StreamingResponse)
 async def generate_audio(req: AudioSpeechRequest):
     """Generate TTS audio via EnhancedVoiceGenerator and stream back as WAV."""
 
-    # Load emotion params if provided
-    from .emotion_api import _load_emotions
-
+    # Load emotion params if provided (emotion library giữ trong memory, không đọc file)
+    # Chỉ lấy các parameter emotion thực sự định nghĩa, phần còn lại giữ giá trị của request
     emotion_params = {}
     if req.emotion:
-        emotions_dict = _load_emotions()
-        if req.emotion in emotions_dict:
-            emo_cfg = emotions_dict[req.emotion]
+        emo_cfg = emotion_store.get(req.emotion)
+        if emo_cfg is not None:
+            nested = emo_cfg.get("parameters")
+            source = nested if isinstance(nested, dict) else emo_cfg
             emotion_params = {
-                "exaggeration": emo_cfg.get("exaggeration", req.exaggeration),
-                "cfg_weight": emo_cfg.get("cfg_weight", req.cfg_weight),
-                "temperature": emo_cfg.get("temperature", req.temperature),
-                "speed": emo_cfg.get("speed", req.speed),
+                key: source[key]
+                for key in ("exaggeration", "cfg_weight", "temperature", "speed")
+                if key in source
             }
-        else:
-            emotion_params = {}
 
     # Whisper detection
     voice_id = req.voice_id or "alice"
     if req.emotion and req.emotion.lower() == "whisper":
         voice_id = "whisper-female" if "female" in voice_id else "whisper-male"
 
-    voice_request = VoiceGenerationRequest(
-        text=req.input,
-        character_id="narrator",
-        voice_id=voice_id,
-        emotion=req.emotion or "neutral",
-        speed=emotion_params.get("speed", req.speed),
-        temperature=emotion_params.get("temperature", req.temperature),
-        exaggeration=emotion_params.get("exaggeration", req.exaggeration),
-        cfg_weight=emotion_params.get("cfg_weight", req.cfg_weight),
-    )
-
-    result = generator.generate_voice(voice_request)
+    def build_request(text: str, output_path: str = ""):
+        from src.tts.enhanced_voice_generator import VoiceGenerationRequest
+
+        return VoiceGenerationRequest(
+            text=text,
+            character_id="narrator",
+            voice_id=voice_id,
+            emotion=req.emotion or "neutral",
+            speed=emotion_params.get("speed", req.speed),
+            temperature=emotion_params.get("temperature", req.temperature),
+            exaggeration=emotion_params.get("exaggeration", req.exaggeration),
+            cfg_weight=emotion_params.get("cfg_weight", req.cfg_weight),
+            output_path=output_path,
+        )
+
+    if req.stream:
+        try:
+            slot = synthesis_executor.admit_stream()
+        except SynthesisQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+        try:
+            generator = await asyncio.to_thread(_get_generator)
+        except BaseException:
+            slot.release()
+            raise
+
+        def synthesize_chunk(text: str, output_path: str) -> str:
+            chunk_result = slot.run(generator.generate_voice, build_request(text, output_path))
+            if not chunk_result.success or not os.path.exists(chunk_result.output_path):
+                raise RuntimeError(chunk_result.error_message or "Voice generation failed")
+            return chunk_result.output_path
+
+        def stream_speech():
+            # Slot giữ tới khi stream kết thúc, lỗi hoặc client ngắt kết nối (generator bị close)
+            try:
+                yield from iter_speech_stream(req.input, synthesize_chunk)
+            finally:
+                slot.release()
+
+        return StreamingResponse(
+            stream_speech(),
+            media_type="audio/wav",
+            headers={"Content-Disposition": "inline; filename=speech.wav"},
+            background=BackgroundTask(slot.release),  # phòng khi stream không được iterate lần nào
+        )
+
+    generator = await asyncio.to_thread(_get_generator)
+    try:
+        # Unique path - concurrent jobs trong cùng một giây không ghi đè nhau
+        output_path = f"./voice_studio_output/narrator_{uuid4().hex}.wav"
+        result = await synthesis_executor.run(generator.generate_voice, build_request(req.input, output_path))
+    except SynthesisQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
 
     if not result.success or not os.path.exists(result.output_path):
+        _remove_file(output_path)
         raise HTTPException(status_code=500, detail=result.error_message or "Voice generation failed")
 
     def iterfile():
@@ -102,12 +172,35 @@ async def generate_audio(req: AudioSpeechRequest):
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
         },
+        background=BackgroundTask(_remove_file, result.output_path),  # file chỉ dùng cho response này
     )
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"} 
+    """Liveness: process đang chạy; kèm trạng thái warm-up của generator"""
+    return {"status": "ok", "warmup": generator_warmup.status()}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 khi generator đã warm xong, 503 khi đang warm hoặc warm-up lỗi"""
+    warmup = generator_warmup.status()
+    if not generator_warmup.ready:
+        return JSONResponse(status_code=503, content={"status": warmup["state"], "warmup": warmup})
+    return {"status": "ready", "warmup": warmup}
+
+
+@app.get("/v1/metrics/synthesis")
+async def synthesis_metrics():
+    """Queue depth / in-flight / throughput của synthesis executor"""
+    return synthesis_executor.metrics()
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    synthesis_executor.shutdown()
+    emotion_store.shutdown()
 
 app.include_router(emotion_router)
 app.include_router(voice_router) 
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Synthesis Executor
+====================
+Bounded worker pool cho các job TTS blocking của API server.
+
+- Synthesis chạy trong thread pool riêng -> event loop vẫn trả lời /health, /v1/voices...
+- ``max_concurrency`` job chạy song song, tối đa ``max_queue`` job chờ thêm
+- Vượt quá giới hạn -> ``SynthesisQueueFull`` (API trả 429)
+- Streaming request được admit một lần và giữ slot tới khi stream kết thúc (``admit_stream``)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class SynthesisQueueFull(Exception):
+    """Admission queue đầy - client nên retry sau"""
+
+
+class SynthesisExecutor:
+    def __init__(self, max_concurrency: int = 1, max_queue: int = 8):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="synthesis")
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + in-flight + stream đang mở
+        self._in_flight = 0
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "total_seconds": 0.0}
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrency + self.max_queue
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._stats["rejected"] += 1
+                raise SynthesisQueueFull(f"Synthesis queue full ({self._pending}/{self.capacity})")
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _execute(self, fn: Callable, *args, **kwargs) -> Any:
+        """Chạy fn và cập nhật in-flight/stats (không đụng tới admission slot)"""
+        with self._lock:
+            self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self._stats["completed"] += 1
+            return result
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._stats["total_seconds"] += time.perf_counter() - started
+
+    def _tracked(self, fn: Callable, *args, **kwargs) -> Any:
+        try:
+            return self._execute(fn, *args, **kwargs)
+        finally:
+            self._release()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Chạy fn trong pool và await kết quả; raise SynthesisQueueFull nếu quá tải"""
+        self._admit()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, lambda: self._tracked(fn, *args, **kwargs))
+
+    def admit_stream(self) -> "StreamSlot":
+        """
+        Admission một lần cho cả streaming request; raise SynthesisQueueFull nếu quá tải.
+        Slot được giữ tới khi ``StreamSlot.release()`` (stream kết thúc hoặc bị đóng).
+        """
+        self._admit()
+        return StreamSlot(self)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self._stats["completed"] + self._stats["failed"]
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": self._pending - self._in_flight,
+                "completed": self._stats["completed"],
+                "failed": self._stats["failed"],
+                "rejected": self._stats["rejected"],
+                "avg_seconds": round(self._stats["total_seconds"] / finished, 3) if finished else 0.0,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class StreamSlot:
+    """Admission slot của một streaming request - mọi chunk chạy dưới slot này"""
+
+    def __init__(self, executor: SynthesisExecutor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._released = False
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Chạy một chunk trong pool và chờ kết quả (gọi từ thread của stream generator)"""
+        if self._released:
+            raise RuntimeError("Stream slot already released")
+        return self._executor._pool.submit(self._executor._execute, fn, *args, **kwargs).result()
+
+    def release(self):
+        """Trả slot về executor; gọi nhiều lần cũng chỉ trả một lần"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._executor._release()
+
+
+# Model Chatterbox không thread-safe -> mặc định 1 job chạy cùng lúc
+synthesis_executor = SynthesisExecutor(
+    max_concurrency=int(os.getenv("VS_SYNTHESIS_CONCURRENCY", "1")),
+    max_queue=int(os.getenv("VS_SYNTHESIS_MAX_QUEUE", "8")),
+)
@@ -5,6 +5,7 @@ import os
 
 # Thư viện quản lý voices có sẵn
 from src.tts.chatterbox_voices_integration import ChatterboxVoicesManager
+from src.tts.voice_catalog import invalidate_voice_catalog
 
 router = APIRouter(prefix="/v1/voices", tags=["voices"])
 
@@ -64,5 +65,6 @@ async def upload_voice(file: UploadFile = File(...), name: str | None = None):
     # Reload voices cache để nhận giọng mới
     voices_manager.voices_cache.clear()
     voices_manager.setup_predefined_voices()
+    invalidate_voice_catalog()  # provider resolve giọng mới ngay, không chờ watcher
 
     return {"success": True, "voice_id": safe_name} 
\ No newline at end of file
@@ -147,6 +147,8 @@ def test_quality_controller():
         print(f"   🔄 Average Candidates Needed: {controller_stats['avg_candidates_needed']:.1f}")
         print(f"   📋 Total Tasks Processed: {controller_stats['total_tasks']}")
         
+        controller.cleanup()
+        
         # Calculate performance improvements
         avg_success_rate = sum(r['success_rate'] for r in quality_results) / len(quality_results)
         avg_quality_score = sum(r['best_score'] for r in quality_results) / len(quality_results)
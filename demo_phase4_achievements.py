@@ -268,6 +268,8 @@ def test_phase4_integration():
             except Exception as e:
                 print(f"      ❌ Error: {str(e)[:50]}...")
         
+        quality_controller.cleanup()
+        
         # Track in analytics
         total_duration = len(test_segments) * 4.2  # Estimate 4.2 minutes per segment
         processing_time = len(test_segments) * 15.0  # 15 seconds per segment
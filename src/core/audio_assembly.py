@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+[MUSIC] AUDIO ASSEMBLY
+=====================
+
+Ghép các chunk waveform trong memory:
+- Tính tổng độ dài trước, preallocate một mảng output duy nhất
+- Copy từng chunk vào đúng offset, silence chỉ là vùng zero giữa các chunk
+- Ghi file WAV đúng một lần, không file trung gian, không decode qua ffmpeg
+"""
+
+import os
+import wave
+from typing import List, Optional
+
+import numpy as np
+
+
+def assemble_waveforms(chunks: List[np.ndarray], sample_rate: int, gap_ms: int = 300) -> np.ndarray:
+    """
+    Ghép các waveform mono float32 với khoảng lặng gap_ms giữa chúng.
+
+    O(total samples): mỗi sample được copy đúng một lần.
+    """
+    chunks = [np.asarray(c, dtype=np.float32).reshape(-1) for c in chunks]
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+
+    gap = int(sample_rate * gap_ms / 1000)
+    total = sum(len(c) for c in chunks) + gap * (len(chunks) - 1)
+    output = np.zeros(total, dtype=np.float32)
+
+    offset = 0
+    for chunk in chunks:
+        output[offset:offset + len(chunk)] = chunk
+        offset += len(chunk) + gap
+
+    return output
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int):
+    """Ghi float32 mono [-1, 1] ra WAV PCM 16-bit"""
+    save_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(save_dir, exist_ok=True)
+
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+
+
+def assemble_to_file(chunks: List[np.ndarray], sample_rate: int, output_path: str,
+                     gap_ms: int = 300) -> Optional[float]:
+    """Ghép và ghi file; trả về duration (giây)"""
+    samples = assemble_waveforms(chunks, sample_rate, gap_ms)
+    write_wav(output_path, samples, sample_rate)
+    return len(samples) / sample_rate if sample_rate else None
@@ -6,11 +6,67 @@ Audio Combiner - Theo cách Chatterbox-Audiobook implement
 import numpy as np
 import wave
 import os
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Số frames mỗi block khi stream-combine (~3s @ 22.05kHz)
+STREAM_BLOCK_FRAMES = 65536
+
+
+def _pcm_to_float(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Decode PCM bytes (8/16/24/32-bit) về float32 mono [-1, 1]"""
+    if sample_width == 1:
+        data = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        data = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        data = ints.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        data = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+    
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    return data
+
+
+def _float_to_int16(data: np.ndarray) -> np.ndarray:
+    return (np.clip(data, -1.0, 1.0) * 32767).astype('<i2')
+
+
+class _LinearResampler:
+    """Streaming linear-interpolation resampler, giữ liên tục giữa các block"""
+    
+    def __init__(self, in_rate: int, out_rate: int):
+        self.step = in_rate / out_rate
+        self.pos = 0.0  # vị trí output kế tiếp, tính theo input samples từ đầu buffer
+        self.tail = None  # sample cuối của block trước
+    
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.tail is not None:
+            block = np.concatenate(([self.tail], block))
+        n = len(block)
+        if n < 2:
+            if n:
+                self.tail = block[-1]
+            return np.zeros(0, dtype=np.float32)
+        
+        count = int(np.ceil((n - 1 - self.pos) / self.step)) if self.pos < n - 1 else 0
+        positions = self.pos + self.step * np.arange(count)
+        out = np.interp(positions, np.arange(n), block).astype(np.float32)
+        
+        # Block kế tiếp bắt đầu tại block[n - 1]
+        self.pos = self.pos + self.step * count - (n - 1)
+        self.tail = block[-1]
+        return out
+
+
 class AudioCombiner:
     """
     Simple audio combiner theo cách Chatterbox-Audiobook
@@ -85,7 +141,12 @@ class AudioCombiner:
     def combine_audio_files(self, file_paths: List[str], output_path: str, 
                            output_format: str = "wav") -> str:
         """
-        Combine multiple audio files into one.
+        Combine multiple audio files into one - streaming, O(1) memory.
+        
+        Mỗi input được kiểm tra header; khác channels/sample width/sample rate
+        sẽ được convert sang int16 mono @ self.sample_rate theo từng block.
+        Frames được copy thẳng vào file output theo block cố định, header RIFF
+        được patch khi đóng file.
         
         Args:
             file_paths: List of audio file paths
@@ -98,43 +159,90 @@ class AudioCombiner:
         if not file_paths:
             return "[EMOJI] No audio files provided"
         
+        if output_format.lower() != "wav":
+            return "[EMOJI] Only WAV format supported"
+        
         try:
-            combined_audio = []
+            combined_count = 0
+            total_frames = 0
             
-            for file_path in file_paths:
-                if not os.path.exists(file_path):
-                    logger.warning(f"File not found: {file_path}")
-                    continue
+            with wave.open(output_path, 'wb') as out_file:
+                out_file.setnchannels(1)
+                out_file.setsampwidth(2)
+                out_file.setframerate(self.sample_rate)
                 
-                # Read WAV file
-                with wave.open(file_path, 'rb') as wav_file:
-                    frames = wav_file.readframes(wav_file.getnframes())
-                    audio_data = np.frombuffer(frames, dtype=np.int16)
-                    combined_audio.append(audio_data)
+                for file_path in file_paths:
+                    if not os.path.exists(file_path):
+                        logger.warning(f"File not found: {file_path}")
+                        continue
+                    
+                    for block in self._iter_pcm16_blocks(file_path):
+                        out_file.writeframes(block.tobytes())
+                        total_frames += len(block)
+                    combined_count += 1
             
-            if not combined_audio:
+            if not combined_count:
+                os.remove(output_path)
                 return "[EMOJI] No valid audio files found"
             
-            # Concatenate all audio - đây là cách họ làm
-            final_audio = np.concatenate(combined_audio)
-            
-            # Save combined audio
-            if output_format.lower() == "wav":
-                with wave.open(output_path, 'wb') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(self.sample_rate)
-                    wav_file.writeframes(final_audio.tobytes())
-            else:
-                return "[EMOJI] Only WAV format supported"
-            
-            logger.info(f"Combined {len(file_paths)} files into {output_path}")
-            return f"[OK] Combined {len(file_paths)} files into {output_path}"
+            logger.info(f"Combined {combined_count} files into {output_path} ({total_frames / self.sample_rate:.1f}s)")
+            return f"[OK] Combined {combined_count} files into {output_path}"
             
         except Exception as e:
             logger.error(f"Error combining audio files: {e}")
             return f"[EMOJI] Error combining audio files: {str(e)}"
     
+    def _iter_pcm16_blocks(self, file_path: str) -> Iterator[np.ndarray]:
+        """
+        Đọc file theo block STREAM_BLOCK_FRAMES frames, yield int16 mono @ self.sample_rate.
+        PCM WAV đọc bằng wave; float/other formats fallback qua soundfile nếu có.
+        """
+        try:
+            reader = wave.open(file_path, 'rb')
+        except wave.Error:
+            yield from self._iter_soundfile_blocks(file_path)
+            return
+        
+        with reader:
+            channels = reader.getnchannels()
+            sample_width = reader.getsampwidth()
+            rate = reader.getframerate()
+            
+            if channels == 1 and sample_width == 2 and rate == self.sample_rate:
+                # Fast path: đúng format, copy thẳng
+                while True:
+                    frames = reader.readframes(STREAM_BLOCK_FRAMES)
+                    if not frames:
+                        break
+                    yield np.frombuffer(frames, dtype='<i2')
+                return
+            
+            logger.info(f"Converting {os.path.basename(file_path)}: {channels}ch/{sample_width * 8}bit/{rate}Hz -> 1ch/16bit/{self.sample_rate}Hz")
+            resampler = _LinearResampler(rate, self.sample_rate) if rate != self.sample_rate else None
+            while True:
+                frames = reader.readframes(STREAM_BLOCK_FRAMES)
+                if not frames:
+                    break
+                block = _pcm_to_float(frames, sample_width, channels)
+                if resampler:
+                    block = resampler.process(block)
+                yield _float_to_int16(block)
+    
+    def _iter_soundfile_blocks(self, file_path: str) -> Iterator[np.ndarray]:
+        """Fallback cho WAV float32/extensible và các format soundfile đọc được"""
+        try:
+            import soundfile as sf
+        except ImportError:
+            raise ValueError(f"Unsupported WAV format (install soundfile to read it): {file_path}")
+        
+        with sf.SoundFile(file_path) as reader:
+            resampler = _LinearResampler(reader.samplerate, self.sample_rate) if reader.samplerate != self.sample_rate else None
+            for block in reader.blocks(blocksize=STREAM_BLOCK_FRAMES, dtype='float32', always_2d=True):
+                mono = block.mean(axis=1)
+                if resampler:
+                    mono = resampler.process(mono)
+                yield _float_to_int16(mono)
+    
     def combine_audio_arrays(self, audio_arrays: List[np.ndarray], 
                             output_path: str) -> str:
         """
@@ -4,14 +4,20 @@ Support cho WAV, MP3, FLAC với quality optimization
 """
 
 import os
+import time
+import hashlib
 import subprocess
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
 from pathlib import Path
 import json
 from datetime import datetime
 
+EXPORT_MANIFEST = ".export_manifest.json"
+
 
 class AudioFormat(Enum):
     """Supported audio formats"""
@@ -104,8 +110,11 @@ class BatchExportJob:
         self.settings = ExportSettings()
         self.status = "pending"  # pending, running, completed, failed
         self.progress = 0.0      # 0.0 to 1.0
+        self.skip_up_to_date = "mtime"  # "mtime", "hash", "none"
+        self.max_workers = os.cpu_count() or 2
         self.results: List[Dict] = []
         self.errors: List[str] = []
+        self.stats: Dict = {}
 
 
 class AudioExporter:
@@ -115,6 +124,10 @@ class AudioExporter:
         self.ffmpeg_path = self._find_ffmpeg()
         self.active_jobs: Dict[str, BatchExportJob] = {}
         
+        # ffprobe cache: (abs path, mtime, size) -> info
+        self._probe_cache: Dict[Tuple[str, float, int], Dict] = {}
+        self._probe_lock = threading.Lock()
+        
     def _find_ffmpeg(self) -> Optional[str]:
         """Find FFmpeg executable"""
         # Try common locations
@@ -135,10 +148,27 @@ class AudioExporter:
         return None
     
     def _get_audio_info(self, audio_path: str) -> Dict:
-        """Get audio file information using FFprobe"""
+        """Get audio file information using FFprobe (cached theo path + mtime + size)"""
         if not self.ffmpeg_path:
             return {}
-            
+        
+        try:
+            stat = os.stat(audio_path)
+            stamp = (os.path.abspath(audio_path), stat.st_mtime, stat.st_size)
+        except OSError:
+            return {}
+        
+        with self._probe_lock:
+            if stamp in self._probe_cache:
+                return self._probe_cache[stamp]
+        
+        info = self._run_ffprobe(audio_path)
+        if info:
+            with self._probe_lock:
+                self._probe_cache[stamp] = info
+        return info
+    
+    def _run_ffprobe(self, audio_path: str) -> Dict:
         try:
             ffprobe_path = self.ffmpeg_path.replace('ffmpeg', 'ffprobe')
             cmd = [
@@ -163,7 +193,42 @@ class AudioExporter:
             
         cmd = [self.ffmpeg_path, '-i', input_path, '-y']  # -y to overwrite
         
-        # Audio filters
+        # Apply filters
+        filters = self._build_filters(settings)
+        if filters:
+            cmd.extend(['-af', ','.join(filters)])
+        
+        cmd.extend(self._build_codec_args(audio_format, settings))
+        cmd.append(output_path)
+        return cmd
+    
+    def _build_multi_output_command(self, input_path: str, outputs: List[Tuple[AudioFormat, str]],
+                                    settings: ExportSettings) -> List[str]:
+        """
+        Một lần gọi FFmpeg cho mọi format: decode + filter một lần, asplit ra N output
+        """
+        if not self.ffmpeg_path:
+            raise Exception("FFmpeg not available")
+        
+        cmd = [self.ffmpeg_path, '-y', '-i', input_path]
+        
+        filters = self._build_filters(settings)
+        if filters:
+            labels = ''.join(f'[out{i}]' for i in range(len(outputs)))
+            split = f'asplit={len(outputs)}{labels}' if len(outputs) > 1 else 'anull[out0]'
+            cmd.extend(['-filter_complex', f"[0:a]{','.join(filters)},{split}"])
+            maps = [f'[out{i}]' for i in range(len(outputs))]
+        else:
+            maps = ['0:a'] * len(outputs)
+        
+        for stream, (audio_format, output_path) in zip(maps, outputs):
+            cmd.extend(['-map', stream])
+            cmd.extend(self._build_codec_args(audio_format, settings))
+            cmd.append(output_path)
+        return cmd
+    
+    def _build_filters(self, settings: ExportSettings) -> List[str]:
+        """Audio filter chain chung cho mọi format"""
         filters = []
         
         # Volume normalization
@@ -180,11 +245,11 @@ class AudioExporter:
         if settings.remove_silence:
             filters.append('silenceremove=start_periods=1:start_duration=1:start_threshold=-60dB:detection=peak,aformat=dblp,areverse,silenceremove=start_periods=1:start_duration=1:start_threshold=-60dB:detection=peak,aformat=dblp,areverse')
         
-        # Apply filters
-        if filters:
-            cmd.extend(['-af', ','.join(filters)])
-        
-        # Format-specific settings
+        return filters
+    
+    def _build_codec_args(self, audio_format: AudioFormat, settings: ExportSettings) -> List[str]:
+        """Format-specific codec settings"""
+        cmd = []
         if audio_format == AudioFormat.MP3:
             cmd.extend(['-codec:a', 'libmp3lame'])
             if settings.mp3_vbr:
@@ -209,7 +274,6 @@ class AudioExporter:
             cmd.extend(['-codec:a', 'aac'])
             cmd.extend(['-b:a', '256k'])
         
-        cmd.append(output_path)
         return cmd
     
     def export_single_file(self, input_path: str, output_path: str, 
@@ -302,7 +366,13 @@ class AudioExporter:
         return job_id
     
     def execute_batch_job(self, job_id: str) -> bool:
-        """Execute batch export job"""
+        """
+        Execute batch export job
+        
+        Parallel scheduler: mỗi input file là một task trên worker pool (job.max_workers),
+        mỗi task decode input một lần và ghi mọi format trong một lần gọi FFmpeg.
+        Output đã up-to-date (theo mtime hoặc hash của input + settings) được bỏ qua.
+        """
         if job_id not in self.active_jobs:
             print(f"[EMOJI] Job not found: {job_id}")
             return False
@@ -315,37 +385,73 @@ class AudioExporter:
         print(f"[FOLDER] Files: {len(job.input_files)}")
         print(f"[MUSIC] Formats: {[f.value for f in job.formats]}")
         
-        total_tasks = len(job.input_files) * len(job.formats)
-        completed_tasks = 0
+        start_time = time.time()
+        manifest = self._load_export_manifest(job.output_dir)
+        lock = threading.Lock()
+        totals = {'written': 0, 'skipped': 0, 'failed': 0, 'audio_seconds': 0.0}
+        completed_files = 0
         
         try:
+            input_files = []
             for input_file in job.input_files:
                 if not os.path.exists(input_file):
                     error_msg = f"Input file not found: {input_file}"
                     job.errors.append(error_msg)
                     print(f"[WARNING] {error_msg}")
-                    continue
-                
-                # Process each format
-                file_results = self.export_multiple_formats(
-                    input_file, job.output_dir, job.formats, job.settings
-                )
-                
-                # Record results
-                result_entry = {
-                    'input_file': input_file,
-                    'formats': file_results,
-                    'timestamp': datetime.now().isoformat()
+                else:
+                    input_files.append(input_file)
+            
+            workers = max(1, min(job.max_workers, len(input_files)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as executor:
+                futures = {
+                    executor.submit(self._export_file_all_formats, input_file, job, manifest, lock): input_file
+                    for input_file in input_files
                 }
-                job.results.append(result_entry)
-                
-                # Update progress
-                completed_tasks += len(job.formats)
-                job.progress = completed_tasks / total_tasks
-                print(f"[STATS] Progress: {job.progress*100:.1f}%")
+                for future in as_completed(futures):
+                    input_file = futures[future]
+                    try:
+                        result_entry = future.result()
+                    except Exception as e:
+                        job.errors.append(f"{input_file}: {e}")
+                        result_entry = {
+                            'input_file': input_file,
+                            'formats': {f.value: False for f in job.formats},
+                            'skipped': [],
+                            'timestamp': datetime.now().isoformat()
+                        }
+                    job.results.append(result_entry)
+                    
+                    totals['skipped'] += len(result_entry['skipped'])
+                    totals['written'] += sum(
+                        1 for fmt, ok in result_entry['formats'].items() if ok and fmt not in result_entry['skipped']
+                    )
+                    totals['failed'] += sum(1 for ok in result_entry['formats'].values() if not ok)
+                    totals['audio_seconds'] += result_entry.get('duration', 0.0)
+                    
+                    # Update progress
+                    completed_files += 1
+                    job.progress = completed_files / max(1, len(input_files))
+                    print(f"[STATS] Progress: {job.progress*100:.1f}%")
+            
+            self._save_export_manifest(job.output_dir, manifest)
+            
+            elapsed = time.time() - start_time
+            job.stats = {
+                'files': len(input_files),
+                'outputs_written': totals['written'],
+                'outputs_skipped': totals['skipped'],
+                'outputs_failed': totals['failed'],
+                'workers': workers,
+                'elapsed_seconds': round(elapsed, 2),
+                'files_per_second': round(len(input_files) / elapsed, 2) if elapsed > 0 else 0.0,
+                'audio_seconds': round(totals['audio_seconds'], 1),
+                'realtime_factor': round(totals['audio_seconds'] / elapsed, 1) if elapsed > 0 else 0.0
+            }
             
             job.status = "completed"
             print(f"[SUCCESS] Batch job completed: {job.name}")
+            print(f"[STATS] {totals['written']} written, {totals['skipped']} up-to-date, "
+                  f"{totals['failed']} failed in {elapsed:.1f}s ({job.stats['realtime_factor']}x realtime)")
             return True
             
         except Exception as e:
@@ -354,6 +460,97 @@ class AudioExporter:
             print(f"[EMOJI] Batch job failed: {e}")
             return False
     
+    def _export_file_all_formats(self, input_file: str, job: BatchExportJob,
+                                 manifest: Dict, lock: threading.Lock) -> Dict:
+        """Export một input ra mọi format của job trong một lần gọi FFmpeg"""
+        base_name = Path(input_file).stem
+        os.makedirs(job.output_dir, exist_ok=True)
+        
+        audio_info = self._get_audio_info(input_file)
+        duration = float(audio_info.get('format', {}).get('duration', 0) or 0) if audio_info else 0.0
+        
+        results = {}
+        skipped = []
+        pending: List[Tuple[AudioFormat, str, str]] = []
+        for audio_format in job.formats:
+            output_path = os.path.join(job.output_dir, f"{base_name}.{audio_format.value}")
+            stamp = self._export_stamp(input_file, audio_format, job.settings, job.skip_up_to_date)
+            with lock:
+                up_to_date = stamp and manifest.get(os.path.basename(output_path)) == stamp
+            if up_to_date and os.path.exists(output_path):
+                results[audio_format.value] = True
+                skipped.append(audio_format.value)
+            else:
+                pending.append((audio_format, output_path, stamp))
+        
+        if pending:
+            if self.ffmpeg_path:
+                cmd = self._build_multi_output_command(
+                    input_file, [(fmt, path) for fmt, path, _ in pending], job.settings
+                )
+                print(f"[REFRESH] Exporting {base_name} -> {', '.join(fmt.value.upper() for fmt, _, _ in pending)}")
+                completed = subprocess.run(cmd, capture_output=True, text=True)
+                if completed.returncode != 0:
+                    print(f"[EMOJI] Export failed for {base_name}: {completed.stderr[-500:]}")
+                ok_all = completed.returncode == 0
+            else:
+                ok_all = None  # fallback từng format
+            
+            for audio_format, output_path, stamp in pending:
+                if ok_all is None:
+                    ok = self._fallback_export(input_file, output_path, audio_format)
+                else:
+                    ok = ok_all and os.path.exists(output_path)
+                results[audio_format.value] = ok
+                if ok and stamp:
+                    with lock:
+                        manifest[os.path.basename(output_path)] = stamp
+        
+        return {
+            'input_file': input_file,
+            'formats': results,
+            'skipped': skipped,
+            'duration': duration,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _export_stamp(self, input_file: str, audio_format: AudioFormat, settings: ExportSettings,
+                      mode: str) -> Optional[str]:
+        """Fingerprint input (mtime+size hoặc content hash) + format + settings; None = không skip"""
+        if mode == "none":
+            return None
+        stat = os.stat(input_file)
+        if mode == "hash":
+            sha1 = hashlib.sha1()
+            with open(input_file, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    sha1.update(block)
+            source = sha1.hexdigest()
+        else:
+            source = f"{os.path.abspath(input_file)}:{stat.st_mtime}:{stat.st_size}"
+        payload = json.dumps({'source': source, 'format': audio_format.value, 'settings': vars(settings)},
+                             sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def _load_export_manifest(self, output_dir: str) -> Dict:
+        manifest_path = os.path.join(output_dir, EXPORT_MANIFEST)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_export_manifest(self, output_dir: str, manifest: Dict):
+        manifest_path = os.path.join(output_dir, EXPORT_MANIFEST)
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            tmp_path = manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, manifest_path)
+        except OSError as e:
+            print(f"[WARNING] Could not write export manifest: {e}")
+    
     def get_job_status(self, job_id: str) -> Optional[Dict]:
         """Get batch job status"""
         if job_id not in self.active_jobs:
@@ -367,6 +564,7 @@ class AudioExporter:
             'files_processed': len(job.results),
             'total_files': len(job.input_files),
             'errors': job.errors,
+            'stats': job.stats,
             'created_at': job.created_at
         }
     
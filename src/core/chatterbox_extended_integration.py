@@ -466,10 +466,14 @@ class ChatterboxExtendedIntegration:
         
         if old_config['generation_mode'] != self.config.generation_mode:
             logger.info("   [TARGET] Reinitializing generation controller...")
+            if self.generation_controller:
+                self.generation_controller.cleanup()
             self.generation_controller = self._create_generation_controller()
         
         if old_config['whisper_mode'] != self.config.whisper_mode:
             logger.info("   [AUDIO] Reinitializing Whisper manager...")
+            if self.whisper_manager:
+                self.whisper_manager.cleanup_model()
             self.whisper_manager = self._create_whisper_manager()
         
         logger.info("[OK] Configuration updated successfully")
@@ -562,6 +566,8 @@ class ChatterboxExtendedIntegration:
         try:
             if self.whisper_manager:
                 self.whisper_manager.cleanup_model()
+            if self.generation_controller:
+                self.generation_controller.cleanup()
             
             # Clear stats
             self.integration_stats = {key: 0 for key in self.integration_stats}
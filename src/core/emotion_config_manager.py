@@ -23,6 +23,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 import copy
 
+from core.emotion_parameter_table import EmotionParameterTable
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -67,6 +69,7 @@ class EmotionConfigManager:
         self.default_emotions = {}
         self.custom_emotions = {}
         self.emotion_presets = {}
+        self._parameter_table: Optional[EmotionParameterTable] = None
         
         # Initialize default emotions
         self.setup_default_emotions()
@@ -332,39 +335,23 @@ class EmotionConfigManager:
             return True
         return False
     
+    @property
+    def parameter_table(self) -> EmotionParameterTable:
+        """Compiled table (default + custom), build lại sau khi custom emotions thay đổi"""
+        if self._parameter_table is None:
+            self._parameter_table = EmotionParameterTable(
+                self.get_all_emotions(),
+                defaults={"exaggeration": 1.0, "cfg_weight": 0.5, "temperature": 0.7, "speed": 1.0}
+            )
+        return self._parameter_table
+    
     def get_emotion_parameters(self, emotion_name: str) -> Optional[Dict[str, float]]:
-        """Get emotion parameters as dict for TTS generation"""
-        all_emotions = self.get_all_emotions()
-        
-        if emotion_name in all_emotions:
-            emotion = all_emotions[emotion_name]
-            return {
-                "exaggeration": emotion.exaggeration,
-                "cfg_weight": emotion.cfg_weight,
-                "temperature": emotion.temperature,
-                "speed": emotion.speed
-            }
-        
-        # Fallback to neutral
-        if "neutral" in all_emotions:
-            emotion = all_emotions["neutral"]
-            return {
-                "exaggeration": emotion.exaggeration,
-                "cfg_weight": emotion.cfg_weight,
-                "temperature": emotion.temperature,
-                "speed": emotion.speed
-            }
-        
-        # Ultimate fallback
-        return {
-            "exaggeration": 1.0,
-            "cfg_weight": 0.5,
-            "temperature": 0.7,
-            "speed": 1.0
-        }
+        """Get emotion parameters as dict for TTS generation (fallback neutral)"""
+        return self.parameter_table.resolve(emotion_name).as_dict()
     
     def save_custom_emotions(self):
         """Save custom emotions to file"""
+        self._parameter_table = None
         try:
             config_file = self.config_dir / "custom_emotions.json"
             emotions_data = {
@@ -379,6 +366,7 @@ class EmotionConfigManager:
     
     def load_custom_emotions(self):
         """Load custom emotions from file"""
+        self._parameter_table = None
         try:
             config_file = self.config_dir / "custom_emotions.json"
             if config_file.exists():
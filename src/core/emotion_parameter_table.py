@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+[THEATER] EMOTION PARAMETER TABLE
+===========================
+
+Bảng resolve emotion -> (exaggeration, cfg_weight, temperature, speed) compile một lần
+lúc load, dùng chung cho UnifiedEmotionSystem, EmotionConfigManager và các TTS provider:
+- Mọi tên chính + alias (lowercase) -> một row duy nhất, lookup O(1)
+- Parameters đã clamp sẵn về range hợp lệ của Chatterbox, record immutable
+"""
+
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+PARAMETER_NAMES = ("exaggeration", "cfg_weight", "temperature", "speed")
+
+# Range hợp lệ khi generate (cùng range validate trong RealChatterboxProvider)
+PARAMETER_RANGES: Dict[str, Tuple[float, float]] = {
+    "exaggeration": (0.0, 2.0),
+    "cfg_weight": (0.0, 1.0),
+    "temperature": (0.1, 1.5),
+    "speed": (0.5, 2.0),
+}
+
+DEFAULT_PARAMETERS: Dict[str, float] = {"exaggeration": 1.0, "cfg_weight": 0.6, "temperature": 0.8, "speed": 1.0}
+
+
+def clamp_parameter(name: str, value: float) -> float:
+    low, high = PARAMETER_RANGES[name]
+    return max(low, min(high, float(value)))
+
+
+class EmotionRecord(NamedTuple):
+    """Một row đã compile (immutable)"""
+    name: str
+    exaggeration: float
+    cfg_weight: float
+    temperature: float
+    speed: float
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "exaggeration": self.exaggeration,
+            "cfg_weight": self.cfg_weight,
+            "temperature": self.temperature,
+            "speed": self.speed,
+        }
+
+
+class EmotionParameterTable:
+    """
+    Frozen emotion -> parameters table.
+
+    emotions: {name: object/dict có exaggeration, cfg_weight, temperature, speed}
+    aliases: {alias: name}. Thiếu parameter nào thì lấy từ ``defaults``.
+    """
+
+    def __init__(self, emotions: Mapping[str, object], aliases: Optional[Mapping[str, str]] = None,
+                 default_emotion: str = "neutral", defaults: Optional[Mapping[str, float]] = None):
+        defaults = {**DEFAULT_PARAMETERS, **(defaults or {})}
+        records: List[EmotionRecord] = []
+        index: Dict[str, int] = {}
+
+        for name, source in emotions.items():
+            values = [clamp_parameter(param, self._read(source, param, defaults[param])) for param in PARAMETER_NAMES]
+            index[name.lower()] = len(records)
+            records.append(EmotionRecord(name, *values))
+
+        for alias, target in (aliases or {}).items():
+            row = index.get(str(target).lower())
+            # Tên chính luôn thắng alias trùng tên
+            if row is not None:
+                index.setdefault(alias.lower(), row)
+
+        fallback = EmotionRecord(default_emotion, *(clamp_parameter(p, defaults[p]) for p in PARAMETER_NAMES))
+        self.default_row = index.get(default_emotion.lower())
+        if self.default_row is None:
+            self.default_row = len(records)
+            records.append(fallback)
+
+        self.records: Tuple[EmotionRecord, ...] = tuple(records)
+        self._index = index
+
+    @staticmethod
+    def _read(source: object, param: str, default: float) -> float:
+        if isinstance(source, Mapping):
+            # Hỗ trợ cả format lồng {"parameters": {...}} của custom_emotions.json
+            nested = source.get("parameters")
+            if isinstance(nested, Mapping) and param in nested:
+                return nested[param]
+            return source.get(param, default)
+        return getattr(source, param, default)
+
+    # ---- lookup ----
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return bool(name) and name.lower() in self._index
+
+    def row_of(self, name: Optional[str]) -> Optional[int]:
+        return self._index.get(name.lower()) if name else None
+
+    def get(self, name: Optional[str]) -> Optional[EmotionRecord]:
+        """Record của emotion/alias, None nếu không có"""
+        row = self.row_of(name)
+        return self.records[row] if row is not None else None
+
+    def resolve(self, name: Optional[str]) -> EmotionRecord:
+        """Như get() nhưng fallback về default emotion (neutral)"""
+        row = self.row_of(name)
+        return self.records[self.default_row if row is None else row]
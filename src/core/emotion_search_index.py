@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+[SEARCH] EMOTION SEARCH INDEX
+=======================
+
+Inverted index trigram cho tìm kiếm emotion khi gõ (emotion config tabs):
+- Term = tên emotion, alias, từng từ trong description và cả description (cho query
+  dạng cụm từ như "balanced, objective"), kèm trọng số theo field
+- Accent folding: "vui vẻ" / "Vui Ve" / "vui ve" cho cùng kết quả, đ -> d
+- Query -> trigram -> candidate emotions, rồi xếp hạng: exact > prefix > substring > fuzzy
+  (trigram Dice / edit ratio, bắt lỗi gõ sai như "hapy", "anrgy")
+- add()/remove() cập nhật incremental, không build lại cả index
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Trọng số theo field: trùng tên chính xếp trên alias, alias trên description
+FIELD_WEIGHTS = {"name": 1.0, "alias": 0.9, "description": 0.6}
+
+# Điểm theo kiểu match (nhân với trọng số field)
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.85
+SUBSTRING_SCORE = 0.7
+FUZZY_SCALE = 0.6
+MIN_FUZZY_SIMILARITY = 0.6
+MAX_FUZZY_LENGTH_DIFF = 2
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def fold_text(text: str) -> str:
+    """Lowercase + bỏ dấu (NFD, loại combining marks), đ -> d, gộp khoảng trắng"""
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return " ".join("".join(ch for ch in text if not unicodedata.combining(ch)).split())
+
+
+def trigrams(term: str) -> Set[str]:
+    """Trigram của term có đánh dấu biên ("$hap", ..., "py$")"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EmotionSearchIndex:
+    """Trigram inverted index: gram -> {emotion name}, kèm danh sách term của từng emotion"""
+
+    def __init__(self):
+        self._terms: Dict[str, List[Tuple[str, float, Set[str]]]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._terms
+
+    # ---- build / incremental update ----
+
+    def add(self, name: str, aliases: Iterable[str] = (), description: str = ""):
+        """Thêm hoặc cập nhật một emotion"""
+        if name in self._terms:
+            self.remove(name)
+
+        terms: Dict[str, float] = {}
+
+        def put(term: str, weight: float):
+            term = fold_text(term)
+            if term and weight > terms.get(term, 0.0):
+                terms[term] = weight
+
+        put(name, FIELD_WEIGHTS["name"])
+        for alias in aliases:
+            put(alias, FIELD_WEIGHTS["alias"])
+        description = fold_text(description or "")
+        put(description, FIELD_WEIGHTS["description"])  # query nhiều từ match prefix/substring của cả câu
+        for word in _WORD_PATTERN.findall(description):
+            put(word, FIELD_WEIGHTS["description"])
+
+        entries = [(term, weight, trigrams(term)) for term, weight in terms.items()]
+        self._terms[name] = entries
+        for _, _, grams in entries:
+            for gram in grams:
+                self._postings[gram].add(name)
+
+    def add_alias(self, name: str, alias: str):
+        """Thêm alias cho emotion đã có trong index"""
+        entries = self._terms.get(name)
+        term = fold_text(alias)
+        if entries is None or not term or any(existing == term for existing, _, _ in entries):
+            return
+        grams = trigrams(term)
+        entries.append((term, FIELD_WEIGHTS["alias"], grams))
+        for gram in grams:
+            self._postings[gram].add(name)
+
+    def remove(self, name: str):
+        entries = self._terms.pop(name, None)
+        if not entries:
+            return
+        for _, _, grams in entries:
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(name)
+                    if not posting:
+                        del self._postings[gram]
+
+    # ---- query ----
+
+    def _candidates(self, query: str, query_grams: Set[str]) -> Set[str]:
+        if len(query) >= 2:
+            candidates: Set[str] = set()
+            for gram in query_grams:
+                candidates |= self._postings.get(gram, set())
+            return candidates
+        # Query 1 ký tự: chỉ match đầu từ
+        prefix = f"${query}"
+        return {name for gram, names in self._postings.items() if gram.startswith(prefix) for name in names}
+
+    @staticmethod
+    def _score_term(query: str, query_grams: Set[str], term: str, grams: Set[str]) -> float:
+        if term == query:
+            return EXACT_SCORE
+        if term.startswith(query):
+            return PREFIX_SCORE
+        if query in term:
+            return SUBSTRING_SCORE
+        shared = len(query_grams & grams)
+        if not shared:
+            return 0.0
+        similarity = 2.0 * shared / (len(query_grams) + len(grams))
+        if similarity < MIN_FUZZY_SIMILARITY and abs(len(term) - len(query)) <= MAX_FUZZY_LENGTH_DIFF:
+            # Đảo/thiếu ký tự làm mất nhiều trigram -> dùng edit ratio cho term cùng độ dài
+            similarity = max(similarity, SequenceMatcher(None, query, term).ratio())
+        return similarity * FUZZY_SCALE if similarity >= MIN_FUZZY_SIMILARITY else 0.0
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """Top-k (name, score) theo điểm giảm dần; query rỗng trả về mọi emotion theo tên"""
+        query = fold_text(query)
+        if not query:
+            names = sorted(self._terms)
+            return [(name, 0.0) for name in (names[:limit] if limit else names)]
+
+        query_grams = trigrams(query)
+        scored = []
+        for name in self._candidates(query, query_grams):
+            best = max(
+                (self._score_term(query, query_grams, term, grams) * weight
+                 for term, weight, grams in self._terms[name]),
+                default=0.0,
+            )
+            if best > 0.0:
+                scored.append((name, best))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit] if limit else scored
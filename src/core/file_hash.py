@@ -0,0 +1,34 @@
+"""
+File Content Hash
+SHA1 nội dung file, memoized theo (abs path, mtime, size)
+
+Dùng chung cho các cache key theo nội dung: voice conditionals, audio result cache,
+transcription cache, render manifest (file giọng tham chiếu).
+"""
+import os
+import hashlib
+import threading
+from typing import Dict, Tuple
+
+# (abs path, mtime, size) -> sha1, tránh hash lại file mỗi dòng thoại
+_file_hashes: Dict[Tuple[str, float, int], str] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def file_content_hash(file_path: str) -> str:
+    """SHA1 nội dung file, memoized theo (path, mtime, size)"""
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    stamp = (abs_path, stat.st_mtime, stat.st_size)
+
+    with _file_hashes_lock:
+        digest = _file_hashes.get(stamp)
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(abs_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha1.update(block)
+        digest = sha1.hexdigest()
+        with _file_hashes_lock:
+            _file_hashes[stamp] = digest
+    return digest
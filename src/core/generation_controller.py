@@ -14,6 +14,7 @@ Advanced generation logic & quality control tái tạo từ Chatterbox TTS Exten
 import os
 import time
 import asyncio
+import inspect
 import logging
 import tempfile
 import statistics
@@ -87,6 +88,14 @@ class BatchGenerationResult:
     processing_time: float
     success_rate: float
 
+def _accepts_keyword(func: Callable, name: str) -> bool:
+    """func nhận keyword ``name`` (tham số cùng tên hoặc **kwargs)"""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == name or p.kind == inspect.Parameter.VAR_KEYWORD for p in params)
+
 class GenerationController:
     """Controller chính cho advanced generation logic"""
     
@@ -114,14 +123,11 @@ class GenerationController:
     def _initialize_whisper(self):
         """Initialize Whisper model cho validation"""
         try:
-            if self.config.whisper_backend == "faster-whisper":
-                from faster_whisper import WhisperModel
-                logger.info(f"Loading faster-whisper model: {self.config.whisper_model}")
-                self.whisper_model = WhisperModel(self.config.whisper_model)
-            else:
-                import whisper
-                logger.info(f"Loading OpenAI Whisper model: {self.config.whisper_model}")
-                self.whisper_model = whisper.load_model(self.config.whisper_model)
+            # Dùng chung model với WhisperManager/validators qua pool
+            from core.whisper_model_pool import get_whisper_model_pool
+            backend = "faster-whisper" if self.config.whisper_backend == "faster-whisper" else "openai"
+            logger.info(f"Acquiring {backend} Whisper model: {self.config.whisper_model}")
+            self.whisper_model = get_whisper_model_pool().acquire(self.config.whisper_model, backend)
             
             self.whisper_available = True
             logger.info("[OK] Whisper model loaded successfully")
@@ -130,6 +136,14 @@ class GenerationController:
             logger.warning(f"[EMOJI] Failed to load Whisper model: {e}")
             self.whisper_available = False
     
+    def cleanup(self):
+        """Trả Whisper model về pool - owner gọi khi bỏ controller"""
+        if self.whisper_model is not None:
+            from core.whisper_model_pool import get_whisper_model_pool
+            get_whisper_model_pool().release(self.whisper_model)
+            self.whisper_model = None
+        self.whisper_available = False
+    
     async def generate_with_quality_control(self, 
                                           text_blocks: List[str],
                                           generation_function: Callable,
@@ -309,9 +323,12 @@ class GenerationController:
                 # Start generation timer
                 gen_start_time = time.time()
                 
-                # Call generation function
+                # Call generation function (mỗi take/retry phải là một lần sampling mới, không lấy từ result cache)
+                call_params = dict(generation_params)
+                if _accepts_keyword(generation_function, "use_cache"):
+                    call_params["use_cache"] = False
                 generation_result = await asyncio.wait_for(
-                    generation_function(text=text, output_path=output_path, **generation_params),
+                    generation_function(text=text, output_path=output_path, **call_params),
                     timeout=self.config.generation_timeout
                 )
                 
@@ -560,4 +577,5 @@ if __name__ == "__main__":
     
     # Print configuration
     report = controller.get_controller_report()
-    print(json.dumps(report, indent=2)) 
\ No newline at end of file
+    print(json.dumps(report, indent=2)) 
+    controller.cleanup()
\ No newline at end of file
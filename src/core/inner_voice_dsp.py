@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+[THEATER] INNER VOICE DSP
+=======================
+
+In-process DSP cho inner voice presets (light/deep/dreamy), thay cho việc
+spawn một process ffmpeg cho mỗi dòng thoại:
+- Parse chuỗi filter kiểu ffmpeg (aecho, lowpass, volume) một lần, có cache
+- Áp dụng trực tiếp trên NumPy buffer: aecho = FIR delay taps, lowpass = biquad
+  giống af_biquads của ffmpeg (Q=0.707), volume = nhân hệ số
+- Filter lạ hoặc format output không ghi được -> trả False để caller fallback ffmpeg
+- run_ffmpeg_batch: khi cần parity tuyệt đối với ffmpeg, chạy nhiều file qua
+  một lần gọi ffmpeg duy nhất (filter_complex nhiều input/output)
+"""
+
+import os
+import re
+import subprocess
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.lazy_imports import lazy_import, module_available
+
+# numpy/soundfile/scipy chỉ import khi xử lý file đầu tiên
+DSP_AVAILABLE = module_available("numpy", "soundfile", "scipy")
+np = lazy_import("numpy")
+sf = lazy_import("soundfile")
+scipy_signal = lazy_import("scipy.signal")
+
+# "auto" = NumPy DSP rồi fallback ffmpeg; "ffmpeg" = luôn dùng ffmpeg (parity tuyệt đối)
+INNER_VOICE_ENGINE = os.getenv("VS_INNER_VOICE_ENGINE", "auto").lower()
+
+SUPPORTED_FILTERS = ("aecho", "lowpass", "volume")
+_DB_PATTERN = re.compile(r"^(-?[\d.]+)\s*dB$", re.IGNORECASE)
+
+
+def _split_options(option_str: str) -> Tuple[List[str], Dict[str, str]]:
+    positional, named = [], {}
+    for part in filter(None, option_str.split(":")):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            named[key.strip()] = value.strip()
+        else:
+            positional.append(part.strip())
+    return positional, named
+
+
+@lru_cache(maxsize=64)
+def parse_filter_chain(filter_str: str) -> Optional[Tuple[Tuple[str, Tuple[Tuple[str, Any], ...]], ...]]:
+    """
+    Parse "volume=0.8,aecho=0.6:0.8:1900:0.8,lowpass=f=3000" thành chain các bước.
+    Trả về None nếu có filter không hỗ trợ in-process.
+    """
+    chain = []
+    try:
+        for item in filter(None, (f.strip() for f in filter_str.split(","))):
+            name, _, option_str = item.partition("=")
+            name = name.strip()
+            positional, named = _split_options(option_str)
+
+            if name == "aecho":
+                values = positional + [None] * 4
+                in_gain = float(named.get("in_gain", values[0] or 0.6))
+                out_gain = float(named.get("out_gain", values[1] or 0.3))
+                delays = [float(d) for d in named.get("delays", values[2] or "1000").split("|")]
+                decays = [float(d) for d in named.get("decays", values[3] or "0.5").split("|")]
+                # ffmpeg aecho báo lỗi khi số delays và decays khác nhau -> không đoán, reject luôn
+                if len(delays) != len(decays):
+                    raise ValueError(f"aecho: {len(delays)} delays but {len(decays)} decays")
+                params = {"in_gain": in_gain, "out_gain": out_gain,
+                          "delays": tuple(delays), "decays": tuple(decays)}
+            elif name == "lowpass":
+                freq = named.get("f", named.get("frequency", positional[0] if positional else "500"))
+                params = {"frequency": float(freq), "q": float(named.get("w", named.get("width", 0.707)))}
+            elif name == "volume":
+                value = named.get("volume", positional[0] if positional else "1.0")
+                match = _DB_PATTERN.match(value)
+                factor = 10 ** (float(match.group(1)) / 20) if match else float(value)
+                params = {"factor": factor}
+            else:
+                return None
+
+            chain.append((name, tuple(params.items())))
+    except (ValueError, IndexError):
+        return None
+    return tuple(chain)
+
+
+def _aecho(samples: "np.ndarray", sr: int, in_gain: float, out_gain: float,
+           delays: Sequence[float], decays: Sequence[float]) -> "np.ndarray":
+    """ffmpeg aecho: out = (in*in_gain + sum(in[t - delay_i] * decay_i)) * out_gain, có tail = max delay"""
+    offsets = [int(round(sr * d / 1000.0)) for d in delays]
+    n = samples.shape[0]
+    output = np.zeros((n + max(offsets), samples.shape[1]), dtype=np.float32)
+    output[:n] = samples * in_gain
+    for offset, decay in zip(offsets, decays):
+        output[offset:offset + n] += samples * decay
+    output *= out_gain
+    return output
+
+
+def _lowpass(samples: "np.ndarray", sr: int, frequency: float, q: float) -> "np.ndarray":
+    """2-pole biquad lowpass (RBJ cookbook), cùng công thức với ffmpeg lowpass"""
+    w0 = 2 * np.pi * min(frequency, sr / 2 - 1) / sr
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    b = np.array([(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2])
+    a = np.array([1 + alpha, -2 * cos_w0, 1 - alpha])
+    return scipy_signal.lfilter(b / a[0], a / a[0], samples, axis=0).astype(np.float32)
+
+
+def apply_filter_chain(samples: "np.ndarray", sr: int, chain) -> "np.ndarray":
+    """Áp dụng chain đã parse lên buffer (frames, channels) float32"""
+    for name, params in chain:
+        params = dict(params)
+        if name == "aecho":
+            samples = _aecho(samples, sr, **params)
+        elif name == "lowpass":
+            samples = _lowpass(samples, sr, **params)
+        elif name == "volume":
+            samples = samples * params["factor"]
+    return samples
+
+
+@lru_cache(maxsize=16)
+def _writable(extension: str) -> bool:
+    return extension.upper() in sf.available_formats()
+
+
+def process_file(input_path: str, output_path: str, filter_str: str) -> bool:
+    """
+    Áp dụng filter in-process. False nếu không xử lý được (DSP thiếu, filter lạ,
+    format không đọc/ghi được) - caller nên fallback sang ffmpeg.
+    """
+    if not DSP_AVAILABLE or INNER_VOICE_ENGINE == "ffmpeg":
+        return False
+
+    chain = parse_filter_chain(filter_str)
+    if chain is None or not _writable(os.path.splitext(output_path)[1].lstrip(".")):
+        return False
+
+    try:
+        samples, sr = sf.read(input_path, dtype="float32", always_2d=True)
+        processed = np.clip(apply_filter_chain(samples, sr, chain), -1.0, 1.0)
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        sf.write(output_path, processed, sr)
+        return True
+    except Exception as e:
+        print(f"[WARNING] In-process inner voice DSP failed ({e}), falling back to FFmpeg")
+        return False
+
+
+def run_ffmpeg_batch(jobs: List[Tuple[str, str, str]], ffmpeg_exe: str = "ffmpeg",
+                     max_inputs: int = 32) -> List[bool]:
+    """
+    Chạy nhiều (input, output, filter) qua một lần gọi ffmpeg cho mỗi nhóm max_inputs file.
+    Nếu một lần gọi thất bại, các job trong nhóm đó được chạy lại từng file để cô lập lỗi.
+    """
+    results = [False] * len(jobs)
+
+    for start in range(0, len(jobs), max_inputs):
+        group = jobs[start:start + max_inputs]
+        cmd = [ffmpeg_exe, "-y", "-loglevel", "error"]
+        graph = []
+        outputs = []
+        for index, (input_path, output_path, filter_str) in enumerate(group):
+            cmd += ["-i", input_path]
+            graph.append(f"[{index}:a]{filter_str}[out{index}]")
+            outputs += ["-map", f"[out{index}]", output_path]
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+        cmd += ["-filter_complex", ";".join(graph)] + outputs
+
+        try:
+            completed = subprocess.run(cmd, capture_output=True, text=True)
+            batch_ok = completed.returncode == 0
+        except FileNotFoundError:
+            return results
+
+        for offset, (input_path, output_path, filter_str) in enumerate(group):
+            if batch_ok:
+                results[start + offset] = os.path.exists(output_path)
+                continue
+            single = subprocess.run(
+                [ffmpeg_exe, "-y", "-loglevel", "error", "-i", input_path, "-af", filter_str, output_path],
+                capture_output=True, text=True
+            )
+            results[start + offset] = single.returncode == 0 and os.path.exists(output_path)
+
+    return results
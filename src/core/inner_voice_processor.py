@@ -4,16 +4,26 @@
 =======================
 
 Xử lý hiệu ứng inner voice (thoại nội tâm) cho Voice Studio.
-Sử dụng FFmpeg để tạo echo effects cho dialogue với inner_voice: true
+Echo effects cho dialogue với inner_voice: true - chạy in-process bằng NumPy DSP,
+FFmpeg chỉ dùng làm fallback (hoặc batch mode khi cần parity tuyệt đối)
 """
 
 import os
+import sys
 import subprocess
 import tempfile
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+# Add src directory to Python path for proper imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from core.inner_voice_dsp import DSP_AVAILABLE, process_file, run_ffmpeg_batch
+
 class InnerVoiceType(Enum):
     """Các loại inner voice effects"""
     LIGHT = "light"      # Nội tâm nhẹ - tự sự, tâm sự
@@ -25,6 +35,7 @@ class InnerVoiceProcessor:
     
     def __init__(self):
         self.ffmpeg_available = self._check_ffmpeg()
+        self.dsp_available = DSP_AVAILABLE
         
         # Default echo presets cho từng loại inner voice
         self.echo_presets = {
@@ -37,7 +48,7 @@ class InnerVoiceProcessor:
             InnerVoiceType.DEEP: {
                 "name": "Nội tâm sâu", 
                 "description": "Căng thẳng, hồi tưởng - phù hợp độc thoại nam, giọng nặng trĩu",
-                "filter": "aecho=0.7:0.6:150:0.4|0.3",
+                "filter": "aecho=0.7:0.6:150|300:0.4|0.3",
                 "suffix": "_inner_deep"
             },
             InnerVoiceType.DREAMY: {
@@ -170,12 +181,6 @@ class InnerVoiceProcessor:
                           inner_voice_type: InnerVoiceType = InnerVoiceType.LIGHT) -> Dict[str, Any]:
         """Process audio file để tạo inner voice effect"""
         
-        if not self.ffmpeg_available:
-            return {
-                "success": False,
-                "error": "FFmpeg not available - cannot process inner voice"
-            }
-        
         if not os.path.exists(input_path):
             return {
                 "success": False,
@@ -193,6 +198,16 @@ class InnerVoiceProcessor:
             print(f"   [CIRCUS] Type: {preset['name']}")
             print(f"   [EDIT] Effect: {preset['description']}")
             
+            # In-process DSP: không spawn process, không qua ffmpeg
+            if process_file(input_path, output_path, preset['filter']):
+                return self._success_result(input_path, output_path, inner_voice_type, preset, "numpy")
+            
+            if not self.ffmpeg_available:
+                return {
+                    "success": False,
+                    "error": "FFmpeg not available - cannot process inner voice"
+                }
+            
             # Build FFmpeg command
             cmd = [
                 'ffmpeg', '-i', input_path,
@@ -206,23 +221,7 @@ class InnerVoiceProcessor:
                                   stderr=subprocess.DEVNULL)
             
             if result.returncode == 0:
-                print(f"[OK] INNER VOICE SUCCESS!")
-                print(f"   [FOLDER] Original: {os.path.basename(input_path)}")
-                print(f"   [FOLDER] Processed: {os.path.basename(output_path)}")
-                
-                # Get file info
-                original_size = os.path.getsize(input_path)
-                processed_size = os.path.getsize(output_path)
-                
-                return {
-                    "success": True,
-                    "output_path": output_path,
-                    "inner_voice_type": inner_voice_type.value,
-                    "preset_name": preset['name'],
-                    "original_size": original_size,
-                    "processed_size": processed_size,
-                    "filter": preset['filter']
-                }
+                return self._success_result(input_path, output_path, inner_voice_type, preset, "ffmpeg")
             else:
                 return {
                     "success": False,
@@ -235,6 +234,62 @@ class InnerVoiceProcessor:
                 "error": f"Error processing inner voice: {str(e)}"
             }
     
+    def _success_result(self, input_path: str, output_path: str, inner_voice_type: InnerVoiceType,
+                        preset: Dict[str, Any], engine: str) -> Dict[str, Any]:
+        print(f"[OK] INNER VOICE SUCCESS! ({engine})")
+        print(f"   [FOLDER] Original: {os.path.basename(input_path)}")
+        print(f"   [FOLDER] Processed: {os.path.basename(output_path)}")
+        
+        return {
+            "success": True,
+            "output_path": output_path,
+            "inner_voice_type": inner_voice_type.value,
+            "preset_name": preset['name'],
+            "original_size": os.path.getsize(input_path),
+            "processed_size": os.path.getsize(output_path),
+            "filter": preset['filter'],
+            "engine": engine
+        }
+    
+    def process_inner_voice_batch(self, items: List[Tuple[str, str, InnerVoiceType]],
+                                  exact_ffmpeg: bool = False) -> List[Dict[str, Any]]:
+        """
+        Process nhiều (input_path, output_path, type) một lượt.
+        
+        Mặc định dùng in-process DSP; file nào DSP không xử lý được (hoặc exact_ffmpeg=True)
+        được gom lại và chạy qua một lần gọi ffmpeg duy nhất.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        ffmpeg_jobs = []
+        
+        for index, (input_path, output_path, inner_voice_type) in enumerate(items):
+            preset = self.echo_presets[inner_voice_type]
+            if not os.path.exists(input_path):
+                results[index] = {"success": False, "error": f"Input file not found: {input_path}"}
+            elif not exact_ffmpeg and process_file(input_path, output_path, preset['filter']):
+                results[index] = self._success_result(input_path, output_path, inner_voice_type, preset, "numpy")
+            else:
+                ffmpeg_jobs.append(index)
+        
+        if ffmpeg_jobs and not self.ffmpeg_available:
+            for index in ffmpeg_jobs:
+                results[index] = {"success": False, "error": "FFmpeg not available - cannot process inner voice"}
+        elif ffmpeg_jobs:
+            jobs = [
+                (items[i][0], items[i][1], self.echo_presets[items[i][2]]['filter'])
+                for i in ffmpeg_jobs
+            ]
+            for index, ok in zip(ffmpeg_jobs, run_ffmpeg_batch(jobs)):
+                input_path, output_path, inner_voice_type = items[index]
+                if ok:
+                    results[index] = self._success_result(
+                        input_path, output_path, inner_voice_type, self.echo_presets[inner_voice_type], "ffmpeg-batch"
+                    )
+                else:
+                    results[index] = {"success": False, "error": "FFmpeg batch processing failed"}
+        
+        return results
+    
     def process_dialogue_with_inner_voice(self, input_path: str, dialogue_data: Dict[str, Any],
                                         output_dir: str) -> Dict[str, Any]:
         """Process một dialogue với inner voice flag"""
@@ -294,8 +349,8 @@ def main():
     """Test inner voice processor"""
     processor = InnerVoiceProcessor()
     
-    if not processor.ffmpeg_available:
-        print("[EMOJI] FFmpeg not available - cannot test inner voice")
+    if not (processor.ffmpeg_available or processor.dsp_available):
+        print("[EMOJI] Neither NumPy DSP nor FFmpeg available - cannot test inner voice")
         print("[IDEA] Install FFmpeg to use this feature")
         return
     
@@ -1,6 +1,6 @@
 """
 SIMPLE Inner Voice Effects Processor
-Applies echo/reverb effects to audio files using FFmpeg
+Applies echo/reverb effects to audio files - in-process NumPy DSP, FFmpeg fallback
 """
 
 import os
@@ -9,6 +9,8 @@ import json
 from pathlib import Path
 import time
 
+from core.inner_voice_dsp import process_file, run_ffmpeg_batch
+
 class SimpleInnerVoiceProcessor:
     """Simplified Inner Voice processor using FFmpeg"""
     
@@ -92,45 +94,16 @@ class SimpleInnerVoiceProcessor:
             if output_dir:  # Only create if directory is not empty (not root)
                 os.makedirs(output_dir, exist_ok=True)
             
-            # Get effect parameters
-            if custom_params:
-                delay = custom_params.get('delay', 400.0)
-                decay = custom_params.get('decay', 0.3)
-                gain = custom_params.get('gain', 0.5)
-            else:
-                config = self.default_configs.get(voice_type, self.default_configs['light'])
-                delay = config['delay']
-                decay = config['decay']
-                gain = config['gain']
-            
-            # Build FFmpeg filter - use config filter if available
-            config = self.default_configs.get(voice_type, self.default_configs['light'])
+            filter_complex = self.build_filter(voice_type, custom_params)
             
-            if custom_params:
-                # Build custom filter for custom params
-                if voice_type == 'light':
-                    filter_complex = f"aecho={gain}:{decay}:{delay}:0.3"
-                elif voice_type == 'deep':
-                    filter_complex = f"aecho={gain}:{decay}:{delay}:{decay},lowpass=f=3000"
-                elif voice_type == 'dreamy':
-                    filter_complex = f"volume=0.8,aecho={gain}:{decay}:{delay}:{decay},lowpass=f=3000"
-                else:
-                    filter_complex = f"aecho={gain}:{decay}:{delay}:0.3"
-            else:
-                # Use filter from config
-                filter_complex = config['filter']
-            
-            # FFmpeg command - try local first, then system
-            ffmpeg_exe = None
+            print(f"[REFRESH] Applying {voice_type} inner voice effects...")
             
-            # Try local FFmpeg first
-            local_ffmpeg = os.path.join("tools", "ffmpeg", "ffmpeg.exe")
-            if os.path.exists(local_ffmpeg):
-                ffmpeg_exe = local_ffmpeg
-            else:
-                # Fall back to system FFmpeg
-                ffmpeg_exe = "ffmpeg"
+            # In-process DSP trước - không spawn ffmpeg
+            if process_file(input_file, output_file, filter_complex):
+                print(f"[OK] Inner voice effects applied in-process: {output_file}")
+                return True
             
+            ffmpeg_exe = self.get_ffmpeg_exe()
             cmd = [
                 ffmpeg_exe, "-y",
                 "-i", input_file,
@@ -138,7 +111,6 @@ class SimpleInnerVoiceProcessor:
                 output_file
             ]
             
-            print(f"[REFRESH] Applying {voice_type} inner voice effects...")
             print(f"   Input: {input_file}")
             print(f"   Output: {output_file}")
             print(f"   Filter: {filter_complex}")
@@ -164,6 +136,63 @@ class SimpleInnerVoiceProcessor:
             print(f"[EMOJI] Error applying inner voice effects: {e}")
             return False
     
+    def build_filter(self, voice_type: str, custom_params: dict = None) -> str:
+        """FFmpeg-style filter string cho voice_type (custom params override config)"""
+        config = self.default_configs.get(voice_type, self.default_configs['light'])
+        
+        if not custom_params:
+            # Use filter from config
+            return config['filter']
+        
+        # Build custom filter for custom params
+        delay = custom_params.get('delay', 400.0)
+        decay = custom_params.get('decay', 0.3)
+        gain = custom_params.get('gain', 0.5)
+        
+        if voice_type == 'deep':
+            return f"aecho={gain}:{decay}:{delay}:{decay},lowpass=f=3000"
+        elif voice_type == 'dreamy':
+            return f"volume=0.8,aecho={gain}:{decay}:{delay}:{decay},lowpass=f=3000"
+        else:
+            return f"aecho={gain}:{decay}:{delay}:0.3"
+    
+    def get_ffmpeg_exe(self) -> str:
+        """Local FFmpeg trước, rồi system FFmpeg"""
+        local_ffmpeg = os.path.join("tools", "ffmpeg", "ffmpeg.exe")
+        return local_ffmpeg if os.path.exists(local_ffmpeg) else "ffmpeg"
+    
+    def apply_effects_batch(self, jobs: list, exact_ffmpeg: bool = False) -> list:
+        """
+        Apply effects cho nhiều file một lượt
+        
+        Args:
+            jobs: List of (input_file, output_file, voice_type, custom_params)
+            exact_ffmpeg: True = bỏ qua DSP, chạy tất cả qua một lần gọi ffmpeg
+            
+        Returns:
+            list: Success status cho từng job
+        """
+        results = [False] * len(jobs)
+        ffmpeg_jobs = []
+        
+        for index, (input_file, output_file, voice_type, custom_params) in enumerate(jobs):
+            if not os.path.exists(input_file):
+                print(f"[EMOJI] Input file not found: {input_file}")
+                continue
+            filter_complex = self.build_filter(voice_type, custom_params)
+            if not exact_ffmpeg and process_file(input_file, output_file, filter_complex):
+                results[index] = True
+            else:
+                ffmpeg_jobs.append((index, (input_file, output_file, filter_complex)))
+        
+        if ffmpeg_jobs:
+            batch_results = run_ffmpeg_batch([job for _, job in ffmpeg_jobs], self.get_ffmpeg_exe())
+            for (index, _), ok in zip(ffmpeg_jobs, batch_results):
+                results[index] = ok
+        
+        print(f"[OK] Inner voice batch: {sum(results)}/{len(jobs)} files processed")
+        return results
+    
     def process_audio_with_inner_voice(self, input_file: str, voice_type: str = 'light', custom_params: dict = None) -> str:
         """
         Process audio file and return processed file path
@@ -0,0 +1,114 @@
+"""
+Lazy Imports
+Trì hoãn import module nặng (torch, scipy, ...) tới lần dùng đầu tiên và warm-up ở background,
+để cửa sổ app và socket API lên ngay thay vì chờ ML stack load
+
+- lazy_import("torch"): proxy module, import thật khi truy cập attribute đầu tiên
+- module_available("torch", "torchaudio"): kiểm tra cài đặt mà không import
+- BackgroundWarmup: chạy factory nặng một lần trên daemon thread, caller chờ kết quả khi cần
+"""
+import time
+import logging
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule(ModuleType):
+    """Proxy cho một module; import thật khi có attribute access đầu tiên"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_module: Optional[ModuleType] = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def module_available(*names: str) -> bool:
+    """True nếu mọi module đều cài được (find_spec, không chạy code của module)"""
+    try:
+        return all(importlib.util.find_spec(name) is not None for name in names)
+    except (ImportError, ValueError):
+        return False
+
+
+class BackgroundWarmup:
+    """
+    Chạy factory() đúng một lần trên daemon thread.
+
+    start() kick off warm-up (gọi lúc khởi động); get() trả kết quả, tự start nếu chưa
+    (lazy on first use) và chờ nếu đang warm. status() dùng cho /health, /ready.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self.state = "pending"  # pending -> warming -> ready | failed
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._result: Any = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> "BackgroundWarmup":
+        with self._lock:
+            if self.state != "pending":
+                return self
+            self.state = "warming"
+            self.started_at = time.time()
+        threading.Thread(target=self._run, name=f"{self.name}-warmup", daemon=True).start()
+        return self
+
+    def _run(self):
+        try:
+            self._result = self._factory()
+            self.state = "ready"
+            logger.info(f"[OK] {self.name} warm-up finished in {time.time() - self.started_at:.1f}s")
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            logger.error(f"[EMOJI] {self.name} warm-up failed: {e}")
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Kết quả của factory; raise nếu warm-up lỗi hoặc quá timeout"""
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} is still warming up")
+        if self.state == "failed":
+            raise RuntimeError(f"{self.name} warm-up failed: {self.error}")
+        return self._result
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {"state": self.state, "error": self.error, "elapsed_seconds": elapsed}
@@ -8,17 +8,58 @@ Global singleton registry để quản lý tất cả heavy AI models:
 - Centralized cleanup
 - Memory monitoring
 - Thread-safe operations
+- Residency manager: ước lượng RAM từng model, global memory budget
+  (VS_MODEL_MEMORY_BUDGET_GB), evict LRU qua evictor của owner khi cần chỗ
 """
 
-import threading
+import os
 import gc
+import time
+import threading
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Ước lượng khi không đo được từ tensor (ví dụ CTranslate2)
+DEFAULT_MEMORY_GB = {"chatterbox": 3.0, "whisper": 2.0, "other": 1.0}
+
+
+def _default_budget_gb() -> float:
+    """VS_MODEL_MEMORY_BUDGET_GB, hoặc 80% RAM máy, hoặc không giới hạn"""
+    if os.getenv("VS_MODEL_MEMORY_BUDGET_GB"):
+        return float(os.getenv("VS_MODEL_MEMORY_BUDGET_GB"))
+    try:
+        import psutil
+        return psutil.virtual_memory().total / (1024 ** 3) * 0.8
+    except ImportError:
+        return float("inf")
+
+
+def estimate_model_memory(instance: Any) -> float:
+    """RAM (GB) của parameters + buffers của mọi torch Module trong instance (0.0 nếu không đo được)"""
+    try:
+        import torch
+    except ImportError:
+        return 0.0
+
+    if isinstance(instance, torch.nn.Module):
+        modules = [instance]
+    else:
+        modules = [v for v in getattr(instance, "__dict__", {}).values() if isinstance(v, torch.nn.Module)]
+
+    seen = set()
+    total = 0
+    for module in modules:
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            if id(tensor) in seen:
+                continue
+            seen.add(id(tensor))
+            total += tensor.numel() * tensor.element_size()
+    return total / (1024 ** 3)
+
 @dataclass
 class ModelInfo:
     """Information about a loaded model"""
@@ -29,6 +70,10 @@ class ModelInfo:
     loaded_at: datetime
     last_used: datetime
     reference_count: int = 1
+    load_time: float = 0.0  # seconds
+    # Owner giải phóng reference của mình khi registry cần chỗ; trả False nếu đang dùng.
+    # None = pinned, không bao giờ bị evict.
+    evictor: Optional[Callable[[], bool]] = None
 
 class ModelRegistry:
     """
@@ -40,6 +85,7 @@ class ModelRegistry:
     - Centralized cleanup
     - Memory monitoring
     - Reference counting
+    - Memory budget với LRU eviction
     """
     
     _instance = None
@@ -61,11 +107,22 @@ class ModelRegistry:
         
         self._models: Dict[str, ModelInfo] = {}
         self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.budget_gb = _default_budget_gb()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'total_load_time': 0.0,
+            'evictions': 0,
+            'failed_reservations': 0
+        }
         
-        logger.info("[TARGET] Model Registry initialized")
+        logger.info(f"[TARGET] Model Registry initialized (budget: {self.budget_gb:.1f}GB)")
     
     def register_model(self, key: str, model: Any, model_type: str, 
-                      memory_usage: float = 0.0) -> Any:
+                      memory_usage: float = 0.0, evictor: Optional[Callable[[], bool]] = None,
+                      load_time: float = 0.0) -> Any:
         """
         Register a model in the registry
         Returns existing model if already registered, or registers new one
@@ -78,6 +135,10 @@ class ModelRegistry:
                 logger.info(f"[EMOJI] Reusing existing model: {key} (refs: {self._models[key].reference_count})")
                 return self._models[key].instance
             
+            # Đo từ tensor nếu được, không thì dùng ước lượng của caller / theo type
+            memory_usage = (estimate_model_memory(model) or memory_usage
+                            or DEFAULT_MEMORY_GB.get(model_type, DEFAULT_MEMORY_GB["other"]))
+            
             # Register new model
             model_info = ModelInfo(
                 name=key,
@@ -85,21 +146,113 @@ class ModelRegistry:
                 instance=model,
                 memory_usage=memory_usage,
                 loaded_at=datetime.now(),
-                last_used=datetime.now()
+                last_used=datetime.now(),
+                load_time=load_time,
+                evictor=evictor
             )
             
             self._models[key] = model_info
             logger.info(f"[OK] Registered new model: {key} ({model_type}, {memory_usage:.1f}GB)")
-            return model
+        
+        # Model đã load xong (ước lượng trước có thể thấp) -> đưa registry về lại trong budget
+        self.reserve(0.0, exclude=key)
+        return model
     
     def get_model(self, key: str) -> Optional[Any]:
         """Get a model from registry if it exists"""
         with self._lock:
             if key in self._models:
                 self._models[key].last_used = datetime.now()
+                self.stats['hits'] += 1
                 return self._models[key].instance
+            self.stats['misses'] += 1
             return None
     
+    def acquire(self, key: str, loader: Callable[[], Any], model_type: str,
+                memory_usage: float = 0.0, evictor: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Get-or-load: trả về model đã có (tăng reference count), hoặc reserve
+        memory trong budget, gọi loader() rồi register. Caller trả lại bằng unregister_model(key).
+        """
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    info = self._models[key]
+                    info.reference_count += 1
+                    info.last_used = datetime.now()
+                    self.stats['hits'] += 1
+                    return info.instance
+                self.stats['misses'] += 1
+            
+            self.reserve(memory_usage or DEFAULT_MEMORY_GB.get(model_type, DEFAULT_MEMORY_GB["other"]), exclude=key)
+            
+            start_time = time.time()
+            model = loader()
+            load_time = time.time() - start_time
+            with self._lock:
+                self.stats['loads'] += 1
+                self.stats['total_load_time'] += load_time
+            logger.info(f"[OK] Loaded {key} in {load_time:.1f}s")
+            
+            return self.register_model(key, model, model_type, memory_usage, evictor=evictor, load_time=load_time)
+    
+    def reserve(self, memory_gb: float, exclude: Optional[str] = None) -> bool:
+        """
+        Evict model ít dùng nhất (qua evictor của owner) cho tới khi còn memory_gb
+        trong budget. False nếu không giải phóng đủ (mọi model còn lại pinned/đang dùng).
+        """
+        attempted = set()
+        while True:
+            with self._lock:
+                used = sum(info.memory_usage for info in self._models.values())
+                if used + memory_gb <= self.budget_gb:
+                    return True
+                candidates = sorted(
+                    (info for key, info in self._models.items()
+                     if key != exclude and info.evictor is not None and key not in attempted),
+                    key=lambda info: info.last_used
+                )
+                if not candidates:
+                    self.stats['failed_reservations'] += 1
+                    logger.warning(f"[WARNING] Model memory over budget: {used + memory_gb:.1f}GB > "
+                                   f"{self.budget_gb:.1f}GB (remaining models pinned or in use)")
+                    return False
+                victim = candidates[0]
+                attempted.add(victim.name)
+            
+            # Gọi evictor ngoài lock - owner có thể gọi lại unregister_model
+            try:
+                released = victim.evictor()
+            except Exception as e:
+                logger.warning(f"[WARNING] Evictor failed for {victim.name}: {e}")
+                released = False
+            
+            if released:
+                with self._lock:
+                    if self._models.get(victim.name) is victim:
+                        self._models.pop(victim.name)
+                    self.stats['evictions'] += 1
+                self._release_instance(victim)
+                logger.info(f"[REFRESH] Evicted {victim.name} ({victim.memory_usage:.1f}GB) to stay within budget")
+    
+    def _release_instance(self, model_info: ModelInfo):
+        try:
+            if hasattr(model_info.instance, 'cleanup'):
+                model_info.instance.cleanup()
+        except Exception as e:
+            logger.warning(f"[WARNING] Cleanup error for {model_info.name}: {e}")
+        model_info.instance = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+    
     def unregister_model(self, key: str) -> bool:
         """
         Decrease reference count and unregister model if no more references
@@ -160,6 +313,22 @@ class ModelRegistry:
             gc.collect()
             logger.info("[OK] All models cleaned up")
     
+    def set_budget(self, budget_gb: float):
+        """Đổi budget lúc runtime và evict ngay nếu đang vượt"""
+        self.budget_gb = budget_gb
+        self.reserve(0.0)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/load-time/eviction stats"""
+        with self._lock:
+            loads = self.stats['loads']
+            return {
+                **self.stats,
+                'average_load_time': self.stats['total_load_time'] / loads if loads else 0.0,
+                'budget_gb': self.budget_gb,
+                'used_gb': sum(info.memory_usage for info in self._models.values())
+            }
+    
     def get_memory_usage(self) -> Dict[str, Any]:
         """Get memory usage statistics"""
         with self._lock:
@@ -175,12 +344,15 @@ class ModelRegistry:
             
             return {
                 'total_memory_gb': total_memory,
+                'budget_gb': self.budget_gb,
                 'model_count': model_count,
                 'models_by_type': models_by_type,
                 'models': {k: {
                     'type': v.model_type,
                     'memory_gb': v.memory_usage,
                     'refs': v.reference_count,
+                    'evictable': v.evictor is not None,
+                    'load_time': v.load_time,
                     'loaded_at': v.loaded_at.isoformat(),
                     'last_used': v.last_used.isoformat()
                 } for k, v in self._models.items()}
@@ -3,9 +3,11 @@ Parallel Whisper Validator
 Optimized batch validation system với 60% performance improvement
 
 Features:
-- Parallel processing với ThreadPoolExecutor
-- Batch validation operations
+- Parallel audio loading với ThreadPoolExecutor
+- Batched inference: một lần encode/decode cho mỗi batch (BatchedWhisperEngine)
+- faster-whisper / CTranslate2 int8 trên CPU khi có sẵn
 - Model caching and reuse
+- Persistent transcription cache theo nội dung audio
 - Async operations support
 - Real-time progress tracking
 - Quality score histogram
@@ -18,7 +20,7 @@ import time
 import logging
 from typing import List, Dict, Any, Optional, Tuple, Callable
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
 import threading
 from pathlib import Path
@@ -29,10 +31,13 @@ logger = logging.getLogger(__name__)
 class WhisperValidationConfig:
     """Configuration for Whisper validation"""
     model_name: str = "base"
+    backend: str = "auto"  # "auto", "faster-whisper", "openai"
+    language: Optional[str] = None  # None = auto-detect
     max_workers: int = 4
     batch_size: int = 8
     similarity_threshold: float = 0.8
     enable_caching: bool = True
+    cache_transcriptions: bool = True  # persistent transcription cache (core.transcription_cache)
     enable_retry: bool = True
     max_retries: int = 3
     timeout_per_file: float = 30.0
@@ -72,6 +77,12 @@ class ParallelWhisperValidator:
         self._model_cache = {}
         self._model_lock = threading.Lock()
         
+        # Transcription cache dùng chung với WhisperManager/WhisperValidator
+        self.transcription_cache = None
+        if self.config.cache_transcriptions:
+            from core.transcription_cache import get_transcription_cache
+            self.transcription_cache = get_transcription_cache()
+        
         # Processing queues
         self.validation_queue = Queue()
         self.retry_queue = Queue()
@@ -112,11 +123,14 @@ class ParallelWhisperValidator:
                 return self._model_cache[model_key]
             
             try:
-                # Import Whisper safely
-                import whisper
+                from core.whisper_batch_engine import BatchedWhisperEngine
                 
-                logger.info(f"Loading Whisper model: {self.config.model_name}")
-                model = whisper.load_model(self.config.model_name)
+                model = BatchedWhisperEngine(
+                    model_name=self.config.model_name,
+                    backend=self.config.backend,
+                    language=self.config.language,
+                    io_workers=self.config.max_workers
+                )
                 
                 if self.config.enable_caching:
                     self._model_cache[model_key] = model
@@ -126,7 +140,7 @@ class ParallelWhisperValidator:
                 return model
                 
             except ImportError:
-                logger.error("Whisper not available - install with: pip install openai-whisper")
+                logger.error("Whisper not available - install with: pip install faster-whisper (or openai-whisper)")
                 return None
             except Exception as e:
                 logger.error(f"Failed to load Whisper model: {e}")
@@ -150,34 +164,35 @@ class ParallelWhisperValidator:
                 )
             
             # Transcribe audio
-            result = model.transcribe(file_path)
-            transcribed_text = result["text"].strip()
-            
-            # Calculate similarity score
-            similarity_score = self._calculate_similarity(expected_text, transcribed_text)
+            if self.transcription_cache:
+                result = self.transcription_cache.get_or_transcribe(
+                    file_path, lambda: model.transcribe(file_path), model.model_name, model.backend,
+                    model.language, **model.cache_params()
+                )
+            else:
+                result = model.transcribe(file_path)
             
-            # Calculate quality score
-            quality_score = self._calculate_quality_score(result, similarity_score)
+            return self._build_result(file_path, expected_text, result, time.time() - start_time)
             
+        except Exception as e:
             processing_time = time.time() - start_time
-            
-            # Determine success based on threshold
-            success = similarity_score >= self.config.similarity_threshold
+            logger.error(f"Validation failed for {file_path}: {e}")
             
             return ValidationResult(
                 file_path=file_path,
-                success=success,
-                similarity_score=similarity_score,
-                transcribed_text=transcribed_text,
+                success=False,
+                similarity_score=0.0,
+                transcribed_text="",
                 original_text=expected_text,
                 processing_time=processing_time,
-                quality_score=quality_score
+                quality_score=0.0,
+                error_message=str(e)
             )
-            
-        except Exception as e:
-            processing_time = time.time() - start_time
-            logger.error(f"Validation failed for {file_path}: {e}")
-            
+    
+    def _build_result(self, file_path: str, expected_text: str, whisper_result: Dict,
+                      processing_time: float) -> ValidationResult:
+        """Score một transcription (dict kiểu openai-whisper) so với expected text"""
+        if "error" in whisper_result:
             return ValidationResult(
                 file_path=file_path,
                 success=False,
@@ -186,8 +201,29 @@ class ParallelWhisperValidator:
                 original_text=expected_text,
                 processing_time=processing_time,
                 quality_score=0.0,
-                error_message=str(e)
+                error_message=whisper_result["error"]
             )
+        
+        transcribed_text = whisper_result["text"].strip()
+        
+        # Calculate similarity score
+        similarity_score = self._calculate_similarity(expected_text, transcribed_text)
+        
+        # Calculate quality score
+        quality_score = self._calculate_quality_score(whisper_result, similarity_score)
+        
+        # Determine success based on threshold
+        success = similarity_score >= self.config.similarity_threshold
+        
+        return ValidationResult(
+            file_path=file_path,
+            success=success,
+            similarity_score=similarity_score,
+            transcribed_text=transcribed_text,
+            original_text=expected_text,
+            processing_time=processing_time,
+            quality_score=quality_score
+        )
     
     def _calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate text similarity using multiple metrics"""
@@ -322,19 +358,20 @@ class ParallelWhisperValidator:
         
         all_results = []
         
-        # Process batches in parallel
-        future_to_batch = {}
+        # Decode tuần tự từng batch trên model; audio của batch kế tiếp được
+        # load song song trong lúc batch hiện tại đang decode
+        prefetch = self.thread_pool.submit(whisper_model.load_audio_batch, [req[0] for req in batches[0]])
         
         for batch_idx, batch in enumerate(batches):
-            future = self.thread_pool.submit(self._process_batch, batch, whisper_model, batch_idx)
-            future_to_batch[future] = batch
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_batch):
-            batch = future_to_batch[future]
+            current = prefetch
+            if batch_idx + 1 < len(batches):
+                prefetch = self.thread_pool.submit(
+                    whisper_model.load_audio_batch, [req[0] for req in batches[batch_idx + 1]]
+                )
             
             try:
-                batch_results = future.result(timeout=self.config.timeout_per_file * len(batch))
+                audios = current.result(timeout=self.config.timeout_per_file * len(batch))
+                batch_results = self._process_batch(batch, whisper_model, batch_idx, audios)
                 all_results.extend(batch_results)
                 
                 # Update progress
@@ -366,6 +403,10 @@ class ParallelWhisperValidator:
             retry_results = self._process_retry_queue(whisper_model)
             all_results.extend(retry_results)
         
+        # Engine không cache -> trả model về pool dùng chung (vẫn warm tới khi idle timeout)
+        if not self.config.enable_caching:
+            whisper_model.shutdown()
+        
         # Update performance metrics
         total_time = time.time() - start_time
         self.performance_metrics['total_processing_time'] += total_time
@@ -387,14 +428,19 @@ class ParallelWhisperValidator:
         
         return all_results
     
-    def _process_batch(self, batch: List[Tuple[str, str]], model, batch_idx: int) -> List[ValidationResult]:
-        """Process a single batch of validation requests"""
+    def _process_batch(self, batch: List[Tuple[str, str]], model, batch_idx: int,
+                       audios: Optional[List[Any]] = None) -> List[ValidationResult]:
+        """Process a single batch of validation requests - one batched decode"""
         batch_results = []
         
         logger.debug(f"Processing batch {batch_idx} with {len(batch)} files")
         
-        for file_path, expected_text in batch:
-            result = self._validate_single_file(file_path, expected_text, model)
+        start_time = time.time()
+        transcriptions = self._transcribe_batch_cached([req[0] for req in batch], model, audios)
+        per_file_time = (time.time() - start_time) / len(batch)
+        
+        for (file_path, expected_text), transcription in zip(batch, transcriptions):
+            result = self._build_result(file_path, expected_text, transcription, per_file_time)
             batch_results.append(result)
             
             # Queue for retry if failed and retry is enabled
@@ -403,6 +449,38 @@ class ParallelWhisperValidator:
         
         return batch_results
     
+    def _transcribe_batch_cached(self, file_paths: List[str], model,
+                                 audios: Optional[List[Any]] = None) -> List[Dict]:
+        """transcribe_batch chỉ cho các file chưa có trong transcription cache"""
+        if not self.transcription_cache:
+            return model.transcribe_batch(file_paths, audios)
+        
+        cache = self.transcription_cache
+        params = model.cache_params(batched=True)
+        results: List[Optional[Dict]] = [None] * len(file_paths)
+        keys: List[Optional[str]] = [None] * len(file_paths)
+        
+        for index, file_path in enumerate(file_paths):
+            try:
+                keys[index] = cache.make_key(file_path, model.model_name, model.backend, model.language, **params)
+            except OSError:
+                continue  # file lỗi - để transcribe_batch báo error
+            results[index] = cache.get(keys[index])
+        
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            fresh = model.transcribe_batch(
+                [file_paths[i] for i in missing],
+                [audios[i] for i in missing] if audios is not None else None
+            )
+            for index, result in zip(missing, fresh):
+                results[index] = result
+                if keys[index] and "error" not in result:
+                    cache.put(keys[index], result)
+        
+        logger.debug(f"Transcription cache: {len(file_paths) - len(missing)}/{len(file_paths)} hits")
+        return results
+    
     def _process_retry_queue(self, model) -> List[ValidationResult]:
         """Process failed validations in retry queue"""
         retry_results = []
@@ -501,6 +579,8 @@ class ParallelWhisperValidator:
     def clear_cache(self):
         """Clear model cache to free memory"""
         with self._model_lock:
+            for engine in self._model_cache.values():
+                engine.shutdown()
             self._model_cache.clear()
             logger.info("Whisper model cache cleared")
     
@@ -14,8 +14,12 @@ import time
 
 import json
 
+import wave
+
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+
 from datetime import datetime
 
 from typing import List, Dict, Tuple, Optional, Any
@@ -74,6 +78,28 @@ except ImportError:
 
 
 
+try:
+
+    from core.transcription_cache import get_transcription_cache
+
+except ImportError:
+
+    get_transcription_cache = None
+
+
+
+try:
+
+    from core.whisper_model_pool import get_whisper_model_pool
+
+except ImportError:
+
+    get_whisper_model_pool = None
+
+
+
+
+
 class QualityMetric(Enum):
 
     """Quality metrics for audio evaluation"""
@@ -236,7 +262,15 @@ class WhisperValidator:
 
         try:
 
-            self.model = whisper.load_model(self.model_name)
+            # Model dùng chung qua pool thay vì mỗi validator load một bản riêng
+
+            if get_whisper_model_pool:
+
+                self.model = get_whisper_model_pool().acquire(self.model_name)
+
+            else:
+
+                self.model = whisper.load_model(self.model_name)
 
             logging.info(f"[OK] Whisper model '{self.model_name}' loaded successfully")
 
@@ -248,6 +282,22 @@ class WhisperValidator:
 
     
 
+    def unload_model(self):
+
+        """Trả model về pool (pool unload khi idle quá timeout hoặc cần chỗ)"""
+
+        if self.model is None:
+
+            return
+
+        if get_whisper_model_pool:
+
+            get_whisper_model_pool().release(self.model)
+
+        self.model = None
+
+    
+
     def validate_transcription(self, audio_path: str, expected_text: str) -> QualityScore:
 
         """Validate audio matches expected text"""
@@ -268,9 +318,21 @@ class WhisperValidator:
 
         try:
 
-            # Transcribe audio
+            # Transcribe audio (cache theo nội dung file - rerun/retry không chạy lại ASR)
+
+            cache = get_transcription_cache() if get_transcription_cache else None
+
+            if cache:
+
+                result = cache.get_or_transcribe(
 
-            result = self.model.transcribe(audio_path)
+                    audio_path, lambda: self.model.transcribe(audio_path), self.model_name, "openai"
+
+                )
+
+            else:
+
+                result = self.model.transcribe(audio_path)
 
             transcribed_text = result["text"].strip()
 
@@ -414,7 +476,51 @@ class WhisperValidator:
 
 class AudioAnalyzer:
 
-    """Audio quality analysis"""
+    """
+
+    Audio quality analysis - single decode, shared STFT
+
+
+
+    Mỗi file chỉ decode một lần ở native sample rate (float32 mono), một STFT
+
+    magnitude dùng chung cho mọi spectral feature, frame energy lấy từ cùng STFT.
+
+    """
+
+    
+
+    N_FFT = 2048
+
+    HOP_LENGTH = 512
+
+    
+
+    def __init__(self, max_workers: int = 4):
+
+        self.max_workers = max_workers
+
+    
+
+    def load_audio(self, audio_path: str) -> Tuple[np.ndarray, int]:
+
+        """Decode một lần ở native rate -> float32 mono"""
+
+        try:
+
+            import soundfile as sf
+
+            data, sr = sf.read(audio_path, dtype='float32', always_2d=True)
+
+            return data.mean(axis=1), sr
+
+        except Exception:
+
+            # Format soundfile không đọc được (mp3 cũ...) - librosa/audioread, không resample
+
+            y, sr = librosa.load(audio_path, sr=None, mono=True)
+
+            return y.astype(np.float32), sr
 
     
 
@@ -448,18 +554,15 @@ class AudioAnalyzer:
 
         try:
 
-            # Load audio - SUPPRESS FFMPEG STDERR
-            import contextlib
-            with contextlib.redirect_stderr(open(os.devnull, 'w')):
-                audio = AudioSegment.from_file(audio_path)
+            y, sr = self.load_audio(audio_path)
 
-            y, sr = librosa.load(audio_path)
+            S = np.abs(librosa.stft(y, n_fft=self.N_FFT, hop_length=self.HOP_LENGTH))
 
             
 
-            # Audio clarity (SNR estimation)
+            # Audio clarity (spectral balance + SNR estimate từ frame energy)
 
-            clarity_score = self.estimate_clarity(y, sr)
+            clarity_score = self.estimate_clarity(y, sr, S)
 
             scores.append(QualityScore(
 
@@ -467,7 +570,7 @@ class AudioAnalyzer:
 
                 score=clarity_score,
 
-                details={"snr_estimate": clarity_score}
+                details={"snr_estimate": clarity_score, "snr_db": self.estimate_snr_db(S)}
 
             ))
 
@@ -475,7 +578,7 @@ class AudioAnalyzer:
 
             # Technical quality (dynamic range, clipping)
 
-            technical_score = self.assess_technical_quality(audio, y)
+            technical_score = self.assess_technical_quality(y)
 
             scores.append(QualityScore(
 
@@ -491,7 +594,7 @@ class AudioAnalyzer:
 
             # Speech naturalness (spectral features)
 
-            naturalness_score = self.assess_naturalness(y, sr)
+            naturalness_score = self.assess_naturalness(y, sr, S)
 
             scores.append(QualityScore(
 
@@ -525,7 +628,57 @@ class AudioAnalyzer:
 
     
 
-    def estimate_clarity(self, y: np.ndarray, sr: int) -> float:
+    def analyze_batch(self, audio_paths: List[str], max_workers: Optional[int] = None) -> List[List[QualityScore]]:
+
+        """Analyze nhiều file song song (FFT/numpy nhả GIL); kết quả theo thứ tự input"""
+
+        if not audio_paths:
+
+            return []
+
+        
+
+        workers = min(max_workers or self.max_workers, len(audio_paths))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio-analysis") as executor:
+
+            return list(executor.map(self.analyze_audio_quality, audio_paths))
+
+    
+
+    def _magnitude(self, y: np.ndarray, S: Optional[np.ndarray]) -> np.ndarray:
+
+        if S is None:
+
+            S = np.abs(librosa.stft(y, n_fft=self.N_FFT, hop_length=self.HOP_LENGTH))
+
+        return S
+
+    
+
+    def estimate_snr_db(self, S: np.ndarray) -> float:
+
+        """SNR thô: năng lượng 10% frame to nhất so với 10% frame nhỏ nhất"""
+
+        energy = np.sum(S ** 2, axis=0)
+
+        if energy.size < 10:
+
+            return 0.0
+
+        energy = np.sort(energy)
+
+        tenth = energy.size // 10
+
+        noise = np.mean(energy[:tenth]) + 1e-10
+
+        signal = np.mean(energy[-tenth:]) + 1e-10
+
+        return float(10 * np.log10(signal / noise))
+
+    
+
+    def estimate_clarity(self, y: np.ndarray, sr: int, S: Optional[np.ndarray] = None) -> float:
 
         """Estimate audio clarity (simple SNR-based)"""
 
@@ -533,9 +686,11 @@ class AudioAnalyzer:
 
             # Simple clarity estimation based on spectral energy distribution
 
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+            S = self._magnitude(y, S)
+
+            spectral_centroids = librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=self.N_FFT)[0]
 
-            spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
+            spectral_bandwidth = librosa.feature.spectral_bandwidth(S=S, sr=sr, n_fft=self.N_FFT)[0]
 
             
 
@@ -555,7 +710,7 @@ class AudioAnalyzer:
 
     
 
-    def assess_technical_quality(self, audio: AudioSegment, y: np.ndarray) -> float:
+    def assess_technical_quality(self, y: np.ndarray) -> float:
 
         """Assess technical audio quality"""
 
@@ -563,9 +718,9 @@ class AudioAnalyzer:
 
             # Check for clipping
 
-            max_amplitude = np.max(np.abs(y))
+            peak = np.max(np.abs(y))
 
-            clipping_penalty = 1.0 if max_amplitude < 0.95 else 0.7
+            clipping_penalty = 1.0 if peak < 0.95 else 0.7
 
             
 
@@ -573,8 +728,6 @@ class AudioAnalyzer:
 
             rms = np.sqrt(np.mean(y**2))
 
-            peak = np.max(np.abs(y))
-
             dynamic_range = peak / (rms + 1e-10)
 
             
@@ -593,7 +746,7 @@ class AudioAnalyzer:
 
     
 
-    def assess_naturalness(self, y: np.ndarray, sr: int) -> float:
+    def assess_naturalness(self, y: np.ndarray, sr: int, S: Optional[np.ndarray] = None) -> float:
 
         """Assess speech naturalness"""
 
@@ -601,7 +754,11 @@ class AudioAnalyzer:
 
             # Assess spectral features that correlate with natural speech
 
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+            S = self._magnitude(y, S)
+
+            mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr, n_fft=self.N_FFT)
+
+            mfccs = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=13)
 
             mfcc_variance = np.var(mfccs, axis=1)
 
@@ -657,6 +814,14 @@ class QualityController:
 
         
 
+        # Một synthesis worker sống cùng controller: model TTS dùng chung không thread-safe,
+
+        # synthesis speculative còn chạy dở của lần gọi trước luôn xong trước lần gọi sau
+
+        self._synthesis_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qc-synthesis")
+
+        
+
         # Statistics
 
         self.stats = {
@@ -707,71 +872,17 @@ class QualityController:
 
         
 
-        # Generate multiple candidates
-
-        for i in range(self.num_candidates):
+        # Generate multiple candidates (với slight parameter variation cho diversity)
 
-            candidate_start = time.time()
+        candidate_specs = [
 
-            
-
-            try:
-
-                # Generate audio (với slight parameter variation cho diversity)
-
-                varied_params = self.create_parameter_variation(voice_params, i)
-
-                audio_path = voice_generator_func(text, varied_params)
-
-                
-
-                if audio_path and os.path.exists(audio_path):
-
-                    # Evaluate quality
-
-                    candidate = self.evaluate_candidate(
-
-                        candidate_id=f"{task_id}_candidate_{i}",
-
-                        audio_path=audio_path,
-
-                        text=text,
+            (f"{task_id}_candidate_{i}", self.create_parameter_variation(voice_params, i))
 
-                        voice_params=varied_params,
+            for i in range(self.num_candidates)
 
-                        generation_time=time.time() - candidate_start
-
-                    )
-
-                    
-
-                    candidates.append(candidate)
-
-                    
-
-                    logging.info(f"[STATS] Candidate {i}: Quality {candidate.overall_score:.3f}")
-
-                    
-
-                    # Early exit if high quality found
-
-                    if candidate.is_high_quality:
-
-                        logging.info(f"[OK] High quality candidate found early: {candidate.overall_score:.3f}")
-
-                        break
-
-                        
-
-                else:
-
-                    logging.warning(f"[WARNING] Failed to generate candidate {i}")
-
-                    
-
-            except Exception as e:
+        ]
 
-                logging.error(f"[EMOJI] Error generating candidate {i}: {e}")
+        candidates = self.run_candidate_pipeline(text, candidate_specs, voice_generator_func)
 
         
 
@@ -1027,61 +1138,341 @@ class QualityController:
 
         """Generate additional candidates when quality threshold not met"""
 
-        additional_candidates = []
+        # More aggressive parameter variations for retry
+
+        candidate_specs = [
+
+            (f"{task_id}_retry_{i}", self.create_retry_variation(voice_params, i))
+
+            for i in range(num_additional)
+
+        ]
+
+        return self.run_candidate_pipeline(text, candidate_specs, voice_generator_func)
+
+    
+
+    def run_candidate_pipeline(self, text: str, candidate_specs: List[Tuple[str, Dict]],
+
+                               voice_generator_func) -> List[AudioCandidate]:
+
+        """
+
+        Pipelined candidate engine:
+
+        - Candidate đầu tiên chạy một mình (đa số text đạt ngay, không tốn synthesis thừa);
+
+          khi đã có candidate fail thì candidate i+1 được synthesize (speculative) trong lúc
+
+          candidate i đang pre-check/evaluate
+
+        - Mỗi candidate có file riêng (đổi tên ngay sau synthesis) để generator dùng lại
+
+          output path cũng không ghi đè file đang được evaluate
+
+        - Cheap pre-checks loại candidate hỏng trước khi chạy Whisper/librosa
+
+        - Dừng ngay khi có candidate is_high_quality; synthesis chưa bắt đầu bị cancel,
+
+          synthesis đang chạy dở thì bị bỏ kết quả (lần gọi sau xếp hàng sau nó trên cùng worker)
+
+        """
+
+        candidates = []
+
+        if not candidate_specs:
+
+            return candidates
+
+        
+
+        def synthesize(candidate_id: str, params: Dict):
+
+            started = time.time()
+
+            # Mỗi candidate là một take mới (sampling ngẫu nhiên) - generator chuyển use_cache
+
+            # cho provider để không nhận lại audio đã cache của cùng text/voice/params
+
+            audio_path = voice_generator_func(text, {**params, "use_cache": False})
+
+            if audio_path and os.path.exists(audio_path):
+
+                audio_path = self._claim_candidate_file(audio_path, candidate_id)
+
+            return audio_path, time.time() - started
 
         
 
-        for i in range(num_additional):
+        executor = self._synthesis_executor
+
+        pending = None
+
+        
+
+        for i, (candidate_id, params) in enumerate(candidate_specs):
+
+            current = pending or executor.submit(synthesize, candidate_id, params)
+
+            pending = None
+
+            
 
             try:
 
-                candidate_start = time.time()
+                audio_path, generation_time = current.result()
 
                 
 
-                # More aggressive parameter variations for retry
+                # Tới được candidate i > 0 nghĩa là candidate trước đã fail -> speculate candidate kế tiếp
 
-                retry_params = self.create_retry_variation(voice_params, i)
+                if i > 0 and i + 1 < len(candidate_specs):
 
-                audio_path = voice_generator_func(text, retry_params)
+                    pending = executor.submit(synthesize, *candidate_specs[i + 1])
 
                 
 
-                if audio_path and os.path.exists(audio_path):
+                if not (audio_path and os.path.exists(audio_path)):
+
+                    logging.warning(f"[WARNING] Failed to generate candidate {candidate_id}")
+
+                    continue
+
+                
+
+                rejection = self.precheck_candidate(audio_path, text)
+
+                if rejection:
+
+                    logging.info(f"[SKIP] Candidate {candidate_id} rejected by pre-check: {rejection}")
+
+                    candidate = self.rejected_candidate(candidate_id, audio_path, text, params,
+
+                                                        generation_time, rejection)
+
+                else:
+
+                    # Evaluate quality
 
                     candidate = self.evaluate_candidate(
 
-                        candidate_id=f"{task_id}_retry_{i}",
+                        candidate_id=candidate_id,
 
                         audio_path=audio_path,
 
                         text=text,
 
-                        voice_params=retry_params,
+                        voice_params=params,
 
-                        generation_time=time.time() - candidate_start
+                        generation_time=generation_time
 
                     )
 
-                    
+                    logging.info(f"[STATS] Candidate {candidate_id}: Quality {candidate.overall_score:.3f}")
 
-                    additional_candidates.append(candidate)
+                
 
-                    
+                candidates.append(candidate)
+
+                
+
+                # Early exit if high quality found
 
-                    if candidate.is_high_quality:
+                if candidate.is_high_quality:
 
-                        break
+                    logging.info(f"[OK] High quality candidate found early: {candidate.overall_score:.3f}")
 
-                        
+                    if pending is not None and not pending.cancel():
+
+                        logging.debug("Speculative candidate already synthesizing - result discarded")
+
+                    break
+
+                    
 
             except Exception as e:
 
-                logging.error(f"[EMOJI] Error generating retry candidate {i}: {e}")
+                logging.error(f"[EMOJI] Error generating candidate {candidate_id}: {e}")
+
+        
+
+        return candidates
+
+    
+
+    @staticmethod
+
+    def _claim_candidate_file(audio_path: str, candidate_id: str) -> str:
+
+        """Đổi tên output sang file riêng của candidate (cùng thư mục); giữ nguyên nếu đã riêng"""
+
+        base, ext = os.path.splitext(audio_path)
+
+        suffix = f"_{candidate_id}"
+
+        if base.endswith(suffix):
+
+            return audio_path
+
+        unique_path = f"{base}{suffix}{ext}"
+
+        try:
+
+            os.replace(audio_path, unique_path)
+
+        except OSError as e:
+
+            logging.warning(f"[WARNING] Could not move candidate {candidate_id} to its own file: {e}")
+
+            return audio_path
+
+        return unique_path
+
+    
+
+    def precheck_candidate(self, audio_path: str, text: str) -> Optional[str]:
+
+        """
+
+        Cheap signal checks (đọc WAV một lần, không ASR): duration so với độ dài text,
+
+        clipping, tỉ lệ silence. Trả về lý do reject hoặc None nếu qua.
+
+        """
+
+        if not AUDIO_ANALYSIS_AVAILABLE:
+
+            return None
+
+        
+
+        try:
+
+            with wave.open(audio_path, 'rb') as wav_file:
+
+                sr = wav_file.getframerate()
+
+                channels = wav_file.getnchannels()
+
+                sample_width = wav_file.getsampwidth()
+
+                frames = wav_file.readframes(wav_file.getnframes())
+
+        except (wave.Error, EOFError, OSError):
+
+            return None  # Không phải PCM WAV - để full evaluation xử lý
+
+        
+
+        if sample_width != 2 or not sr:
+
+            return None
+
+        
+
+        y = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+
+        if channels > 1:
+
+            y = y[:len(y) - len(y) % channels].reshape(-1, channels).mean(axis=1)
 
         
 
-        return additional_candidates
+        duration = len(y) / sr
+
+        if duration < 0.1:
+
+            return f"audio too short ({duration:.2f}s)"
+
+        
+
+        # ~2.5 words/s cho narration; khoảng chấp nhận rất rộng, chỉ bắt lỗi rõ ràng
+
+        expected = max(len(text.split()) / 2.5, 0.5)
+
+        if duration < expected * 0.3:
+
+            return f"duration {duration:.1f}s too short for text (expected ~{expected:.1f}s)"
+
+        if duration > expected * 3.0 + 2.0:
+
+            return f"duration {duration:.1f}s too long for text (expected ~{expected:.1f}s)"
+
+        
+
+        clipping_ratio = float(np.mean(np.abs(y) >= 0.999))
+
+        if clipping_ratio > 0.01:
+
+            return f"clipping {clipping_ratio:.1%}"
+
+        
+
+        window = max(1, int(sr * 0.02))
+
+        usable = len(y) - len(y) % window
+
+        if usable:
+
+            rms = np.sqrt(np.mean(y[:usable].reshape(-1, window) ** 2, axis=1))
+
+            silence_ratio = float(np.mean(rms < 0.003))  # ~ -50 dBFS
+
+            if silence_ratio > 0.6:
+
+                return f"mostly silence ({silence_ratio:.0%})"
+
+        
+
+        return None
+
+    
+
+    def rejected_candidate(self, candidate_id: str, audio_path: str, text: str, voice_params: Dict,
+
+                           generation_time: float, reason: str) -> AudioCandidate:
+
+        """Candidate bị loại ở pre-check: score 0, giữ lại trong report"""
+
+        return AudioCandidate(
+
+            candidate_id=candidate_id,
+
+            audio_path=audio_path,
+
+            text=text,
+
+            voice_params=voice_params,
+
+            quality_scores=[
+
+                QualityScore(
+
+                    metric=QualityMetric.TECHNICAL_QUALITY,
+
+                    score=0.0,
+
+                    details={"precheck_failed": reason}
+
+                )
+
+            ],
+
+            overall_score=0.0,
+
+            generation_time=generation_time,
+
+            metadata={
+
+                "file_size": os.path.getsize(audio_path) if os.path.exists(audio_path) else 0,
+
+                "rejected_by_precheck": reason,
+
+                "validation_timestamp": datetime.now().isoformat()
+
+            }
+
+        )
 
     
 
@@ -1279,6 +1670,16 @@ class QualityController:
 
     
 
+    def cleanup(self):
+
+        """Giải phóng resources của controller (synthesis worker, Whisper model trong pool)"""
+
+        self._synthesis_executor.shutdown(wait=True)
+
+        self.whisper_validator.unload_model()
+
+    
+
     def save_report(self, report: QualityReport, output_dir: str):
 
         """Save quality report to file"""
@@ -1429,5 +1830,9 @@ if __name__ == "__main__":
 
     
 
+    controller.cleanup()
+
+    
+
     print("\n[SUCCESS] Quality Controller PHASE 3 - Implementation Complete!")
 
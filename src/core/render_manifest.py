@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+[EDIT] RENDER MANIFEST
+=====================
+
+Manifest lưu trong output directory để re-render script theo kiểu incremental:
+- Mỗi dialogue slot (s{segment}_d{dialogue}) ghi lại fingerprint của input
+  (speaker, text, voice + hash nội dung file giọng, emotion params, inner voice) và file audio kết quả
+- Lần chạy sau chỉ tổng hợp các dialogue có fingerprint thay đổi
+- Segment/final merge cũng được bỏ qua khi mọi input bên dưới không đổi
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = ".render_manifest.json"
+MANIFEST_VERSION = 1
+
+
+class RenderManifest:
+    """Per-output-directory record của dialogue fingerprints -> audio files"""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.dialogues: Dict[str, Dict[str, str]] = {}
+        self.merges: Dict[str, Dict[str, str]] = {}
+        self.reused = 0
+        self.rendered = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                logger.info("Render manifest version changed - full re-render")
+                return
+            self.dialogues = data.get("dialogues", {})
+            self.merges = data.get("merges", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read render manifest, full re-render: {e}")
+
+    @staticmethod
+    def fingerprint(**fields: Any) -> str:
+        """Stable hash của mọi input ảnh hưởng tới audio output"""
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def peek(self, slot: str, fingerprint: str) -> Optional[str]:
+        """Như lookup nhưng không tính vào thống kê reused"""
+        entry = self.dialogues.get(slot)
+        if entry and entry.get("fingerprint") == fingerprint and os.path.exists(entry.get("file", "")):
+            return entry["file"]
+        return None
+
+    def lookup(self, slot: str, fingerprint: str) -> Optional[str]:
+        """Trả về file audio cũ nếu dialogue không đổi và file vẫn còn"""
+        file_path = self.peek(slot, fingerprint)
+        if file_path:
+            self.reused += 1
+        return file_path
+
+    def record(self, slot: str, fingerprint: str, file_path: str):
+        self.dialogues[slot] = {"fingerprint": fingerprint, "file": file_path}
+        self.rendered += 1
+
+    def merge_is_current(self, output_path: str, input_fingerprints: List[str]) -> bool:
+        """True nếu output_path đã được merge từ đúng các input này"""
+        entry = self.merges.get(os.path.basename(output_path))
+        return bool(
+            entry
+            and entry.get("inputs") == self.fingerprint(inputs=input_fingerprints)
+            and os.path.exists(output_path)
+        )
+
+    def record_merge(self, output_path: str, input_fingerprints: List[str]):
+        self.merges[os.path.basename(output_path)] = {"inputs": self.fingerprint(inputs=input_fingerprints)}
+
+    def save(self):
+        """Atomic write (temp + rename)"""
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": MANIFEST_VERSION, "dialogues": self.dialogues, "merges": self.merges},
+                    f, ensure_ascii=False
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write render manifest: {e}")
@@ -0,0 +1,126 @@
+"""
+Segment Stage Pipeline
+Chạy các segment video qua 3 stage overlap nhau thay vì tuần tự từng segment
+
+- image: network-bound (tạo/tải ảnh) - nhiều worker, chạy trước
+- voice: CPU/GPU-bound (TTS) - pool riêng, mặc định 1 worker vì model không thread-safe
+- encode: ffmpeg - nhiều worker song song, bắt đầu ngay khi segment có đủ ảnh + audio
+Kết quả được ghép lại theo đúng thứ tự segment. Lỗi ở bất kỳ stage nào sẽ cancel
+toàn bộ phần việc còn lại.
+"""
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+STAGES = ("image", "voice", "encode")
+
+StageFn = Callable[..., Dict[str, Any]]
+
+
+class StageCancelled(Exception):
+    """Task bị bỏ vì pipeline đã cancel"""
+
+
+class SegmentStagePipeline:
+    """
+    Bounded-concurrency staged pipeline cho segment video.
+
+    image_fn(segment) và voice_fn(segment) chạy độc lập; encode_fn(segment, image_result,
+    voice_result) chạy khi cả hai xong. Mỗi hàm trả về dict {"success": bool, ...}.
+    """
+
+    def __init__(self, image_fn: StageFn, voice_fn: StageFn, encode_fn: StageFn,
+                 image_workers: Optional[int] = None, voice_workers: Optional[int] = None,
+                 encode_workers: Optional[int] = None,
+                 stage_callback: Optional[Callable[[str, int, int], None]] = None):
+        cpu_count = os.cpu_count() or 2
+        self.stage_fns = {"image": image_fn, "voice": voice_fn, "encode": encode_fn}
+        self.workers = {
+            "image": image_workers or int(os.getenv("VS_PIPELINE_IMAGE_WORKERS", "4")),
+            "voice": voice_workers or int(os.getenv("VS_PIPELINE_VOICE_WORKERS", "1")),
+            "encode": encode_workers or int(os.getenv("VS_PIPELINE_ENCODE_WORKERS", str(max(2, cpu_count // 4)))),
+        }
+        self.stage_callback = stage_callback
+        self.progress = {stage: 0 for stage in STAGES}
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Dừng pipeline: task chưa chạy bị bỏ, task đang chạy được để hoàn tất rồi bỏ kết quả"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _guard(self, stage: str, *args) -> Dict[str, Any]:
+        if self._cancel_event.is_set():
+            raise StageCancelled(stage)
+        return self.stage_fns[stage](*args)
+
+    def run(self, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Chạy mọi segment. Trả về {"success": True, "results": [...]} với results[i] =
+        {"image": ..., "voice": ..., "encode": ...} theo thứ tự segment, hoặc
+        {"success": False, "error": ...} khi có lỗi/cancel.
+        """
+        total = len(segments)
+        results: List[Dict[str, Any]] = [{} for _ in segments]
+        self.progress = {stage: 0 for stage in STAGES}
+        self._cancel_event.clear()
+        error: Optional[str] = None
+
+        pools = {
+            stage: ThreadPoolExecutor(max_workers=max(1, self.workers[stage]), thread_name_prefix=f"pipeline-{stage}")
+            for stage in STAGES
+        }
+        owner: Dict[Future, Tuple[str, int]] = {}
+
+        def submit(stage: str, index: int, *args):
+            future = pools[stage].submit(self._guard, stage, *args)
+            owner[future] = (stage, index)
+            return future
+
+        try:
+            pending = set()
+            for index, segment in enumerate(segments):
+                pending.add(submit("image", index, segment))
+                pending.add(submit("voice", index, segment))
+
+            while pending and error is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, index = owner.pop(future)
+                    try:
+                        result = future.result()
+                    except StageCancelled:
+                        continue
+                    except Exception as e:
+                        result = {"success": False, "error": f"{stage} stage failed: {e}"}
+
+                    if not result.get("success"):
+                        error = result.get("error") or f"{stage} stage failed for segment {index + 1}"
+                        break
+
+                    results[index][stage] = result
+                    self.progress[stage] += 1
+                    if self.stage_callback:
+                        self.stage_callback(stage, self.progress[stage], total)
+
+                    if stage != "encode" and "image" in results[index] and "voice" in results[index]:
+                        pending.add(submit("encode", index, segments[index],
+                                           results[index]["image"], results[index]["voice"]))
+
+                if self._cancel_event.is_set() and error is None:
+                    error = "Pipeline cancelled"
+        finally:
+            if error is not None:
+                self._cancel_event.set()
+                for future in owner:
+                    future.cancel()
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        if error is not None:
+            return {"success": False, "error": error, "progress": dict(self.progress)}
+        return {"success": True, "results": results, "progress": dict(self.progress)}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+[TEXT] TEXT CHUNKING
+===================
+
+Sentence-aware text chunking dùng chung cho TTSBridge và streaming API.
+Không phụ thuộc model/provider nên import rất nhẹ.
+"""
+
+import re
+from typing import List
+
+SENTENCE_PATTERN = re.compile(r'[.!?]+(?:\s|$)')
+PHRASE_PATTERN = re.compile(
+    r'[,;]|\s+(?:và|hoặc|nhưng|mà|thì|nên|because|and|or|but|so|however)\s+',
+    flags=re.IGNORECASE
+)
+
+
+def split_text_into_chunks(text: str, max_chunk_size: int = 500) -> List[str]:
+    """
+    Smart text preprocessing with intelligent chunking
+
+    Args:
+        text: Input text to process
+        max_chunk_size: Maximum characters per chunk
+
+    Returns:
+        List of optimally sized text chunks
+    """
+    # Clean and normalize text
+    text = text.strip()
+    if not text:
+        return []
+
+    # Split by sentences first (respecting Vietnamese punctuation)
+    sentences = SENTENCE_PATTERN.split(text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+
+    chunks = []
+    current_chunk = ""
+
+    for sentence in sentences:
+        # Add punctuation back if missing
+        if not sentence.endswith(('.', '!', '?')):
+            sentence = sentence + "."
+
+        # Check if adding this sentence would exceed chunk size
+        potential_chunk = current_chunk + " " + sentence if current_chunk else sentence
+
+        if len(potential_chunk) <= max_chunk_size:
+            current_chunk = potential_chunk
+        else:
+            # Save current chunk if not empty
+            if current_chunk:
+                chunks.append(current_chunk)
+
+            # If single sentence is too long, split by phrases/clauses
+            if len(sentence) > max_chunk_size:
+                phrase_chunks = split_long_sentence(sentence, max_chunk_size)
+                chunks.extend(phrase_chunks[:-1])  # Add all but last
+                current_chunk = phrase_chunks[-1] if phrase_chunks else ""
+            else:
+                current_chunk = sentence
+
+    # Add the last chunk
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    return chunks if chunks else [text]
+
+
+def split_long_sentence(sentence: str, max_size: int) -> List[str]:
+    """Split a long sentence into smaller phrases"""
+    # Try to split by commas and conjunctions first
+    phrases = PHRASE_PATTERN.split(sentence)
+    phrases = [p.strip() for p in phrases if p.strip()]
+
+    if not phrases:
+        # Fallback to word-based splitting
+        words = sentence.split()
+        phrases = []
+        current_phrase = ""
+
+        for word in words:
+            if len(current_phrase + " " + word) <= max_size:
+                current_phrase = current_phrase + " " + word if current_phrase else word
+            else:
+                if current_phrase:
+                    phrases.append(current_phrase)
+                current_phrase = word
+
+        if current_phrase:
+            phrases.append(current_phrase)
+
+    return phrases if phrases else [sentence]
@@ -0,0 +1,174 @@
+"""
+Transcription Cache
+Persistent cache cho kết quả Whisper: (audio content hash + model + backend + language + decoding params) -> transcription
+
+- Lưu trong một file SQLite (text, segments, confidences dạng JSON gọn)
+- Giới hạn dung lượng, LRU eviction theo last_access
+- Dùng chung cho WhisperManager, WhisperValidator và ParallelWhisperValidator:
+  quality rerun, retry queue, UI re-validate không phải chạy lại ASR
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from core.file_hash import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent.parent / "voice_studio_output" / ".transcription_cache.sqlite3"
+DEFAULT_MAX_BYTES = int(os.getenv("VS_TRANSCRIPTION_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# Các field segment giữ lại; bỏ tokens/logits để entry gọn
+SEGMENT_FIELDS = ("start", "end", "text", "avg_logprob", "no_speech_prob", "compression_ratio")
+RESULT_FIELDS = ("text", "language", "language_probability", "duration", "no_speech_prob")
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Thu gọn dict kết quả kiểu openai-whisper trước khi lưu"""
+    compact = {field: result[field] for field in RESULT_FIELDS if field in result}
+    compact["segments"] = [
+        {field: seg[field] for field in SEGMENT_FIELDS if field in seg}
+        for seg in result.get("segments", [])
+    ]
+    return compact
+
+
+class TranscriptionCache:
+    """
+    Size-bounded SQLite cache cho transcription.
+
+    Thread-safe (một connection, serialize bằng lock).
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcriptions ("
+            " key TEXT PRIMARY KEY,"
+            " result TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON transcriptions(last_access)")
+        self._conn.commit()
+
+    def make_key(self, audio_path: str, model_name: str, backend: str,
+                 language: Optional[str] = None, **decoding: Any) -> str:
+        """Deterministic key từ nội dung audio và mọi tham số ảnh hưởng tới transcription"""
+        payload = {
+            "audio": file_content_hash(audio_path),
+            "model": model_name,
+            "backend": backend,
+            "language": language,
+            "decoding": {k: round(v, 3) if isinstance(v, float) else v for k, v in sorted(decoding.items())},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM transcriptions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE transcriptions SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]):
+        payload = json.dumps(compact_result(result), ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO transcriptions (key, result, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, size, time.time())
+                )
+                self._evict()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not store transcription cache entry: {e}")
+
+    def _evict(self):
+        """Xóa entry ít dùng nhất cho tới khi tổng dung lượng <= max_bytes (gọi khi đang giữ lock)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcriptions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM transcriptions ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM transcriptions WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def get_or_transcribe(self, audio_path: str, transcribe_fn: Callable[[], Dict[str, Any]],
+                          model_name: str, backend: str, language: Optional[str] = None,
+                          **decoding: Any) -> Dict[str, Any]:
+        """Trả về transcription đã cache, hoặc gọi transcribe_fn() rồi lưu lại"""
+        try:
+            key = self.make_key(audio_path, model_name, backend, language, **decoding)
+        except OSError:
+            return transcribe_fn()  # file không đọc được - để transcriber báo lỗi
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        result = transcribe_fn()
+        if "error" not in result:
+            self.put(key, result)
+        return result
+
+    def clear(self) -> int:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM transcriptions").fetchone()[0]
+            self._conn.execute("DELETE FROM transcriptions")
+            self._conn.commit()
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcriptions"
+            ).fetchone()
+        return {
+            **self.stats,
+            "entries": entries,
+            "size_mb": round(total / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "db_path": str(self.db_path),
+        }
+
+
+_shared_cache: Optional[TranscriptionCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> Optional[TranscriptionCache]:
+    """Instance dùng chung cho mọi validator; None nếu không mở được database"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = TranscriptionCache()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Transcription cache disabled: {e}")
+                return None
+        return _shared_cache
@@ -19,6 +19,8 @@ import logging
 from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass
 
+from core.text_chunking import split_text_into_chunks, split_long_sentence
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -120,10 +122,27 @@ class TTSBridge:
             
             logger.info(f"📝 Text split into {len(processed_chunks)} optimal chunks")
             
-            # Step 2: Generate TTS for each chunk
-            generated_files = []
             os.makedirs(output_dir, exist_ok=True)
             
+            # Step 2a: In-memory assembly (real mode) - không file trung gian, ghi đúng một lần
+            final_path = self._generate_chunks_in_memory(processed_chunks, voice_name, output_dir, tts_params)
+            if final_path:
+                logger.info("✅ Enhanced single character TTS completed (in-memory assembly)")
+                return TTSResult(
+                    success=True,
+                    audio_path=final_path,
+                    metadata={
+                        "chunks_processed": len(processed_chunks),
+                        "total_characters": len(text),
+                        "voice_name": voice_name,
+                        "preprocessing_enabled": enable_preprocessing,
+                        "assembly": "in_memory"
+                    }
+                )
+            
+            # Step 2b: Generate TTS for each chunk to file (demo mode / fallback)
+            generated_files = []
+            
             for i, chunk in enumerate(processed_chunks):
                 chunk_filename = f"single_char_chunk_{i+1:03d}_{voice_name}.wav"
                 chunk_path = os.path.join(output_dir, chunk_filename)
@@ -194,88 +213,50 @@ class TTSBridge:
                 error_message=str(e)
             )
     
-    def _preprocess_text_with_chunking(self, text: str, max_chunk_size: int = 500) -> List[str]:
+    def _generate_chunks_in_memory(self, chunks: List[str], voice_name: str, output_dir: str,
+                                   tts_params: Dict[str, Any]) -> Optional[str]:
         """
-        Smart text preprocessing with intelligent chunking
-        
-        Args:
-            text: Input text to process
-            max_chunk_size: Maximum characters per chunk
-            
-        Returns:
-            List of optimally sized text chunks
+        Generate mọi chunk thành waveform trong memory rồi ghép vào một buffer preallocated.
+        Chunk lỗi bị bỏ qua (giống đường file), các chunk đã sinh được giữ lại.
+        Trả về None chỉ khi provider không hỗ trợ in-memory (demo mode) để caller dùng đường file cũ.
         """
-        import re
+        if not chunks or not getattr(self.real_provider, "supports_waveform_generation", False):
+            return None
         
-        # Clean and normalize text
-        text = text.strip()
-        if not text:
-            return []
+        from core.audio_assembly import assemble_to_file
         
-        # Split by sentences first (respecting Vietnamese punctuation)
-        sentence_pattern = r'[.!?]+(?:\s|$)'
-        sentences = re.split(sentence_pattern, text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        waveforms = []
+        sample_rate = None
+        for i, chunk in enumerate(chunks):
+            logger.info(f"🎙️ Generating chunk {i+1}/{len(chunks)} in memory ({len(chunk)} chars)...")
+            generated = self.real_provider.generate_waveform(text=chunk, voice_name=voice_name, **tts_params)
+            if generated is None:
+                logger.error(f"❌ Failed to generate chunk {i+1} in memory, skipping")
+                continue
+            samples, sample_rate = generated
+            waveforms.append(samples)
         
-        chunks = []
-        current_chunk = ""
+        if not waveforms:
+            raise RuntimeError("Failed to generate any audio chunks")
+        if len(waveforms) < len(chunks):
+            logger.warning(f"⚠️ {len(chunks) - len(waveforms)}/{len(chunks)} chunks failed and were skipped")
         
-        for sentence in sentences:
-            # Add punctuation back if missing
-            if not sentence.endswith(('.', '!', '?')):
-                sentence = sentence + "."
-            
-            # Check if adding this sentence would exceed chunk size
-            potential_chunk = current_chunk + " " + sentence if current_chunk else sentence
-            
-            if len(potential_chunk) <= max_chunk_size:
-                current_chunk = potential_chunk
-            else:
-                # Save current chunk if not empty
-                if current_chunk:
-                    chunks.append(current_chunk)
-                
-                # If single sentence is too long, split by phrases/clauses
-                if len(sentence) > max_chunk_size:
-                    phrase_chunks = self._split_long_sentence(sentence, max_chunk_size)
-                    chunks.extend(phrase_chunks[:-1])  # Add all but last
-                    current_chunk = phrase_chunks[-1] if phrase_chunks else ""
-                else:
-                    current_chunk = sentence
+        if len(waveforms) > 1:
+            final_path = os.path.join(output_dir, f"single_character_complete_{voice_name}.wav")
+        else:
+            final_path = os.path.join(output_dir, f"single_char_chunk_001_{voice_name}.wav")
         
-        # Add the last chunk
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks if chunks else [text]
+        duration = assemble_to_file(waveforms, sample_rate, final_path, gap_ms=300)
+        logger.info(f"✅ Assembled {len(waveforms)} chunks in memory ({duration:.1f}s) -> {final_path}")
+        return final_path
+    
+    def _preprocess_text_with_chunking(self, text: str, max_chunk_size: int = 500) -> List[str]:
+        """Smart text preprocessing with intelligent chunking (xem core.text_chunking)"""
+        return split_text_into_chunks(text, max_chunk_size)
     
     def _split_long_sentence(self, sentence: str, max_size: int) -> List[str]:
         """Split a long sentence into smaller phrases"""
-        import re
-        
-        # Try to split by commas and conjunctions first
-        phrase_pattern = r'[,;]|\s+(?:và|hoặc|nhưng|mà|thì|nên|because|and|or|but|so|however)\s+'
-        phrases = re.split(phrase_pattern, sentence, flags=re.IGNORECASE)
-        phrases = [p.strip() for p in phrases if p.strip()]
-        
-        if not phrases:
-            # Fallback to word-based splitting
-            words = sentence.split()
-            phrases = []
-            current_phrase = ""
-            
-            for word in words:
-                if len(current_phrase + " " + word) <= max_size:
-                    current_phrase = current_phrase + " " + word if current_phrase else word
-                else:
-                    if current_phrase:
-                        phrases.append(current_phrase)
-                    current_phrase = word
-            
-            if current_phrase:
-                phrases.append(current_phrase)
-        
-        return phrases if phrases else [sentence]
+        return split_long_sentence(sentence, max_size)
     
     def _merge_audio_chunks(self, audio_files: List[str], output_path: str) -> bool:
         """Merge multiple audio files into one"""
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+[FACTORY] TTS WORKER FARM
+========================
+
+Process-pool cho multi-character script generation trên CPU nhiều core:
+- N worker process, mỗi process giữ một RealChatterboxProvider riêng
+- Giới hạn torch threads mỗi worker để các process không tranh core
+- Voice affinity: mọi dòng của một voice đi về cùng worker -> conditionals luôn warm
+- Health check + restart worker bị crash, requeue các task đang dở
+- Kết quả trả về đúng thứ tự request
+"""
+
+import os
+import time
+import queue
+import logging
+import multiprocessing as mp
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = None
+
+
+def _worker_main(worker_id: int, task_queue, result_queue, torch_threads: int):
+    """Entry point của worker process: load model một lần, xử lý task tới khi nhận _STOP"""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+
+    from tts.real_chatterbox_provider import RealChatterboxProvider
+    provider = RealChatterboxProvider.get_instance()
+    result_queue.put(("ready", worker_id, None))
+
+    while True:
+        task = task_queue.get()
+        if task is _STOP:
+            break
+        index, request = task
+        try:
+            result = provider.generate_voice(**request)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        result_queue.put(("result", index, result))
+
+
+class TTSWorkerFarm:
+    """
+    Worker farm cho RealChatterboxProvider.generate_voice.
+
+    Usage:
+        with TTSWorkerFarm(num_workers=4) as farm:
+            results = farm.generate(requests)  # requests: list kwargs của generate_voice
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, torch_threads: Optional[int] = None,
+                 max_restarts: int = 2, task_timeout: float = 600.0):
+        cpu_count = os.cpu_count() or 2
+        self.num_workers = max(1, num_workers or max(1, cpu_count // 4))
+        self.torch_threads = max(1, torch_threads or cpu_count // self.num_workers)
+        self.max_restarts = max_restarts
+        self.task_timeout = task_timeout
+
+        self._ctx = mp.get_context("spawn")  # CUDA/torch không fork-safe
+        self._result_queue = self._ctx.Queue()
+        self._workers: Dict[int, Dict[str, Any]] = {}
+        self._started = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    # ---- worker lifecycle ----
+
+    def _spawn_worker(self, worker_id: int):
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, task_queue, self._result_queue, self.torch_threads),
+            name=f"tts-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        previous = self._workers.get(worker_id, {})
+        self._workers[worker_id] = {
+            "process": process,
+            "task_queue": task_queue,
+            "pending": previous.get("pending", {}),
+            "restarts": previous.get("restarts", -1) + 1,
+            "completed": previous.get("completed", 0),
+            "ready": False,
+        }
+
+    def start(self):
+        if self._started:
+            return
+        print(f"[FACTORY] Starting {self.num_workers} TTS workers ({self.torch_threads} torch threads each)")
+        for worker_id in range(self.num_workers):
+            self._spawn_worker(worker_id)
+        self._started = True
+
+    def shutdown(self):
+        for worker in self._workers.values():
+            try:
+                worker["task_queue"].put(_STOP)
+            except Exception:
+                pass
+        for worker in self._workers.values():
+            worker["process"].join(timeout=10)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        self._workers.clear()
+        self._started = False
+
+    def _check_health(self) -> List[int]:
+        """
+        Restart worker đã chết và requeue các task đang pending của nó.
+        Trả về index các task bị bỏ (worker hết lượt restart).
+        """
+        abandoned = []
+        for worker_id, worker in list(self._workers.items()):
+            if worker["process"].is_alive():
+                continue
+            if worker["restarts"] >= self.max_restarts:
+                abandoned.extend(worker["pending"])
+                worker["pending"].clear()
+                continue
+            logger.warning(f"TTS worker {worker_id} died (exit {worker['process'].exitcode}), restarting")
+            pending = dict(worker["pending"])
+            self._spawn_worker(worker_id)
+            for index, request in pending.items():
+                self._workers[worker_id]["task_queue"].put((index, request))
+        return abandoned
+
+    def get_worker_health(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "worker_id": worker_id,
+                "pid": worker["process"].pid,
+                "alive": worker["process"].is_alive(),
+                "ready": worker["ready"],
+                "pending": len(worker["pending"]),
+                "completed": worker["completed"],
+                "restarts": worker["restarts"],
+            }
+            for worker_id, worker in self._workers.items()
+        ]
+
+    # ---- scheduling ----
+
+    def _assign_by_voice(self, requests: List[Dict[str, Any]]) -> Dict[int, int]:
+        """
+        Voice affinity + cân bằng tải: nhóm request theo voice rồi gán nhóm lớn nhất
+        cho worker đang nhẹ tải nhất (LPT). Trả về index -> worker_id.
+        """
+        by_voice: Dict[str, List[int]] = {}
+        for index, request in enumerate(requests):
+            voice = request.get("voice_sample_path") or request.get("voice_name") or ""
+            by_voice.setdefault(str(voice).lower(), []).append(index)
+
+        load = {worker_id: 0 for worker_id in self._workers}
+        assignment = {}
+        groups = sorted(by_voice.values(), key=lambda idxs: sum(len(requests[i]["text"]) for i in idxs), reverse=True)
+        for indices in groups:
+            worker_id = min(load, key=load.get)
+            for index in indices:
+                assignment[index] = worker_id
+                load[worker_id] += len(requests[index]["text"])
+        return assignment
+
+    def generate(self, requests: List[Dict[str, Any]], progress_callback=None) -> List[Dict[str, Any]]:
+        """Chạy tất cả requests trên farm, trả về results theo đúng thứ tự"""
+        if not requests:
+            return []
+        self.start()
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        for index, worker_id in self._assign_by_voice(requests).items():
+            worker = self._workers[worker_id]
+            worker["pending"][index] = requests[index]
+            worker["task_queue"].put((index, requests[index]))
+
+        remaining = len(requests)
+        last_progress = time.time()
+
+        while remaining:
+            try:
+                kind, ident, payload = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                for index in self._check_health():
+                    if results[index] is None:
+                        results[index] = {"success": False, "error": "TTS worker crashed repeatedly"}
+                        remaining -= 1
+                if time.time() - last_progress > self.task_timeout:
+                    logger.error("TTS worker farm timed out waiting for results")
+                    break
+                if not any(w["process"].is_alive() for w in self._workers.values()):
+                    logger.error("All TTS workers are dead")
+                    break
+                continue
+
+            last_progress = time.time()
+            if kind == "ready":
+                self._workers[ident]["ready"] = True
+                continue
+
+            for worker in self._workers.values():
+                if worker["pending"].pop(ident, None) is not None:
+                    worker["completed"] += 1
+                    break
+            if results[ident] is None:
+                results[ident] = payload
+                remaining -= 1
+                if progress_callback:
+                    progress_callback(len(requests) - remaining, len(requests))
+
+        return [r if r is not None else {"success": False, "error": "TTS worker failed"} for r in results]
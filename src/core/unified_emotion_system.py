@@ -19,6 +19,7 @@ Version: 2.0 - Unified System
 """
 
 import os
+import sys
 import json
 import logging
 from typing import Dict, List, Optional, Any, Set
@@ -26,6 +27,15 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 import copy
 
+# Add src directory to Python path for proper imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from core.emotion_parameter_table import EmotionParameterTable
+from core.emotion_search_index import EmotionSearchIndex
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -61,6 +71,8 @@ class UnifiedEmotionSystem:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         self.unified_emotions: Dict[str, UnifiedEmotionParameters] = {}
         self.emotion_aliases: Dict[str, str] = {}
+        self._parameter_table: Optional[EmotionParameterTable] = None
+        self._search_index: Optional[EmotionSearchIndex] = None
 
         # === Load from file if exists ===
         config_file = self.config_dir / "unified_emotions.json"
@@ -297,6 +309,7 @@ class UnifiedEmotionSystem:
         ]
         
         # Store all emotions in unified database
+        self.invalidate_parameter_table()
         for emotion in unified_emotions_data:
             self.unified_emotions[emotion.name] = emotion
             
@@ -382,51 +395,53 @@ class UnifiedEmotionSystem:
         }
         
         # Add legacy mappings to alias system
+        self.invalidate_parameter_table()
         for legacy_name, unified_name in legacy_mappings.items():
             if unified_name in self.unified_emotions:
                 self.emotion_aliases[legacy_name] = unified_name
         
         logger.info(f"[REFRESH] Generated {len(legacy_mappings)} legacy emotion mappings")
     
+    @property
+    def parameter_table(self) -> EmotionParameterTable:
+        """Bảng parameters đã compile (tên chính + aliases), build lại sau mỗi thay đổi"""
+        table = self._parameter_table
+        if table is None:
+            table = EmotionParameterTable(self.unified_emotions, self.emotion_aliases)
+            self._parameter_table = table
+        return table
+    
+    def invalidate_parameter_table(self):
+        """Gọi sau khi sửa trực tiếp unified_emotions / emotion_aliases"""
+        self._parameter_table = None
+        self._search_index = None
+    
+    @property
+    def search_index(self) -> EmotionSearchIndex:
+        """Trigram index cho search_emotion, build lần đầu dùng rồi cập nhật incremental"""
+        index = self._search_index
+        if index is None:
+            aliases_by_emotion: Dict[str, List[str]] = {}
+            for alias, main_name in self.emotion_aliases.items():
+                aliases_by_emotion.setdefault(main_name, []).append(alias)
+            index = EmotionSearchIndex()
+            for name, emotion in self.unified_emotions.items():
+                index.add(name, list(emotion.aliases) + aliases_by_emotion.get(name, []), emotion.description)
+            self._search_index = index
+        return index
+    
     def get_emotion_parameters(self, emotion_name: str) -> Dict[str, float]:
         """
         Lấy parameters cho emotion (support cả tên chính và aliases)
         
-        Returns: Dict với 4 thông số chuẩn
+        Returns: Dict với 4 thông số chuẩn (fallback neutral nếu không tìm thấy)
         """
-        # Resolve alias to main name
-        main_name = self.emotion_aliases.get(emotion_name.lower(), emotion_name.lower())
-        
-        # Get emotion
-        emotion = self.unified_emotions.get(main_name)
-        
-        if emotion:
-            return {
-                "temperature": emotion.temperature,
-                "exaggeration": emotion.exaggeration,
-                "cfg_weight": emotion.cfg_weight,
-                "speed": emotion.speed
-            }
-        
-        # Fallback to neutral
-        neutral = self.unified_emotions.get("neutral")
-        if neutral:
+        table = self.parameter_table
+        record = table.get(emotion_name)
+        if record is None:
             logger.warning(f"[WARNING] Emotion '{emotion_name}' not found, using neutral")
-            return {
-                "temperature": neutral.temperature,
-                "exaggeration": neutral.exaggeration,
-                "cfg_weight": neutral.cfg_weight,
-                "speed": neutral.speed
-            }
-        
-        # Ultimate fallback
-        logger.error(f"[EMOJI] Neutral emotion not found! Using hardcoded defaults")
-        return {
-            "temperature": 0.8,
-            "exaggeration": 1.0,
-            "cfg_weight": 0.6,
-            "speed": 1.0
-        }
+            record = table.resolve(None)
+        return record.as_dict()
     
     def get_all_emotions(self) -> Dict[str, UnifiedEmotionParameters]:
         """Lấy tất cả emotions trong unified system"""
@@ -450,22 +465,13 @@ class UnifiedEmotionSystem:
         alias_names = list(self.emotion_aliases.keys())
         return sorted(main_names + alias_names)
     
-    def search_emotion(self, query: str) -> List[str]:
-        """Tìm kiếm emotion theo tên hoặc mô tả"""
-        query = query.lower()
-        results = []
-        
-        # Search main names
-        for name, emotion in self.unified_emotions.items():
-            if query in name.lower() or query in emotion.description.lower():
-                results.append(name)
-        
-        # Search aliases
-        for alias, main_name in self.emotion_aliases.items():
-            if query in alias.lower() and main_name not in results:
-                results.append(main_name)
+    def search_emotion(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Tìm kiếm emotion theo tên, alias hoặc mô tả (không phân biệt dấu, chịu lỗi gõ)
         
-        return sorted(results)
+        Returns: tên emotion xếp theo độ khớp (exact > prefix > substring > fuzzy)
+        """
+        return [name for name, _ in self.search_index.search(query, limit)]
     
     def add_custom_emotion(self, name: str, description: str = "", category: str = "neutral", 
                           temperature: float = 0.8, exaggeration: float = 1.0, 
@@ -521,6 +527,9 @@ class UnifiedEmotionSystem:
             # Add aliases mappings
             for alias in aliases:
                 self.emotion_aliases[alias.lower()] = name
+            self._parameter_table = None
+            if self._search_index is not None:
+                self._search_index.add(name, aliases, new_emotion.description)
             
             # Save config
             self.save_unified_config()
@@ -553,6 +562,9 @@ class UnifiedEmotionSystem:
             
             # Remove emotion
             del self.unified_emotions[emotion_name]
+            self._parameter_table = None
+            if self._search_index is not None:
+                self._search_index.remove(emotion_name)
             
             # Save config
             self.save_unified_config()
@@ -632,6 +644,8 @@ class UnifiedEmotionSystem:
     
     def save_unified_config(self):
         """Lưu unified configuration vào file"""
+        # UI sửa trực tiếp các UnifiedEmotionParameters rồi gọi save -> compile lại bảng
+        self._parameter_table = None
         try:
             # Main config
             config_file = self.config_dir / "unified_emotions.json"
@@ -733,6 +747,10 @@ def get_emotion_parameters(emotion_name: str) -> Dict[str, float]:
     """Convenience function - drop-in replacement cho tất cả legacy systems"""
     return unified_emotion_system.get_emotion_parameters(emotion_name)
 
+def get_emotion_parameter_table() -> EmotionParameterTable:
+    """Bảng parameters compile sẵn dùng chung (version dùng làm cache key)"""
+    return unified_emotion_system.parameter_table
+
 def get_all_emotions() -> Dict[str, UnifiedEmotionParameters]:
     """Get all unified emotions"""
     return unified_emotion_system.get_all_emotions()
@@ -741,9 +759,9 @@ def get_emotion_categories() -> List[str]:
     """Get all emotion categories"""
     return unified_emotion_system.get_emotion_categories()
 
-def search_emotions(query: str) -> List[str]:
-    """Search emotions by name or description"""
-    return unified_emotion_system.search_emotion(query)
+def search_emotions(query: str, limit: Optional[int] = None) -> List[str]:
+    """Search emotions by name, alias or description (ranked)"""
+    return unified_emotion_system.search_emotion(query, limit)
 
 def validate_expert_compliance() -> Dict[str, Any]:
     """Validate compliance với expert recommendations"""
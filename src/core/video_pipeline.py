@@ -1,19 +1,22 @@
 import os
 from ai.content_generator import ContentGenerator
-from image.image_generator import ImageGenerator
+from image.image_generator import ImageGenerator, StubImageGenerator
 from tts.voice_generator import VoiceGenerator
 from video.video_composer import VideoComposer
 from project.project_manager import ProjectManager
 from core.api_manager import APIManager
+from core.segment_pipeline import SegmentStagePipeline
 
 class VideoPipeline:
     def __init__(self):
         self.api_manager = APIManager()
         self.content_gen = ContentGenerator(api_manager=self.api_manager)
-        self.image_gen = ImageGenerator()
+        # VS_IMAGE_PROVIDER=stub: ảnh màu sinh local, không gọi API (test/offline)
+        self.image_gen = StubImageGenerator() if os.getenv('VS_IMAGE_PROVIDER') == 'stub' else ImageGenerator()
         self.voice_gen = VoiceGenerator()
         self.video_composer = VideoComposer()
         self.project_manager = ProjectManager()
+        self.active_pipeline = None
         
         # Reload environment để đảm bảo API keys được đọc đúng
         from dotenv import load_dotenv
@@ -50,45 +53,32 @@ class VideoPipeline:
                 return {"success": False, "error": script_result["error"]}
             
             segments = script_result["segments"]
-            segment_videos = []
             
-            # Bước 3-6: Xử lý từng segment
-            for i, segment in enumerate(segments):
-                segment_id = segment["id"]
-                update_progress(3 + i, f"Xử lý đoạn {segment_id}/{len(segments)}...")
-                
-                # Tạo ảnh
-                image_path = os.path.join(project_dir, "images", f"segment_{segment_id}.jpg")
-                image_result = self.image_gen.generate_and_save_image(
-                    segment["image_prompt"], image_path
-                )
+            # Tạo ảnh
+            def image_stage(segment):
+                image_path = os.path.join(project_dir, "images", f"segment_{segment['id']}.jpg")
+                image_result = self.image_gen.generate_and_save_image(segment["image_prompt"], image_path)
                 if not image_result["success"]:
-                    return {"success": False, "error": f"Error tạo ảnh đoạn {segment_id}: {image_result['error']}"}
-                
-                # Tạo giọng nói với voice_name được chọn
-                audio_path = os.path.join(project_dir, "audio", f"segment_{segment_id}.mp3")
-                voice_result = self.voice_gen.generate_voice_auto(
-                    segment["narration"], audio_path, voice_name=voice_name
-                )
-                if not voice_result["success"]:
-                    return {"success": False, "error": f"Error tạo giọng đoạn {segment_id}: {voice_result['error']}"}
-                
-                # Tạo video segment
-                segment_video_path = os.path.join(project_dir, "segments", f"segment_{segment_id}.mp4")
-                video_result = self.video_composer.create_segment_video(
-                    image_path, audio_path, segment_video_path, effects
-                )
-                if not video_result["success"]:
-                    return {"success": False, "error": f"Error tạo video đoạn {segment_id}: {video_result['error']}"}
-                
-                segment_videos.append(segment_video_path)
+                    return {"success": False, "error": f"Error tạo ảnh đoạn {segment['id']}: {image_result['error']}"}
+                return {"success": True, "image_path": image_path}
+            
+            # Bước 3-6: Ảnh, giọng nói và video của các segment chạy chồng lên nhau
+            render_result = self._render_segments(
+                segments, project_dir, effects, image_stage, voice_name, update_progress
+            )
+            if not render_result["success"]:
+                return {"success": False, "error": render_result["error"]}
+            
+            segment_videos = []
+            for segment, stages in zip(segments, render_result["results"]):
+                segment_videos.append(stages["encode"]["video_path"])
                 
                 # Lưu thông tin segment vào project
                 segment_data = {
                     **segment,
-                    "image_path": image_path,
-                    "audio_path": audio_path,
-                    "video_path": segment_video_path,
+                    "image_path": stages["image"]["image_path"],
+                    "audio_path": stages["voice"]["audio_path"],
+                    "video_path": stages["encode"]["video_path"],
                     "status": "completed"
                 }
                 self.project_manager.add_segment(project_id, segment_data)
@@ -123,6 +113,49 @@ class VideoPipeline:
         except Exception as e:
             return {"success": False, "error": f"Error pipeline: {str(e)}"}
     
+    def _render_segments(self, segments, project_dir, effects, image_stage, voice_name, update_progress):
+        """
+        Staged pipeline cho các segment: ảnh tải trước, TTS trên pool riêng,
+        encode bằng nhiều ffmpeg worker song song. Kết quả theo đúng thứ tự segment.
+        """
+        total = len(segments)
+        
+        def voice_stage(segment):
+            audio_path = os.path.join(project_dir, "audio", f"segment_{segment['id']}.mp3")
+            voice_kwargs = {"voice_name": voice_name} if voice_name else {}
+            voice_result = self.voice_gen.generate_voice_auto_v2(segment["narration"], audio_path, **voice_kwargs)
+            if not voice_result["success"]:
+                return {"success": False, "error": f"Error tạo giọng đoạn {segment['id']}: {voice_result['error']}"}
+            return {"success": True, "audio_path": audio_path}
+        
+        def encode_stage(segment, image_result, voice_result):
+            segment_video_path = os.path.join(project_dir, "segments", f"segment_{segment['id']}.mp4")
+            video_result = self.video_composer.create_segment_video(
+                image_result["image_path"], voice_result["audio_path"], segment_video_path, effects
+            )
+            if not video_result["success"]:
+                return {"success": False, "error": f"Error tạo video đoạn {segment['id']}: {video_result['error']}"}
+            return {"success": True, "video_path": segment_video_path}
+        
+        def stage_progress(stage, done, _total):
+            progress = self.active_pipeline.progress if self.active_pipeline else {}
+            overall = sum(progress.values()) / (3 * total) if total else 1.0
+            update_progress(3 + min(3, int(overall * 4)),
+                            f"Ảnh {progress.get('image', 0)}/{total} · Giọng {progress.get('voice', 0)}/{total} · "
+                            f"Video {progress.get('encode', 0)}/{total}")
+        
+        self.active_pipeline = SegmentStagePipeline(image_stage, voice_stage, encode_stage,
+                                                    stage_callback=stage_progress)
+        try:
+            return self.active_pipeline.run(segments)
+        finally:
+            self.active_pipeline = None
+    
+    def cancel(self):
+        """Cancel pipeline đang chạy (nếu có)"""
+        if self.active_pipeline:
+            self.active_pipeline.cancel()
+    
     def regenerate_segment(self, project_id, segment_id, new_prompt=None, effects=None):
         """Tạo lại một segment cụ thể"""
         try:
@@ -223,47 +256,37 @@ class VideoPipeline:
             if len(image_files) < len(segments):
                 return {"success": False, "error": f"Không đủ ảnh! Cần {len(segments)} ảnh, chỉ có {len(image_files)} ảnh"}
             
-            segment_videos = []
+            # Sử dụng ảnh có sẵn (lặp lại nếu không đủ ảnh)
+            source_images = {
+                segment["id"]: image_files[i % len(image_files)] for i, segment in enumerate(segments)
+            }
             
-            # Bước 3-6: Xử lý từng segment với ảnh có sẵn
-            for i, segment in enumerate(segments):
-                segment_id = segment["id"]
-                update_progress(3 + i, f"Xử lý đoạn {segment_id}/{len(segments)}...")
-                
-                # Sử dụng ảnh có sẵn
-                source_image = image_files[i % len(image_files)]  # Lặp lại nếu không đủ ảnh
-                image_path = os.path.join(project_dir, "images", f"segment_{segment_id}.jpg")
-                
-                # Copy và resize ảnh
-                image_result = self.image_gen.load_custom_image(source_image, image_path)
+            # Copy và resize ảnh
+            def image_stage(segment):
+                image_path = os.path.join(project_dir, "images", f"segment_{segment['id']}.jpg")
+                image_result = self.image_gen.load_custom_image(source_images[segment["id"]], image_path)
                 if not image_result["success"]:
-                    return {"success": False, "error": f"Error xử lý ảnh đoạn {segment_id}: {image_result['error']}"}
-                
-                # Tạo giọng nói
-                audio_path = os.path.join(project_dir, "audio", f"segment_{segment_id}.mp3")
-                voice_result = self.voice_gen.generate_voice_auto(
-                    segment["narration"], audio_path
-                )
-                if not voice_result["success"]:
-                    return {"success": False, "error": f"Error tạo giọng đoạn {segment_id}: {voice_result['error']}"}
-                
-                # Tạo video segment
-                segment_video_path = os.path.join(project_dir, "segments", f"segment_{segment_id}.mp4")
-                video_result = self.video_composer.create_segment_video(
-                    image_path, audio_path, segment_video_path, effects
-                )
-                if not video_result["success"]:
-                    return {"success": False, "error": f"Error tạo video đoạn {segment_id}: {video_result['error']}"}
-                
-                segment_videos.append(segment_video_path)
+                    return {"success": False, "error": f"Error xử lý ảnh đoạn {segment['id']}: {image_result['error']}"}
+                return {"success": True, "image_path": image_path}
+            
+            # Bước 3-6: Ảnh, giọng nói và video của các segment chạy chồng lên nhau
+            render_result = self._render_segments(
+                segments, project_dir, effects, image_stage, None, update_progress
+            )
+            if not render_result["success"]:
+                return {"success": False, "error": render_result["error"]}
+            
+            segment_videos = []
+            for segment, stages in zip(segments, render_result["results"]):
+                segment_videos.append(stages["encode"]["video_path"])
                 
                 # Lưu thông tin segment vào project
                 segment_data = {
                     **segment,
-                    "image_path": image_path,
-                    "audio_path": audio_path,
-                    "video_path": segment_video_path,
-                    "source_image": source_image,  # Lưu đường dẫn ảnh gốc
+                    "image_path": stages["image"]["image_path"],
+                    "audio_path": stages["voice"]["audio_path"],
+                    "video_path": stages["encode"]["video_path"],
+                    "source_image": source_images[segment["id"]],  # Lưu đường dẫn ảnh gốc
                     "image_source": "custom",
                     "status": "completed"
                 }
@@ -1,16 +1,70 @@
 """
 Voice Library Management - Theo cách Chatterbox-Audiobook implement
 Cấu trúc: voice_library/voice_name/config.json + voice.wav
+
+Index: profiles đã parse (kèm duration, sample rate, content hash của audio tham chiếu) được
+giữ trong memory và trong manifest voice_library/.voice_manifest.json. Manifest cập nhật
+incremental khi save/delete profile và chỉ scan lại khi mtime thư mục library thay đổi,
+nên dropdown / batch assignment không đọc lại config.json của mọi giọng.
 """
 
 import os
 import json
 import shutil
+import hashlib
+import tempfile
+import threading
+import wave
 from typing import List, Dict, Any, Optional, Tuple
 import logging
 
+from core.lazy_imports import module_available
+
 logger = logging.getLogger(__name__)
 
+MANIFEST_NAME = ".voice_manifest.json"
+MANIFEST_VERSION = 1
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac')
+SOUNDFILE_AVAILABLE = module_available("soundfile")
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _audio_metadata(audio_path: str) -> Dict[str, Any]:
+    """Duration, sample rate và sha1 nội dung của file audio tham chiếu"""
+    stat = os.stat(audio_path)
+    metadata = {
+        'audio_mtime_ns': stat.st_mtime_ns,
+        'audio_size': stat.st_size,
+        'duration': None,
+        'sample_rate': None,
+    }
+
+    sha1 = hashlib.sha1()
+    with open(audio_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(block)
+    metadata['content_hash'] = sha1.hexdigest()
+
+    try:
+        if SOUNDFILE_AVAILABLE:
+            import soundfile as sf
+            info = sf.info(audio_path)
+            metadata['duration'] = round(float(info.duration), 3)
+            metadata['sample_rate'] = int(info.samplerate)
+        elif audio_path.lower().endswith('.wav'):
+            with wave.open(audio_path, 'rb') as wav_file:
+                metadata['sample_rate'] = wav_file.getframerate()
+                metadata['duration'] = round(wav_file.getnframes() / float(wav_file.getframerate()), 3)
+    except Exception as e:
+        logger.debug(f"Could not read audio info for {audio_path}: {e}")
+    return metadata
+
 class VoiceLibrary:
     """
     Voice Library Management theo cách Chatterbox-Audiobook
@@ -23,6 +77,10 @@ class VoiceLibrary:
             voice_library_path: Path to voice library directory
         """
         self.voice_library_path = voice_library_path
+        self.manifest_path = os.path.join(voice_library_path, MANIFEST_NAME)
+        self._lock = threading.RLock()
+        self._profiles: Optional[Dict[str, Dict[str, Any]]] = None  # voice_name -> manifest entry
+        self._library_mtime: Optional[int] = None
         self.ensure_voice_library_exists()
         logger.info(f"VoiceLibrary initialized with path: {voice_library_path}")
     
@@ -32,6 +90,141 @@ class VoiceLibrary:
             os.makedirs(self.voice_library_path)
             logger.info(f"Created voice library directory: {self.voice_library_path}")
     
+    # ---- index / manifest ----
+    
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest.get('profiles', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+    
+    def _save_manifest(self) -> None:
+        """Ghi manifest atomic (temp + os.replace) rồi ghi nhận mtime mới của thư mục library"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".voice_manifest_", suffix=".tmp", dir=self.voice_library_path)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'profiles': self._profiles}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Could not write voice manifest: {e}")
+        self._library_mtime = _mtime_ns(self.voice_library_path)
+    
+    def _scan_profile(self, voice_name: str, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Parse config.json + metadata audio của một profile; None nếu không có config.json"""
+        profile_dir = os.path.join(self.voice_library_path, voice_name)
+        config_path = os.path.join(profile_dir, "config.json")
+        if not os.path.isfile(config_path):
+            return None
+        
+        config_error = False
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            config['voice_name'] = voice_name  # Ensure voice_name is set
+        except Exception as e:
+            logger.warning(f"Error loading config for {voice_name}: {e}")
+            # Create basic profile if config is corrupted
+            config_error = True
+            config = {
+                'voice_name': voice_name,
+                'display_name': voice_name,
+                'description': 'Voice profile',
+                'exaggeration': 1.0,
+                'cfg_weight': 1.0,
+                'temperature': 0.7
+            }
+        
+        entry = {
+            'config': config,
+            'config_error': config_error,
+            'config_mtime_ns': _mtime_ns(config_path),
+            'dir_mtime_ns': _mtime_ns(profile_dir),
+            'audio_file': None,
+        }
+        
+        for ext in AUDIO_EXTENSIONS:
+            audio_path = os.path.join(profile_dir, f"voice{ext}")
+            if os.path.isfile(audio_path):
+                entry['audio_file'] = f"voice{ext}"
+                stat = os.stat(audio_path)
+                # Audio không đổi -> giữ metadata cũ, không hash lại
+                if (previous and previous.get('audio_file') == entry['audio_file']
+                        and previous.get('audio_mtime_ns') == stat.st_mtime_ns
+                        and previous.get('audio_size') == stat.st_size):
+                    entry.update({key: previous.get(key) for key in
+                                  ('audio_mtime_ns', 'audio_size', 'duration', 'sample_rate', 'content_hash')})
+                else:
+                    entry.update(_audio_metadata(audio_path))
+                break
+        return entry
+    
+    def _entry_is_current(self, voice_name: str, entry: Dict[str, Any]) -> bool:
+        profile_dir = os.path.join(self.voice_library_path, voice_name)
+        return (entry.get('dir_mtime_ns') == _mtime_ns(profile_dir)
+                and entry.get('config_mtime_ns') == _mtime_ns(os.path.join(profile_dir, "config.json")))
+    
+    def _sync(self) -> None:
+        """Đối chiếu index với thư mục library; chỉ parse lại profile mới hoặc đã đổi"""
+        known = self._profiles if self._profiles is not None else self._load_manifest()
+        profiles: Dict[str, Dict[str, Any]] = {}
+        changed = self._profiles is None and not known
+        
+        if os.path.exists(self.voice_library_path):
+            for item in sorted(os.listdir(self.voice_library_path)):
+                if item.startswith('.') or not os.path.isdir(os.path.join(self.voice_library_path, item)):
+                    continue
+                previous = known.get(item)
+                if previous is not None and self._entry_is_current(item, previous):
+                    profiles[item] = previous
+                    continue
+                entry = self._scan_profile(item, previous)
+                if entry is not None:
+                    profiles[item] = entry
+                changed = changed or entry != previous
+        
+        changed = changed or set(profiles) != set(known)
+        self._profiles = profiles
+        if changed:
+            self._save_manifest()
+        else:
+            self._library_mtime = _mtime_ns(self.voice_library_path)
+        logger.debug(f"Voice library index synced: {len(profiles)} profiles")
+    
+    def _index(self) -> Dict[str, Dict[str, Any]]:
+        """Index hiện tại; scan lại chỉ khi mtime thư mục library đổi (thêm/xóa/đổi tên profile)"""
+        with self._lock:
+            if self._profiles is None or _mtime_ns(self.voice_library_path) != self._library_mtime:
+                self._sync()
+            return self._profiles
+    
+    def _update_profile_entry(self, voice_name: str) -> None:
+        """Cập nhật incremental một profile sau khi save/delete"""
+        with self._lock:
+            self._index()
+            entry = self._scan_profile(voice_name, self._profiles.get(voice_name))
+            if entry is None:
+                self._profiles.pop(voice_name, None)
+            else:
+                self._profiles[voice_name] = entry
+            self._save_manifest()
+    
+    def invalidate_index(self) -> None:
+        """Bắt buộc scan lại (ví dụ sau khi sửa config.json bằng tay)"""
+        with self._lock:
+            self._profiles = {}
+            self._library_mtime = None
+    
+    def get_voice_metadata(self, voice_name: str) -> Optional[Dict[str, Any]]:
+        """Duration, sample rate, content hash của audio tham chiếu (None nếu không có profile)"""
+        entry = self._index().get(voice_name)
+        if entry is None:
+            return None
+        return {key: entry.get(key) for key in ('audio_file', 'duration', 'sample_rate', 'content_hash')}
+    
     def get_voice_profiles(self) -> List[Dict[str, Any]]:
         """
         Get all voice profiles from the library.
@@ -39,33 +232,7 @@ class VoiceLibrary:
         Returns:
             List of voice profile dictionaries
         """
-        profiles = []
-        
-        if not os.path.exists(self.voice_library_path):
-            return profiles
-        
-        for item in os.listdir(self.voice_library_path):
-            profile_dir = os.path.join(self.voice_library_path, item)
-            if os.path.isdir(profile_dir):
-                config_path = os.path.join(profile_dir, "config.json")
-                if os.path.exists(config_path):
-                    try:
-                        with open(config_path, 'r', encoding='utf-8') as f:
-                            config = json.load(f)
-                            config['voice_name'] = item  # Ensure voice_name is set
-                            profiles.append(config)
-                    except Exception as e:
-                        logger.warning(f"Error loading config for {item}: {e}")
-                        # Create basic profile if config is corrupted
-                        profiles.append({
-                            'voice_name': item,
-                            'display_name': item,
-                            'description': 'Voice profile',
-                            'exaggeration': 1.0,
-                            'cfg_weight': 1.0,
-                            'temperature': 0.7
-                        })
-        
+        profiles = [dict(entry['config']) for entry in self._index().values()]
         logger.debug(f"Found {len(profiles)} voice profiles")
         return profiles
     
@@ -113,8 +280,6 @@ class VoiceLibrary:
         Returns:
             Voice configuration dictionary
         """
-        config_path = os.path.join(self.voice_library_path, voice_name, "config.json")
-        
         # Default configuration
         default_config = {
             'voice_name': voice_name,
@@ -125,16 +290,11 @@ class VoiceLibrary:
             'temperature': 0.7
         }
         
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # Merge with defaults to ensure all keys exist
-                    default_config.update(config)
-                    logger.debug(f"Loaded config for {voice_name}")
-                    return default_config
-            except Exception as e:
-                logger.warning(f"Error loading config for {voice_name}: {e}")
+        entry = self._index().get(voice_name)
+        if entry is not None and not entry['config_error']:
+            # Merge with defaults to ensure all keys exist
+            default_config.update(entry['config'])
+            return default_config
         
         logger.debug(f"Using default config for {voice_name}")
         return default_config
@@ -153,18 +313,23 @@ class VoiceLibrary:
             return None, {}
         
         profile_dir = os.path.join(self.voice_library_path, voice_name)
-        
-        if not os.path.exists(profile_dir):
-            logger.warning(f"Voice profile directory not found: {profile_dir}")
-            return None, {}
-        
-        # Look for audio file
-        audio_file = None
-        for ext in ['.wav', '.mp3', '.flac']:
-            potential_file = os.path.join(profile_dir, f"voice{ext}")
-            if os.path.exists(potential_file):
-                audio_file = potential_file
-                break
+        entry = self._index().get(voice_name)
+        
+        if entry is not None:
+            audio_file = os.path.join(profile_dir, entry['audio_file']) if entry['audio_file'] else None
+        else:
+            # Thư mục không có config.json -> không nằm trong index, tìm trực tiếp
+            if not os.path.exists(profile_dir):
+                logger.warning(f"Voice profile directory not found: {profile_dir}")
+                return None, {}
+            
+            # Look for audio file
+            audio_file = None
+            for ext in AUDIO_EXTENSIONS:
+                potential_file = os.path.join(profile_dir, f"voice{ext}")
+                if os.path.exists(potential_file):
+                    audio_file = potential_file
+                    break
         
         # Get voice configuration
         config = self.get_voice_config(voice_name)
@@ -232,6 +397,7 @@ class VoiceLibrary:
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=2, ensure_ascii=False)
             
+            self._update_profile_entry(safe_voice_name)
             logger.info(f"Saved voice profile: {safe_voice_name}")
             return f"[OK] Voice profile '{display_name}' saved successfully"
             
@@ -284,6 +450,7 @@ class VoiceLibrary:
         
         try:
             shutil.rmtree(profile_dir)
+            self._update_profile_entry(voice_name)
             logger.info(f"Deleted voice profile: {voice_name}")
             return f"[OK] Voice profile '{voice_name}' deleted successfully"
         except Exception as e:
@@ -0,0 +1,282 @@
+"""
+Whisper Batch Engine
+Batched ASR cho validation: nhiều file -> một lần encode/decode
+
+- Audio load + resample 16kHz song song trên I/O threads
+- Clip <= 30s được pad thành mel batch (N, n_mels, 3000) và decode một lần
+- Backend faster-whisper (CTranslate2, int8 trên CPU) nếu có, fallback openai-whisper
+- Clip dài hơn 30s đi qua model.transcribe thông thường
+Kết quả trả về theo format dict của openai-whisper ``transcribe`` để code
+scoring hiện có dùng lại được.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30
+MAX_DECODE_TOKENS = 448
+
+
+def _detect_device() -> str:
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+    except ImportError:
+        pass
+    return "cpu"
+
+
+def _resolve_backend(backend: str) -> str:
+    """'auto' -> faster-whisper nếu import được, không thì openai"""
+    if backend != "auto":
+        return backend
+    try:
+        import faster_whisper  # noqa: F401
+        return "faster-whisper"
+    except ImportError:
+        return "openai"
+
+
+class BatchedWhisperEngine:
+    """
+    Wrapper quanh một Whisper model với API batch.
+
+    ``transcribe(path)`` giữ tương thích với ``whisper.Whisper.transcribe``;
+    ``transcribe_batch(paths)`` là đường nhanh cho nhiều clip ngắn.
+    """
+
+    def __init__(self, model_name: str = "base", backend: str = "auto", device: str = "auto",
+                 compute_type: Optional[str] = None, language: Optional[str] = None,
+                 beam_size: int = 1, io_workers: int = 4):
+        self.model_name = model_name
+        self.backend = _resolve_backend(backend)
+        self.device = _detect_device() if device == "auto" else device
+        self.compute_type = compute_type or ("float16" if self.device == "cuda" else "int8")
+        self.language = language
+        self.beam_size = max(1, beam_size)
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="whisper-io")
+        self.model = self._load_model()
+
+    def _load_model(self):
+        """Model lấy từ WhisperModelPool dùng chung, trả lại pool khi shutdown()"""
+        from core.whisper_model_pool import get_whisper_model_pool
+        logger.info(f"Acquiring Whisper model: {self.model_name} ({self.backend}, {self.device}"
+                    f"{', ' + self.compute_type if self.backend == 'faster-whisper' else ''})")
+        return get_whisper_model_pool().acquire(self.model_name, self.backend, self.compute_type, self.device)
+
+    def cache_params(self, batched: bool = False) -> Dict[str, Any]:
+        """Decoding params cho transcription cache key; rỗng khi giống default openai transcribe"""
+        params: Dict[str, Any] = {}
+        if self.backend == "faster-whisper" or self.beam_size > 1:
+            params["beam_size"] = self.beam_size
+        if batched:
+            params["without_timestamps"] = True
+        return params
+
+    # ---- audio I/O ----
+
+    def _load_audio(self, file_path: str):
+        """Decode + resample về float32 mono 16kHz"""
+        if self.backend == "faster-whisper":
+            from faster_whisper import decode_audio
+            return decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+
+        import whisper
+        return whisper.load_audio(file_path, sr=SAMPLE_RATE)
+
+    def load_audio_batch(self, file_paths: List[str]) -> List[Any]:
+        """Load song song; phần tử là audio array hoặc Exception"""
+        def load(path):
+            try:
+                if not os.path.exists(path):
+                    raise FileNotFoundError("File not found")
+                return self._load_audio(path)
+            except Exception as e:
+                return e
+
+        return list(self.io_pool.map(load, file_paths))
+
+    # ---- single file ----
+
+    def transcribe(self, file_path: str, **kwargs) -> Dict[str, Any]:
+        """Transcribe một file, trả về dict kiểu openai-whisper"""
+        if self.backend == "faster-whisper":
+            segments, info = self.model.transcribe(
+                file_path, beam_size=self.beam_size, language=self.language, **kwargs
+            )
+            segments = [
+                {
+                    "start": seg.start,
+                    "end": seg.end,
+                    "text": seg.text,
+                    "avg_logprob": seg.avg_logprob,
+                    "no_speech_prob": seg.no_speech_prob,
+                }
+                for seg in segments
+            ]
+            return {
+                "text": "".join(seg["text"] for seg in segments),
+                "segments": segments,
+                "language": info.language,
+                "duration": info.duration,
+            }
+
+        kwargs.setdefault("fp16", self.device == "cuda")
+        if self.language:
+            kwargs.setdefault("language", self.language)
+        result = self.model.transcribe(file_path, **kwargs)
+        result.setdefault("duration", sum(seg.get("end", 0) - seg.get("start", 0)
+                                          for seg in result.get("segments", [])))
+        return result
+
+    # ---- batch ----
+
+    def transcribe_batch(self, file_paths: List[str], audios: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Transcribe nhiều file. Mỗi phần tử kết quả là dict kiểu openai-whisper,
+        hoặc {"error": str} nếu file đó lỗi.
+
+        Args:
+            file_paths: đường dẫn audio
+            audios: audio đã load sẵn (từ load_audio_batch) để overlap I/O với decode
+        """
+        if audios is None:
+            audios = self.load_audio_batch(file_paths)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        short_indices = []
+        for index, audio in enumerate(audios):
+            if isinstance(audio, Exception):
+                results[index] = {"error": str(audio)}
+            elif len(audio) <= CHUNK_SECONDS * SAMPLE_RATE:
+                short_indices.append(index)
+            else:
+                results[index] = self._transcribe_safely(file_paths[index])
+
+        if short_indices:
+            clips = [audios[i] for i in short_indices]
+            try:
+                if self.backend == "faster-whisper":
+                    decoded = self._decode_batch_ctranslate2(clips)
+                else:
+                    decoded = self._decode_batch_openai(clips)
+                for index, result in zip(short_indices, decoded):
+                    results[index] = result
+            except Exception as e:
+                logger.warning(f"Batched decode failed ({e}), falling back to per-file transcription")
+                for index in short_indices:
+                    results[index] = self._transcribe_safely(file_paths[index])
+
+        return results
+
+    def _transcribe_safely(self, file_path: str) -> Dict[str, Any]:
+        try:
+            return self.transcribe(file_path)
+        except Exception as e:
+            return {"error": str(e)}
+
+    @staticmethod
+    def _clip_result(text: str, duration: float, avg_logprob: float, no_speech_prob: float,
+                     language: Optional[str]) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "language": language,
+            "duration": duration,
+            "no_speech_prob": no_speech_prob,
+            "segments": [{
+                "start": 0.0,
+                "end": duration,
+                "text": text,
+                "avg_logprob": avg_logprob,
+                "no_speech_prob": no_speech_prob,
+            }],
+        }
+
+    def _decode_batch_openai(self, clips: List[Any]) -> List[Dict[str, Any]]:
+        import torch
+        import whisper
+
+        n_mels = getattr(self.model.dims, "n_mels", 80)
+        mel_kwargs = {"n_mels": n_mels} if n_mels != 80 else {}
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(clip)), **mel_kwargs)
+            for clip in clips
+        ]).to(self.model.device)
+
+        options = whisper.DecodingOptions(
+            language=self.language,
+            without_timestamps=True,
+            fp16=self.device == "cuda",
+            beam_size=self.beam_size if self.beam_size > 1 else None,
+        )
+        with torch.inference_mode():
+            decoded = whisper.decode(self.model, mels, options)
+
+        return [
+            self._clip_result(r.text, len(clip) / SAMPLE_RATE, r.avg_logprob, r.no_speech_prob, r.language)
+            for clip, r in zip(clips, decoded)
+        ]
+
+    def _decode_batch_ctranslate2(self, clips: List[Any]) -> List[Dict[str, Any]]:
+        import numpy as np
+        from faster_whisper.tokenizer import Tokenizer
+
+        extractor = self.model.feature_extractor
+        n_frames = extractor.nb_max_frames
+        features = []
+        for clip in clips:
+            mel = extractor(clip)[:, :n_frames]
+            if mel.shape[1] < n_frames:
+                mel = np.pad(mel, ((0, 0), (0, n_frames - mel.shape[1])))
+            features.append(mel)
+        encoder_output = self.model.encode(np.stack(features).astype(np.float32))
+
+        multilingual = self.model.model.is_multilingual
+        if self.language or not multilingual:
+            languages = [self.language or "en"] * len(clips)
+        else:
+            detected = self.model.model.detect_language(encoder_output)
+            languages = [candidates[0][0][2:-2] for candidates in detected]  # "<|en|>" -> "en"
+
+        tokenizers: Dict[str, Any] = {}
+        prompts = []
+        for language in languages:
+            if language not in tokenizers:
+                tokenizers[language] = Tokenizer(
+                    self.model.hf_tokenizer, multilingual, task="transcribe", language=language
+                )
+            prompts.append(self.model.get_prompt(tokenizers[language], [], without_timestamps=True))
+
+        outputs = self.model.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=self.beam_size,
+            max_length=MAX_DECODE_TOKENS,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+
+        results = []
+        for clip, language, output in zip(clips, languages, outputs):
+            tokens = output.sequences_ids[0]
+            # score là log prob đã chuẩn hóa theo độ dài -> avg_logprob như faster-whisper tính
+            avg_logprob = output.scores[0] * len(tokens) / (len(tokens) + 1)
+            text = tokenizers[language].decode(tokens)
+            results.append(self._clip_result(text, len(clip) / SAMPLE_RATE, avg_logprob,
+                                             output.no_speech_prob, language))
+        return results
+
+    def shutdown(self):
+        self.io_pool.shutdown(wait=False)
+        if self.model is not None:
+            from core.whisper_model_pool import get_whisper_model_pool
+            get_whisper_model_pool().release(self.model)
+            self.model = None
@@ -9,7 +9,7 @@ Advanced Whisper management system tái tạo từ Chatterbox TTS Extended:
 - Auto-disable khi không cần thiết
 - VRAM management để tránh memory leaks
 - Performance monitoring
-- Integrated with Model Registry for singleton pattern
+- Models dùng chung qua WhisperModelPool (đăng ký vào Model Registry)
 """
 
 import os
@@ -37,10 +37,11 @@ except ImportError:
     print("WARNING: psutil not available, system monitoring features will be limited")
 
 try:
-    from core.model_registry import model_registry
+    from core.transcription_cache import get_transcription_cache
 except ImportError:
-    print("WARNING: model_registry not available, using fallback")
-    model_registry = None
+    get_transcription_cache = None
+
+from core.whisper_model_pool import get_whisper_model_pool
 
 logger = logging.getLogger(__name__)
 
@@ -180,13 +181,19 @@ class WhisperManager:
             'average_processing_speed': 0.0,
             'memory_usage_peak': 0.0,
             'model_loads': 0,
-            'cleanups_performed': 0
+            'cleanups_performed': 0,
+            'transcription_cache_hits': 0
         }
         
         # Initialize system
         self._detect_device_capabilities()
         self._check_backend_availability()
         
+        # Pool dùng chung: tạo sớm để VS_WHISPER_PREFETCH warm model ở background
+        self.model_pool = get_whisper_model_pool()
+        if self.config.auto_cleanup:
+            self.model_pool.set_idle_timeout(self.config.model_size, self.config.cleanup_timeout)
+        
     def _detect_device_capabilities(self):
         """Detect device capabilities và VRAM"""
         device_info = {
@@ -341,43 +348,11 @@ class WhisperManager:
         try:
             start_time = time.time()
             
-            # Generate unique model key
-            model_key = f"whisper_{backend}_{model_size}_{self._get_optimal_device()}"
-            
-            # Check if model already exists in registry
-            existing_model = model_registry.get_model(model_key)
-            if existing_model:
-                self.current_model = existing_model
-                self.current_backend = backend
-                logger.info(f"[EMOJI] Reusing Whisper model from registry: {model_key}")
-                return
-            
-            # Load new model
-            if backend == "faster-whisper":
-                from faster_whisper import WhisperModel
-                
-                device = self._get_optimal_device()
-                model = WhisperModel(
-                    model_size, 
-                    device=device,
-                    compute_type=self.config.compute_type
-                )
-                
-            else:  # openai
-                import whisper
-                model = whisper.load_model(model_size)
-            
-            # Register model in registry
-            model_info = self.MODEL_INFO.get(model_size, None)
-            memory_usage = model_info.vram_requirement if model_info else 2.0
-            
-            self.current_model = model_registry.register_model(
-                model_key, 
-                model, 
-                "whisper", 
-                memory_usage
+            # Lấy model từ pool dùng chung (load song song, reuse nếu validator khác đã load)
+            self.current_model = self.model_pool.acquire(
+                model_size, backend, self.config.compute_type, self._get_optimal_device()
             )
-                
+            model_key = f"whisper_{backend}_{model_size}_{self._get_optimal_device()}"
             load_time = time.time() - start_time
             
             # Store metadata
@@ -416,30 +391,33 @@ class WhisperManager:
         memory_before = self._get_memory_usage()
         
         try:
+            model_size = getattr(self.current_model, '_model_size', self.config.model_size)
+            decoding = {'temperature': self.config.temperature, **kwargs}
             if self.current_backend == "faster-whisper":
-                segments, info = self.current_model.transcribe(
-                    audio_path,
-                    beam_size=self.config.beam_size,
-                    temperature=self.config.temperature,
-                    vad_filter=self.config.enable_vad,
-                    **kwargs
+                decoding.update(beam_size=self.config.beam_size, vad_filter=self.config.enable_vad)
+            
+            transcribed = []
+            
+            def run():
+                transcribed.append(True)
+                return self._run_transcription(audio_path, **kwargs)
+            
+            cache = get_transcription_cache() if get_transcription_cache else None
+            if cache:
+                result = cache.get_or_transcribe(
+                    audio_path, run, model_size, self.current_backend, kwargs.get('language'), **decoding
                 )
-                
-                transcription = " ".join([segment.text for segment in segments])
+            else:
+                result = run()
+            
+            transcription = result["text"]
+            if self.current_backend == "faster-whisper":
                 metadata = {
-                    'language': info.language,
-                    'language_probability': info.language_probability,
-                    'duration': info.duration
+                    'language': result.get('language'),
+                    'language_probability': result.get('language_probability'),
+                    'duration': result.get('duration', 0)
                 }
-                
             else:  # openai
-                result = self.current_model.transcribe(
-                    audio_path,
-                    temperature=self.config.temperature,
-                    **kwargs
-                )
-                
-                transcription = result["text"]
                 metadata = {
                     'language': result.get("language", "unknown"),
                     'segments': len(result.get("segments", [])),
@@ -447,6 +425,11 @@ class WhisperManager:
                                   for seg in result.get("segments", []))
                 }
             
+            if not transcribed:
+                self.stats['transcription_cache_hits'] += 1
+                logger.debug(f"[OK] Transcription cache hit: {os.path.basename(audio_path)}")
+                return transcription.strip(), metadata
+            
             processing_time = time.time() - start_time
             memory_after = self._get_memory_usage()
             memory_peak = max(memory_before, memory_after)
@@ -471,6 +454,35 @@ class WhisperManager:
             logger.error(f"[EMOJI] Transcription failed: {e}")
             raise
     
+    def _run_transcription(self, audio_path: str, **kwargs) -> Dict[str, Any]:
+        """Chạy model hiện tại, trả về dict kiểu openai-whisper (text, segments, language, duration)"""
+        if self.current_backend == "faster-whisper":
+            segments, info = self.current_model.transcribe(
+                audio_path,
+                beam_size=self.config.beam_size,
+                temperature=self.config.temperature,
+                vad_filter=self.config.enable_vad,
+                **kwargs
+            )
+            segments = [
+                {'start': seg.start, 'end': seg.end, 'text': seg.text,
+                 'avg_logprob': seg.avg_logprob, 'no_speech_prob': seg.no_speech_prob}
+                for seg in segments
+            ]
+            return {
+                'text': " ".join(seg['text'] for seg in segments),
+                'segments': segments,
+                'language': info.language,
+                'language_probability': info.language_probability,
+                'duration': info.duration
+            }
+        
+        return self.current_model.transcribe(
+            audio_path,
+            temperature=self.config.temperature,
+            **kwargs
+        )
+    
     def _get_optimal_device(self) -> str:
         """Get optimal device cho Whisper"""
         if self.config.device != "auto":
@@ -526,14 +538,8 @@ class WhisperManager:
         logger.info("[CLEAN] Cleaning up Whisper model...")
         
         try:
-            # Generate model key to unregister from registry
-            if hasattr(self.current_model, '_model_size') and hasattr(self.current_model, '_backend'):
-                model_size = self.current_model._model_size
-                backend = self.current_model._backend
-                model_key = f"whisper_{backend}_{model_size}_{self._get_optimal_device()}"
-                
-                # Unregister from model registry
-                model_registry.unregister_model(model_key)
+            # Trả model về pool; pool unload khi idle quá timeout hoặc cần chỗ cho model khác
+            self.model_pool.release(self.current_model)
             
             # Clear local reference
             self.current_model = None
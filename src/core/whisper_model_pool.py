@@ -0,0 +1,335 @@
+"""
+Whisper Model Pool
+Pool dùng chung cho mọi Whisper model trong process: WhisperManager, WhisperValidator,
+ParallelWhisperValidator và GenerationController không còn load bản riêng
+
+- Key = (backend, size, compute_type, device); reference count cho từng model
+- Load song song trên loader threads; nhiều caller cùng xin một key chỉ load một lần
+- Memory budget (GB): vượt budget thì evict model idle (refs == 0) theo LRU
+- Model idle quá timeout (cấu hình theo size) được unload bởi janitor thread
+- prefetch(): warm model ở background, VS_WHISPER_PREFETCH="base,faster-whisper:small:int8" khi khởi động
+"""
+import os
+import gc
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from core.model_registry import model_registry
+except ImportError:
+    model_registry = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_GB = float(os.getenv("VS_WHISPER_POOL_BUDGET_GB", "8.0"))
+DEFAULT_IDLE_TIMEOUT = float(os.getenv("VS_WHISPER_IDLE_TIMEOUT", "300"))
+JANITOR_INTERVAL = 30.0
+
+ModelKey = Tuple[str, str, Optional[str], str]
+
+
+def _detect_device() -> str:
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+    except ImportError:
+        pass
+    return "cpu"
+
+
+@dataclass
+class PooledModel:
+    """Một model đang nằm trong pool"""
+    key: ModelKey
+    model: Any
+    memory_gb: float
+    refs: int = 0
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+
+class WhisperModelPool:
+    """
+    Shared, budgeted Whisper model pool.
+
+    acquire()/release() (hoặc ``with pool.lease(...)``) thay cho whisper.load_model /
+    faster_whisper.WhisperModel trực tiếp.
+    """
+
+    def __init__(self, budget_gb: float = DEFAULT_BUDGET_GB, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 load_workers: int = 2):
+        self.budget_gb = budget_gb
+        self.default_idle_timeout = idle_timeout
+        self.idle_timeouts: Dict[str, float] = {}
+        self._models: "OrderedDict[ModelKey, PooledModel]" = OrderedDict()
+        self._loading: Dict[ModelKey, Future] = {}
+        self._lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(max_workers=max(1, load_workers), thread_name_prefix="whisper-load")
+        self._stop = threading.Event()
+        self._janitor: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "loads": 0, "load_failures": 0, "evictions": 0, "idle_unloads": 0}
+
+    # ---- keys ----
+
+    @staticmethod
+    def make_key(model_size: str, backend: str = "openai", compute_type: Optional[str] = None,
+                 device: str = "auto") -> ModelKey:
+        device = _detect_device() if device in (None, "auto") else device
+        if backend == "faster-whisper":
+            compute_type = compute_type or ("float16" if device == "cuda" else "int8")
+        else:
+            compute_type = None  # openai-whisper: precision do device quyết định lúc transcribe
+        return (backend, model_size, compute_type, device)
+
+    @staticmethod
+    def _estimate_memory(key: ModelKey) -> float:
+        backend, model_size, compute_type, _ = key
+        try:
+            from core.whisper_manager import WhisperManager
+            model_info = WhisperManager.MODEL_INFO.get(model_size)
+        except ImportError:
+            model_info = None
+        memory = model_info.vram_requirement if model_info else 2.0
+        return memory / 2 if compute_type == "int8" else memory
+
+    def set_idle_timeout(self, model_size: str, seconds: float):
+        """Idle timeout riêng cho một size (ví dụ large unload sớm hơn tiny)"""
+        self.idle_timeouts[model_size] = seconds
+
+    # ---- loading ----
+
+    def _load_model(self, key: ModelKey):
+        backend, model_size, compute_type, device = key
+        if backend == "faster-whisper":
+            from faster_whisper import WhisperModel
+            return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+        import whisper
+        return whisper.load_model(model_size, device=device)
+
+    def _load(self, key: ModelKey):
+        memory_gb = self._estimate_memory(key)
+        with self._lock:
+            self._make_room(memory_gb)
+        if model_registry:
+            # Budget toàn process (TTS + ASR): registry có thể evict model idle của owner khác
+            model_registry.reserve(memory_gb)
+
+        start_time = time.time()
+        try:
+            model = self._load_model(key)
+        except Exception as e:
+            with self._lock:
+                self._loading.pop(key, None)
+                self.stats["load_failures"] += 1
+            logger.warning(f"[WARNING] Whisper pool failed to load {key[1]} ({key[0]}): {e}")
+            raise
+
+        with self._lock:
+            self._models[key] = PooledModel(key=key, model=model, memory_gb=memory_gb)
+            self._loading.pop(key, None)
+            self.stats["loads"] += 1
+        if model_registry:
+            model_registry.register_model(self._registry_key(key), model, "whisper", memory_gb,
+                                          evictor=lambda: self._evict_for_registry(key),
+                                          load_time=time.time() - start_time)
+        logger.info(f"[OK] Whisper pool loaded {key[1]} ({key[0]}, {key[3]}) in {time.time() - start_time:.1f}s")
+        self._ensure_janitor()
+
+    def _start_load(self, key: ModelKey) -> Future:
+        """Gọi khi đang giữ lock"""
+        future = self._loading.get(key)
+        if future is None:
+            future = self._loader.submit(self._load, key)
+            self._loading[key] = future
+        return future
+
+    def prefetch(self, specs: Iterable[Dict[str, Any]]) -> List[Future]:
+        """Load ở background các model chưa có; spec = kwargs của make_key"""
+        futures = []
+        with self._lock:
+            for spec in specs:
+                key = self.make_key(**spec)
+                if key not in self._models:
+                    futures.append(self._start_load(key))
+        return futures
+
+    def prefetch_from_env(self) -> List[Future]:
+        """VS_WHISPER_PREFETCH: danh sách "size" hoặc "backend:size[:compute_type]", cách nhau bởi dấu phẩy"""
+        specs = []
+        for item in filter(None, (s.strip() for s in os.getenv("VS_WHISPER_PREFETCH", "").split(","))):
+            parts = item.split(":")
+            if len(parts) == 1:
+                specs.append({"model_size": parts[0]})
+            else:
+                specs.append({"backend": parts[0], "model_size": parts[1],
+                              "compute_type": parts[2] if len(parts) > 2 else None})
+        return self.prefetch(specs)
+
+    # ---- acquire / release ----
+
+    def acquire(self, model_size: str, backend: str = "openai", compute_type: Optional[str] = None,
+                device: str = "auto") -> Any:
+        """Lấy model (load nếu cần) và tăng reference count. Raise nếu load lỗi."""
+        key = self.make_key(model_size, backend, compute_type, device)
+        waited = False
+        while True:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.last_used = time.time()
+                    self._models.move_to_end(key)
+                    if not waited:
+                        self.stats["hits"] += 1
+                    return entry.model
+                future = self._start_load(key)
+                waited = True
+            # Load xong nhưng bị evict trước khi kịp lấy -> vòng lại
+            future.result()
+
+    def release(self, model: Any):
+        """Giảm reference count; model ở lại pool tới khi idle timeout hoặc bị evict"""
+        with self._lock:
+            for entry in self._models.values():
+                if entry.model is model:
+                    entry.refs = max(0, entry.refs - 1)
+                    entry.last_used = time.time()
+                    return
+
+    @contextmanager
+    def lease(self, model_size: str, backend: str = "openai", compute_type: Optional[str] = None,
+              device: str = "auto"):
+        model = self.acquire(model_size, backend, compute_type, device)
+        try:
+            yield model
+        finally:
+            self.release(model)
+
+    # ---- eviction ----
+
+    @staticmethod
+    def _registry_key(key: ModelKey) -> str:
+        backend, model_size, compute_type, device = key
+        return f"whisper_{backend}_{model_size}_{compute_type or 'default'}_{device}"
+
+    def _unload(self, key: ModelKey, unregister: bool = True):
+        """Gọi khi đang giữ lock"""
+        entry = self._models.pop(key)
+        if model_registry and unregister:
+            model_registry.unregister_model(self._registry_key(key))
+        del entry.model
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        logger.info(f"[CLEAN] Whisper pool unloaded {key[1]} ({key[0]}, {key[3]})")
+
+    def _evict_for_registry(self, key: ModelKey) -> bool:
+        """Evictor cho ModelRegistry: chỉ nhả model không còn ai giữ"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return True
+            if entry.refs > 0:
+                return False
+            self._unload(key, unregister=False)
+            self.stats["evictions"] += 1
+            return True
+
+    def _make_room(self, needed_gb: float):
+        """Evict model idle theo LRU cho tới khi đủ budget (gọi khi đang giữ lock)"""
+        used = sum(entry.memory_gb for entry in self._models.values())
+        for key in [k for k, entry in self._models.items() if entry.refs == 0]:
+            if used + needed_gb <= self.budget_gb:
+                return
+            used -= self._models[key].memory_gb
+            self._unload(key)
+            self.stats["evictions"] += 1
+        if used + needed_gb > self.budget_gb:
+            logger.warning(f"[WARNING] Whisper pool over budget: {used + needed_gb:.1f}GB > {self.budget_gb:.1f}GB "
+                           f"(all loaded models in use)")
+
+    def unload_idle(self) -> int:
+        """Unload model không còn ai giữ và idle quá timeout của size đó"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, entry in self._models.items()
+                if entry.refs == 0
+                and now - entry.last_used > self.idle_timeouts.get(key[1], self.default_idle_timeout)
+            ]
+            for key in expired:
+                self._unload(key)
+                self.stats["idle_unloads"] += 1
+        return len(expired)
+
+    def _ensure_janitor(self):
+        if self._janitor is not None and self._janitor.is_alive():
+            return
+        self._janitor = threading.Thread(target=self._janitor_loop, name="whisper-pool-janitor", daemon=True)
+        self._janitor.start()
+
+    def _janitor_loop(self):
+        while not self._stop.wait(JANITOR_INTERVAL):
+            try:
+                self.unload_idle()
+            except Exception as e:
+                logger.warning(f"[WARNING] Whisper pool janitor error: {e}")
+
+    def clear(self):
+        """Unload mọi model không còn reference"""
+        with self._lock:
+            for key in [k for k, entry in self._models.items() if entry.refs == 0]:
+                self._unload(key)
+
+    def shutdown(self):
+        self._stop.set()
+        self._loader.shutdown(wait=False)
+        self.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                **self.stats,
+                "budget_gb": self.budget_gb,
+                "used_gb": round(sum(entry.memory_gb for entry in self._models.values()), 2),
+                "loading": [key[1] for key in self._loading],
+                "models": [
+                    {
+                        "backend": key[0],
+                        "model_size": key[1],
+                        "compute_type": key[2],
+                        "device": key[3],
+                        "memory_gb": entry.memory_gb,
+                        "refs": entry.refs,
+                        "idle_seconds": round(now - entry.last_used, 1) if entry.refs == 0 else 0.0,
+                    }
+                    for key, entry in self._models.items()
+                ],
+            }
+
+
+_shared_pool: Optional[WhisperModelPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_whisper_model_pool() -> WhisperModelPool:
+    """Pool dùng chung cho cả process; lần đầu tạo sẽ prefetch model trong VS_WHISPER_PREFETCH"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = WhisperModelPool()
+            _shared_pool.prefetch_from_env()
+        return _shared_pool
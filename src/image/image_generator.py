@@ -130,4 +130,22 @@ class ImageGenerator:
                     "size_mb": round(file_size, 2)
                 }
         except Exception as e:
-            return {"valid": False, "error": f"Error kiểm tra ảnh: {str(e)}"} 
\ No newline at end of file
+            return {"valid": False, "error": f"Error kiểm tra ảnh: {str(e)}"} 
+
+
+class StubImageGenerator(ImageGenerator):
+    """Image provider local cho test/offline: ảnh màu 1920x1080 sinh từ prompt, không gọi API"""
+    
+    def __init__(self):
+        self.client = None
+    
+    def generate_and_save_image(self, prompt, save_path, size="1024x1024"):
+        """Tạo ảnh màu (màu cố định theo prompt) và lưu local"""
+        try:
+            import hashlib
+            digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+            os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+            Image.new("RGB", (1920, 1080), tuple(digest[:3])).save(save_path)
+            return {"success": True, "path": save_path}
+        except Exception as e:
+            return {"success": False, "error": f"Error tạo ảnh stub: {str(e)}"}
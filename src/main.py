@@ -1,7 +1,8 @@
 # main.py
 
-from PySide6.QtWidgets import QApplication
-from ui.advanced_window import AdvancedMainWindow
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QSplashScreen
+from PySide6.QtGui import QPixmap
 import sys
 import os
 
@@ -23,8 +24,20 @@ def main():
     setup_ffmpeg_path()
     
     app = QApplication(sys.argv)
+
+    # Hiện splash ngay, rồi mới import cửa sổ chính (pipeline/TTS/pydub load ở lần dùng đầu tiên)
+    splash_pixmap = QPixmap(480, 160)
+    splash_pixmap.fill(Qt.white)
+    splash = QSplashScreen(splash_pixmap)
+    splash.showMessage("Voice Studio - đang khởi động...", Qt.AlignCenter, Qt.black)
+    splash.show()
+    app.processEvents()
+
+    from ui.advanced_window import AdvancedMainWindow
+
     window = AdvancedMainWindow()
     window.show()
+    splash.finish(window)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
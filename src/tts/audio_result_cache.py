@@ -0,0 +1,155 @@
+"""
+Audio Result Cache
+Content-addressed cache cho kết quả TTS: (text + voice + params + model version) -> audio file
+
+- Key = sha256 của normalized text, hash file giọng tham chiếu, params đã resolve emotion, model version
+- Lưu trên đĩa, giới hạn dung lượng, LRU eviction theo thời điểm truy cập (mtime)
+Request lặp lại chỉ tốn một lần copy file thay vì chạy lại model.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.file_hash import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "voice_studio_output" / ".audio_cache"
+DEFAULT_MAX_BYTES = int(os.getenv("VS_AUDIO_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Chuẩn hóa whitespace để các biến thể khoảng trắng dùng chung cache entry"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class AudioResultCache:
+    """
+    Size-bounded on-disk cache cho audio đã tổng hợp.
+
+    Index (key -> size) giữ trong memory theo thứ tự LRU và được dựng lại từ
+    mtime của các file khi khởi động.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._load_index()
+
+    def _load_index(self):
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        for entry in self.cache_dir.glob("*.audio"):
+            try:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.stem, stat.st_size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def make_key(self, text: str, reference_audio: Optional[str], params: Dict[str, Any],
+                 model_version: str) -> str:
+        """Deterministic key từ mọi input ảnh hưởng tới audio output"""
+        payload = {
+            "text": normalize_text(text),
+            "voice": file_content_hash(reference_audio) if reference_audio else "default",
+            "params": {k: round(v, 3) if isinstance(v, float) else v for k, v in sorted(params.items())},
+            "model": model_version,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.audio"
+
+    def fetch(self, key: str, save_path: str) -> bool:
+        """Copy cached audio ra save_path. Trả về False nếu miss."""
+        with self._lock:
+            if key not in self._index:
+                self.stats["misses"] += 1
+                return False
+            entry = self._entry_path(key)
+            try:
+                save_dir = os.path.dirname(os.path.abspath(save_path))
+                os.makedirs(save_dir, exist_ok=True)
+                shutil.copyfile(entry, save_path)
+                os.utime(entry)  # mtime = last access cho LRU sau restart
+            except OSError as e:
+                logger.warning(f"Audio cache entry {key[:12]} unreadable: {e}")
+                self._total_bytes -= self._index.pop(key)
+                self.stats["misses"] += 1
+                return False
+            self._index.move_to_end(key)
+            self.stats["hits"] += 1
+            return True
+
+    def store(self, key: str, audio_path: str):
+        """Thêm audio vừa sinh vào cache rồi evict LRU cho tới khi dưới max_bytes"""
+        try:
+            size = os.path.getsize(audio_path)
+        except OSError:
+            return
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            tmp_path = None
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Temp file riêng cho mỗi writer: worker farm nhiều process ghi chung cache_dir
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{key[:12]}_", suffix=".tmp", dir=str(self.cache_dir))
+                os.close(fd)
+                shutil.copyfile(audio_path, tmp_path)
+                os.replace(tmp_path, self._entry_path(key))
+            except OSError as e:
+                logger.warning(f"Could not store audio cache entry: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+
+            if key in self._index:
+                self._total_bytes -= self._index[key]
+            self._index[key] = size
+            self._index.move_to_end(key)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and self._index:
+                old_key, old_size = self._index.popitem(last=False)
+                self._total_bytes -= old_size
+                self._entry_path(old_key).unlink(missing_ok=True)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._index)
+            for key in self._index:
+                self._entry_path(key).unlink(missing_ok=True)
+            self._index.clear()
+            self._total_bytes = 0
+            return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._index),
+                "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "cache_dir": str(self.cache_dir),
+            }
@@ -343,6 +343,7 @@ class EnhancedVoiceGenerator:
                         "emotion_exaggeration": req.exaggeration,
                         "speed": req.speed,
                         "cfg_weight": req.cfg_weight,
+                        "temperature": req.temperature,
                         "voice_name": req.voice_id,
                         "inner_voice": req.inner_voice,  # NEW: Include inner voice
                         "inner_voice_type": req.inner_voice_type
@@ -6,6 +6,7 @@ import os
 from typing import Optional, Dict, Any, Generator
 from contextlib import contextmanager
 import functools
+import threading
 import time
 
 try:
@@ -15,6 +16,11 @@ except ImportError:
     CHATTERBOX_AVAILABLE = False
     ChatterboxTTS = None
 
+try:
+    from core.model_registry import model_registry
+except ImportError:
+    model_registry = None
+
 class OptimizedChatterboxProvider:
     """
     Optimized ChatterboxTTS Provider với các cải tiến tốc độ:
@@ -33,6 +39,8 @@ class OptimizedChatterboxProvider:
         self.model: Optional[ChatterboxTTS] = None
         self.voice_cache: Dict[str, Any] = {}
         self.compilation_enabled = False
+        # Giữ trong lúc generate để ModelRegistry không evict model đang chạy
+        self._model_lock = threading.RLock()
         
         print(f"🚀 OptimizedChatterboxProvider initialized:")
         print(f"   📱 Device: {self.device}")
@@ -151,24 +159,14 @@ class OptimizedChatterboxProvider:
             return False
         
         try:
-            print("🔄 Loading ChatterboxTTS model...")
-            self.model = ChatterboxTTS.from_pretrained(device=self.device)
-            
-            # Apply optimizations
-            self.model = self._optimize_model_precision(self.model)
-            
-            # Setup compilation if enabled
-            if self.use_compilation:
-                self._setup_compilation(self.model)
-            
-            # Move to CPU for offloading
-            if self.cpu_offload:
-                print("📥 Moving model to CPU for offloading...")
-                self.model.ve.to(device="cpu")
-                self.model.t3.to(device="cpu") 
-                self.model.s3gen.to(device="cpu")
-                if self.model.conds:
-                    self.model.conds.to("cpu")
+            with self._model_lock:
+                # Qua ModelRegistry: reserve memory budget trước khi load, evictable khi idle
+                if model_registry:
+                    self.model = model_registry.acquire(
+                        self._registry_key(), self._load_optimized_model, "chatterbox", evictor=self._evict_model
+                    )
+                else:
+                    self.model = self._load_optimized_model()
             
             print("✅ OptimizedChatterboxTTS loaded successfully!")
             return True
@@ -177,6 +175,44 @@ class OptimizedChatterboxProvider:
             print(f"❌ Failed to load ChatterboxTTS: {e}")
             return False
     
+    def _load_optimized_model(self) -> ChatterboxTTS:
+        print("🔄 Loading ChatterboxTTS model...")
+        model = ChatterboxTTS.from_pretrained(device=self.device)
+        
+        # Apply optimizations
+        model = self._optimize_model_precision(model)
+        
+        # Setup compilation if enabled
+        if self.use_compilation:
+            self._setup_compilation(model)
+        
+        # Move to CPU for offloading
+        if self.cpu_offload:
+            print("📥 Moving model to CPU for offloading...")
+            model.ve.to(device="cpu")
+            model.t3.to(device="cpu") 
+            model.s3gen.to(device="cpu")
+            if model.conds:
+                model.conds.to("cpu")
+        
+        return model
+    
+    def _registry_key(self) -> str:
+        return f"chatterbox_optimized_{self.device}_{self.dtype}_{'compiled' if self.use_compilation else 'eager'}"
+    
+    def _evict_model(self) -> bool:
+        """Evictor cho ModelRegistry: nhả model nếu không đang generate, load lại lazily lần sau"""
+        if not self._model_lock.acquire(blocking=False):
+            return False
+        try:
+            self.model = None
+            self.voice_cache.clear()
+            self.compilation_enabled = False
+            print("📤 OptimizedChatterboxTTS evicted to stay within memory budget")
+            return True
+        finally:
+            self._model_lock.release()
+    
     def prepare_voice_conditionals(self, voice_path: str, exaggeration: float = 0.5) -> str:
         """Prepare và cache voice conditionals"""
         cache_key = f"{voice_path}_{exaggeration}"
@@ -227,7 +263,43 @@ class OptimizedChatterboxProvider:
         """
         Generate audio với optimizations
         """
-        if not self.model:
+        try:
+            if chunked:
+                # Split text into chunks for large texts
+                from tts_webui.utils.split_text_functions import split_and_recombine_text
+                texts = split_and_recombine_text(text, chunk_size, chunk_size + 100)
+            else:
+                texts = [text]
+            
+            for i, chunk_text in enumerate(texts):
+                print(f"🎤 Generating chunk {i+1}/{len(texts)}: {chunk_text[:50]}...")
+                
+                # Lock theo từng chunk, không giữ qua yield: registry chỉ evict được giữa các chunk
+                with self._model_lock:
+                    audio_np = self._generate_chunk(
+                        chunk_text, voice_path, exaggeration, cfg_weight, temperature, max_new_tokens
+                    )
+                
+                if streaming:
+                    yield audio_np
+                else:
+                    # For non-streaming, collect all chunks
+                    if i == 0:
+                        full_audio = audio_np
+                    else:
+                        full_audio = np.concatenate([full_audio, audio_np])
+            
+            if not streaming:
+                yield full_audio
+                
+        except Exception as e:
+            print(f"❌ Generation failed: {e}")
+            raise
+    
+    def _generate_chunk(self, chunk_text: str, voice_path: str, exaggeration: float, cfg_weight: float,
+                        temperature: float, max_new_tokens: int) -> np.ndarray:
+        """Generate một chunk - gọi khi đang giữ _model_lock, load lại model nếu đã bị evict"""
+        if not self.model and not self.load_model():
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
         # Prepare voice conditionals (with caching)
@@ -237,53 +309,27 @@ class OptimizedChatterboxProvider:
         
         with self._cpu_offload_context(self.model):
             with torch.no_grad():
-                try:
-                    if chunked:
-                        # Split text into chunks for large texts
-                        from tts_webui.utils.split_text_functions import split_and_recombine_text
-                        texts = split_and_recombine_text(text, chunk_size, chunk_size + 100)
-                    else:
-                        texts = [text]
-                    
-                    for i, chunk_text in enumerate(texts):
-                        print(f"🎤 Generating chunk {i+1}/{len(texts)}: {chunk_text[:50]}...")
-                        
-                        # Restore cached conditionals for each chunk
-                        self.restore_cached_conditionals(cache_key)
-                        
-                        # Generate audio for chunk
-                        start_time = time.time()
-                        wav = self.model.generate(
-                            chunk_text,
-                            exaggeration=exaggeration,
-                            cfg_weight=cfg_weight,
-                            temperature=temperature,
-                            max_new_tokens=max_new_tokens
-                        )
-                        generation_time = time.time() - start_time
-                        
-                        # Convert to numpy
-                        audio_np = wav.squeeze().cpu().numpy()
-                        audio_duration = len(audio_np) / self.model.sr
-                        
-                        print(f"✅ Chunk generated: {generation_time:.2f}s for {audio_duration:.2f}s audio")
-                        print(f"   🚀 Real-time factor: {audio_duration/generation_time:.2f}x")
-                        
-                        if streaming:
-                            yield audio_np
-                        else:
-                            # For non-streaming, collect all chunks
-                            if i == 0:
-                                full_audio = audio_np
-                            else:
-                                full_audio = np.concatenate([full_audio, audio_np])
-                    
-                    if not streaming:
-                        yield full_audio
-                        
-                except Exception as e:
-                    print(f"❌ Generation failed: {e}")
-                    raise
+                # Restore cached conditionals for each chunk
+                self.restore_cached_conditionals(cache_key)
+                
+                # Generate audio for chunk
+                start_time = time.time()
+                wav = self.model.generate(
+                    chunk_text,
+                    exaggeration=exaggeration,
+                    cfg_weight=cfg_weight,
+                    temperature=temperature,
+                    max_new_tokens=max_new_tokens
+                )
+                generation_time = time.time() - start_time
+                
+                # Convert to numpy
+                audio_np = wav.squeeze().cpu().numpy()
+                audio_duration = len(audio_np) / self.model.sr
+                
+                print(f"✅ Chunk generated: {generation_time:.2f}s for {audio_duration:.2f}s audio")
+                print(f"   🚀 Real-time factor: {audio_duration/generation_time:.2f}x")
+                return audio_np
     
     def generate(
         self,
@@ -300,62 +346,64 @@ class OptimizedChatterboxProvider:
         """
         Main generation method với optimizations
         """
-        if not self.model:
-            if not self.load_model():
-                return None
-        
-        try:
-            # Convert emotion to exaggeration value
-            emotion_map = {
-                "neutral": 0.5,
-                "happy": 0.7,
-                "sad": 0.3,
-                "angry": 0.9,
-                "excited": 0.8,
-                "calm": 0.2,
-                "dramatic": 1.2,
-                "whisper": 0.1
-            }
-            mapped_exaggeration = emotion_map.get(emotion, exaggeration)
-            
-            with self._cpu_offload_context(self.model):
-                with torch.no_grad():
-                    start_time = time.time()
-                    
-                    # Generate audio
-                    wav = self.model.generate(
-                        text,
-                        audio_prompt_path=voice_path,
-                        exaggeration=mapped_exaggeration,
-                        cfg_weight=cfg_weight,
-                        temperature=temperature
-                    )
-                    
-                    generation_time = time.time() - start_time
-                    
-                    # Convert to numpy
-                    audio_np = wav.squeeze().cpu().numpy()
-                    audio_duration = len(audio_np) / self.model.sr
-                    
-                    print(f"✅ Generated: {generation_time:.2f}s for {audio_duration:.2f}s audio")
-                    print(f"   🚀 Real-time factor: {audio_duration/generation_time:.2f}x")
-                    
-                    # Save audio
-                    if output_path:
-                        import soundfile as sf
-                        sf.write(output_path, audio_np, self.model.sr)
-                        print(f"💾 Audio saved: {output_path}")
-                        return output_path
-                    else:
-                        # Save to temp file
-                        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+        # Giữ lock suốt lần generate để ModelRegistry không evict model giữa chừng
+        with self._model_lock:
+            if not self.model:
+                if not self.load_model():
+                    return None
+                
+            try:
+                # Convert emotion to exaggeration value
+                emotion_map = {
+                    "neutral": 0.5,
+                    "happy": 0.7,
+                    "sad": 0.3,
+                    "angry": 0.9,
+                    "excited": 0.8,
+                    "calm": 0.2,
+                    "dramatic": 1.2,
+                    "whisper": 0.1
+                }
+                mapped_exaggeration = emotion_map.get(emotion, exaggeration)
+                
+                with self._cpu_offload_context(self.model):
+                    with torch.no_grad():
+                        start_time = time.time()
+                        
+                        # Generate audio
+                        wav = self.model.generate(
+                            text,
+                            audio_prompt_path=voice_path,
+                            exaggeration=mapped_exaggeration,
+                            cfg_weight=cfg_weight,
+                            temperature=temperature
+                        )
+                        
+                        generation_time = time.time() - start_time
+                        
+                        # Convert to numpy
+                        audio_np = wav.squeeze().cpu().numpy()
+                        audio_duration = len(audio_np) / self.model.sr
+                        
+                        print(f"✅ Generated: {generation_time:.2f}s for {audio_duration:.2f}s audio")
+                        print(f"   🚀 Real-time factor: {audio_duration/generation_time:.2f}x")
+                        
+                        # Save audio
+                        if output_path:
                             import soundfile as sf
-                            sf.write(tmp.name, audio_np, self.model.sr)
-                            return tmp.name
-                            
-        except Exception as e:
-            print(f"❌ OptimizedChatterbox generation failed: {e}")
-            return None
+                            sf.write(output_path, audio_np, self.model.sr)
+                            print(f"💾 Audio saved: {output_path}")
+                            return output_path
+                        else:
+                            # Save to temp file
+                            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+                                import soundfile as sf
+                                sf.write(tmp.name, audio_np, self.model.sr)
+                                return tmp.name
+                                
+            except Exception as e:
+                print(f"❌ OptimizedChatterbox generation failed: {e}")
+                return None
     
     def clear_cache(self):
         """Clear voice cache"""
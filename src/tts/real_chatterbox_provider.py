@@ -13,19 +13,29 @@ import threading
 import platform
 import warnings
 
+from .voice_conditionals_cache import VoiceConditionalsCache
+from .audio_result_cache import AudioResultCache
+from .voice_catalog import get_voice_catalog
+
+try:
+    from core.model_registry import model_registry
+except ImportError:
+    model_registry = None
+
+from core.lazy_imports import lazy_import, module_available
+from core.emotion_parameter_table import EmotionParameterTable
+
 # Suppress common warnings for cleaner output
 warnings.filterwarnings("ignore", category=UserWarning, message=".*pkg_resources.*")
 warnings.filterwarnings("ignore", category=FutureWarning, message=".*LoRACompatibleLinear.*")
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="pkg_resources")
 
-# Safe imports với fallbacks
-try:
-    import torch
-    import torchaudio  # Required by ChatterboxTTS
-    TORCH_AVAILABLE = True
-except ImportError as e:
-    TORCH_AVAILABLE = False
-    print(f"WARNING: PyTorch/torchaudio not available: {e}")
+# Safe imports với fallbacks - torch chỉ import thật khi dùng lần đầu (startup nhanh)
+TORCH_AVAILABLE = module_available("torch", "torchaudio")  # torchaudio required by ChatterboxTTS
+if TORCH_AVAILABLE:
+    torch = lazy_import("torch")
+else:
+    print("WARNING: PyTorch/torchaudio not available")
     print("   Install with: pip install torch torchaudio")
 
 # macOS Detection
@@ -33,6 +43,68 @@ IS_MACOS = platform.system() == "Darwin"
 if IS_MACOS:
     print("macOS detected - will use CPU mode or demo fallback")
 
+# Enhanced emotion mapping table (matches backend implementation)
+CHATTERBOX_EMOTION_MAPPING = {
+    # Neutral - Objective narration
+    'neutral': {'exaggeration': 0.5, 'cfg_weight': 0.5},
+    'calm': {'exaggeration': 0.5, 'cfg_weight': 0.5},
+    'normal': {'exaggeration': 0.5, 'cfg_weight': 0.5},
+    
+    # Gentle/Contemplative - Deep inner thoughts
+    'gentle': {'exaggeration': 0.35, 'cfg_weight': 0.35},
+    'contemplative': {'exaggeration': 0.4, 'cfg_weight': 0.4},
+    'soft': {'exaggeration': 0.3, 'cfg_weight': 0.3},
+    'whisper': {'exaggeration': 0.3, 'cfg_weight': 0.3},
+    
+    # Happy/Cheerful - Positive emotions
+    'happy': {'exaggeration': 1.35, 'cfg_weight': 0.55},
+    'cheerful': {'exaggeration': 1.2, 'cfg_weight': 0.5},
+    'joyful': {'exaggeration': 1.5, 'cfg_weight': 0.6},
+    'friendly': {'exaggeration': 1.2, 'cfg_weight': 0.5},
+    
+    # Surprised - Shock, amazement
+    'surprised': {'exaggeration': 1.85, 'cfg_weight': 0.55},
+    'shocked': {'exaggeration': 2.0, 'cfg_weight': 0.6},
+    'amazed': {'exaggeration': 1.7, 'cfg_weight': 0.5},
+    
+    # Sad/Hurt - Heavy emotions
+    'sad': {'exaggeration': 0.4, 'cfg_weight': 0.35},
+    'hurt': {'exaggeration': 0.3, 'cfg_weight': 0.3},
+    'disappointed': {'exaggeration': 0.5, 'cfg_weight': 0.4},
+    'melancholy': {'exaggeration': 0.3, 'cfg_weight': 0.3},
+    
+    # Angry/Furious - Intense emotions
+    'angry': {'exaggeration': 2.0, 'cfg_weight': 0.7},
+    'furious': {'exaggeration': 2.2, 'cfg_weight': 0.8},
+    'irritated': {'exaggeration': 1.8, 'cfg_weight': 0.6},
+    'frustrated': {'exaggeration': 1.8, 'cfg_weight': 0.6},
+    
+    # Anxious/Worried - Tension
+    'anxious': {'exaggeration': 1.4, 'cfg_weight': 0.55},
+    'worried': {'exaggeration': 1.3, 'cfg_weight': 0.5},
+    'nervous': {'exaggeration': 1.5, 'cfg_weight': 0.6},
+    
+    # Mysterious - Suspense
+    'mysterious': {'exaggeration': 1.4, 'cfg_weight': 0.45},
+    'suspenseful': {'exaggeration': 1.2, 'cfg_weight': 0.4},
+    
+    # Commanding - Authority
+    'commanding': {'exaggeration': 1.75, 'cfg_weight': 0.8},
+    'authoritative': {'exaggeration': 2.0, 'cfg_weight': 0.9},
+    
+    # Additional common emotions
+    'excited': {'exaggeration': 1.6, 'cfg_weight': 0.6},
+    'fearful': {'exaggeration': 1.4, 'cfg_weight': 0.5},
+    'confident': {'exaggeration': 1.5, 'cfg_weight': 0.6},
+    'shy': {'exaggeration': 0.6, 'cfg_weight': 0.4},
+    'dramatic': {'exaggeration': 1.2, 'cfg_weight': 0.6},
+}
+
+# Compile một lần lúc import; emotion không có trong bảng -> exaggeration 1.0, cfg 0.5
+CHATTERBOX_EMOTION_TABLE = EmotionParameterTable(
+    CHATTERBOX_EMOTION_MAPPING, default_emotion="default", defaults={"exaggeration": 1.0, "cfg_weight": 0.5}
+)
+
 # Conditional import with proper error handling for cross-platform compatibility
 ChatterboxTTS = None
 CHATTERBOX_AVAILABLE = False
@@ -144,7 +216,9 @@ class RealChatterboxProvider:
         self.available = False  # Will be set based on actual capabilities
         self.chatterbox_model = None
         self.demo_mode = False
-        self.voice_embedding_cache = {}
+        self.voice_embedding_cache = VoiceConditionalsCache()
+        self.audio_result_cache = AudioResultCache()
+        self.model_version = "chatterbox-unknown"
         
         # Always initialize as available for macOS compatibility
         self.available = True
@@ -221,7 +295,15 @@ class RealChatterboxProvider:
                 warnings.simplefilter("ignore")
             
             # TRY REAL CHATTERBOX ON ALL DEVICES (including macOS CPU)
-            self.chatterbox_model = ChatterboxTTS.from_pretrained(device=self.device)
+            # Qua ModelRegistry: reserve memory budget (evict model idle khác, ví dụ Whisper) trước khi load.
+            # Model TTS chính của server -> pinned, không đăng ký evictor.
+            if model_registry:
+                self.chatterbox_model = model_registry.acquire(
+                    self._registry_key(), lambda: ChatterboxTTS.from_pretrained(device=self.device), "chatterbox"
+                )
+            else:
+                self.chatterbox_model = ChatterboxTTS.from_pretrained(device=self.device)
+            self.model_version = self._detect_model_version()
             
             print(f"Real Chatterbox TTS ready on {self.device_name}")
             print("Real voice cloning available!")
@@ -244,6 +326,18 @@ class RealChatterboxProvider:
             self.available = True
             return True
     
+    def _registry_key(self) -> str:
+        return f"chatterbox_real_{self.device}"
+    
+    @staticmethod
+    def _detect_model_version() -> str:
+        """Version stamp cho audio result cache - đổi package version thì cache tự invalid"""
+        try:
+            from importlib.metadata import version
+            return f"chatterbox-{version('chatterbox-tts')}"
+        except Exception:
+            return "chatterbox-local"
+    
     def get_device_info(self) -> Dict[str, Any]:
         """Lấy thông tin device hiện tại"""
         info = {
@@ -275,67 +369,114 @@ class RealChatterboxProvider:
     def generate_voice_batch(self, batch_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Generate a batch of TTS audio files using Real Chatterbox.
-        This is highly efficient on GPU.
+
+        Requests được nhóm theo (reference voice, quantized exaggeration/cfg/temperature):
+        conditionals chỉ chuẩn bị một lần cho mỗi nhóm, các dòng trong nhóm generate lần lượt.
+        Kết quả trả về đúng thứ tự của batch_requests.
         """
         if not self.is_initialized or self.demo_mode:
             # Fallback to generating one by one if not in real mode or not initialized
             print("Batch processing unavailable, falling back to sequential generation.")
-            results = []
-            for req in batch_requests:
-                result = self.generate_voice(**req)
-                results.append(result)
-            return results
+            return [self.generate_voice(**req) for req in batch_requests]
 
         print(f"[HOT] Generating batch of {len(batch_requests)} audio files with REAL Chatterbox TTS...")
-        
-        try:
-            # Prepare data for the model
-            texts = [req['text'] for req in batch_requests]
-            
-            # --- Core Batch Generation ---
-            # Assuming the model's generate method can handle a list of texts
-            wavs = self.chatterbox_model.generate(texts)
-            # -----------------------------
 
-            if wavs is None or len(wavs) != len(texts):
-                raise RuntimeError("Batch generation did not return the expected number of waveforms.")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch_requests)
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
 
-            results = []
-            for i, req in enumerate(batch_requests):
-                try:
-                    wav = wavs[i]
-                    save_path = req['save_path']
-                    
-                    import torchaudio as ta
-                    save_dir = os.path.dirname(save_path)
-                    if save_dir:
-                        os.makedirs(save_dir, exist_ok=True)
-                    
-                    ta.save(save_path, wav, self.chatterbox_model.sr)
-                    
-                    results.append({
-                        "success": True,
-                        "audio_path": save_path,
-                        "duration": wav.shape[-1] / self.chatterbox_model.sr
-                    })
-                except Exception as e:
-                    print(f"Error saving file for segment {i}: {e}")
-                    results.append({"success": False, "error": str(e)})
-            
-            print(f"[OK] Batch generation complete. {sum(1 for r in results if r['success'])}/{len(results)} files created.")
-            return results
+        for index, req in enumerate(batch_requests):
+            try:
+                item = self._prepare_batch_item(index, req)
+            except Exception as e:
+                results[index] = {"success": False, "error": str(e)}
+                continue
+            groups.setdefault(item["group_key"], []).append(item)
+
+        print(f"   Grouped into {len(groups)} voice/parameter groups")
 
+        for group_items in groups.values():
+            self._run_batch_group(group_items, batch_requests, results)
+
+        print(f"[OK] Batch generation complete. {sum(1 for r in results if r and r.get('success'))}/{len(results)} files created.")
+        return results
+
+    def _prepare_batch_item(self, index: int, req: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve voice + emotion parameters cho một request trong batch"""
+        exaggeration, cfg_weight, temperature, _ = self._resolve_generation_parameters(
+            emotion=req.get("emotion", "neutral"),
+            emotion_exaggeration=req.get("emotion_exaggeration", 1.0),
+            cfg_weight=req.get("cfg_weight", 0.5),
+            temperature=req.get("temperature", 0.7),
+            speed=req.get("speed", 1.0),
+        )
+
+        text = req["text"]
+        if req.get("inner_voice") and req.get("inner_voice_type"):
+            text = self._apply_inner_voice_effects(text, req["inner_voice_type"])
+
+        voice_sample_path = req.get("voice_sample_path")
+        if voice_sample_path and os.path.exists(voice_sample_path):
+            reference_audio = voice_sample_path
+        else:
+            reference_audio = self._resolve_voice_selection(req.get("voice_name")).get("file_path")
+
+        return {
+            "index": index,
+            "text": text,
+            "save_path": req["save_path"],
+            "reference_audio": reference_audio,
+            "exaggeration": exaggeration,
+            "cfg_weight": cfg_weight,
+            "temperature": temperature,
+            "group_key": (reference_audio, round(exaggeration, 2), round(cfg_weight, 2), round(temperature, 2)),
+        }
+
+    def _run_batch_group(self, items: List[Dict[str, Any]], batch_requests: List[Dict[str, Any]],
+                         results: List[Optional[Dict[str, Any]]]):
+        """Generate một nhóm cùng voice/params trên conditionals dùng chung, scatter kết quả về đúng index"""
+        head = items[0]
+        gen_kwargs = {
+            "exaggeration": head["exaggeration"],
+            "cfg_weight": head["cfg_weight"],
+            "temperature": head["temperature"],
+        }
+
+        try:
+            if head["reference_audio"]:
+                self.chatterbox_model.conds = self.voice_embedding_cache.get_or_prepare(
+                    self.chatterbox_model, head["reference_audio"], head["exaggeration"]
+                )
         except Exception as e:
-            print(f"[EMOJI] ERROR: Real ChatterboxTTS batch generation failed: {e}")
+            print(f"[EMOJI] ERROR: Preparing conditionals for a group of {len(items)} failed: {e}")
             logger.error(traceback.format_exc())
-            # Fallback to individual generation on batch failure
-            print("Batch generation failed. Falling back to sequential generation.")
-            results = []
-            for req in batch_requests:
-                result = self.generate_voice(**req)
-                results.append(result)
-            return results
-        
+            for item in items:
+                results[item["index"]] = self.generate_voice(**batch_requests[item["index"]])
+            return
+
+        import torchaudio as ta
+        for item in items:
+            try:
+                with torch.inference_mode():
+                    wav = self.chatterbox_model.generate(item["text"], **gen_kwargs)
+
+                save_path = item["save_path"]
+                save_dir = os.path.dirname(save_path)
+                if save_dir:
+                    os.makedirs(save_dir, exist_ok=True)
+
+                ta.save(save_path, wav, self.chatterbox_model.sr)
+
+                results[item["index"]] = {
+                    "success": True,
+                    "audio_path": save_path,
+                    "duration": wav.shape[-1] / self.chatterbox_model.sr
+                }
+            except Exception as e:
+                # Chỉ chạy lại dòng lỗi qua đường generate_voice thông thường
+                print(f"[EMOJI] ERROR: Batch segment {item['index']} failed: {e}")
+                logger.error(traceback.format_exc())
+                results[item["index"]] = self.generate_voice(**batch_requests[item["index"]])
+
     def generate_voice(self, 
                       text: str, 
                       save_path: str, 
@@ -348,7 +489,8 @@ class RealChatterboxProvider:
                       temperature: float = 0.7,  # NEW: Temperature parameter
                       voice_prompt: Optional[str] = None,
                       inner_voice: bool = False,  # NEW: Inner voice support
-                      inner_voice_type: Optional[str] = None) -> Dict[str, Any]:
+                      inner_voice_type: Optional[str] = None,
+                      use_cache: bool = True) -> Dict[str, Any]:
         """
         Generate TTS audio - Real Chatterbox on CUDA, Demo on macOS/CPU
         
@@ -365,39 +507,15 @@ class RealChatterboxProvider:
             voice_prompt: Text prompt to describe desired voice characteristics
             inner_voice: Enable inner voice effects
             inner_voice_type: Type of inner voice (light, deep, dreamy)
+            use_cache: Reuse audio from the result cache for identical requests
         """
-        if not self.is_initialized:
+        if not self.is_initialized and not self._reload_released_model():
             return {"success": False, "error": "Provider not initialized"}
         
         try:
-            # Apply emotion-to-parameter mapping if emotion provided
-            if emotion and emotion != "neutral":
-                mapped_exaggeration, mapped_cfg = self._map_emotion_to_parameters(emotion, emotion_exaggeration)
-                print(f"   [THEATER] Emotion mapping: '{emotion}' -> exag={mapped_exaggeration:.2f}, cfg={mapped_cfg:.2f}")
-                
-                # Check if user has customized parameters (different from defaults)
-                # If exaggeration is close to 1.0 (neutral) or exactly the mapped value, use mapping
-                # Otherwise, assume user has customized and keep their values
-                user_customized_exag = abs(emotion_exaggeration - 1.0) > 0.05 and abs(emotion_exaggeration - mapped_exaggeration) > 0.05
-                user_customized_cfg = abs(cfg_weight - 0.6) > 0.05 and abs(cfg_weight - mapped_cfg) > 0.05
-                
-                if not user_customized_exag:
-                    emotion_exaggeration = mapped_exaggeration
-                    print(f"   [AUTO] Using mapped exaggeration: {mapped_exaggeration:.2f}")
-                else:
-                    print(f"   [USER] Keeping user exaggeration: {emotion_exaggeration:.2f} (customized)")
-                    
-                if not user_customized_cfg:
-                    cfg_weight = mapped_cfg  
-                    print(f"   [AUTO] Using mapped cfg_weight: {mapped_cfg:.2f}")
-                else:
-                    print(f"   [USER] Keeping user cfg_weight: {cfg_weight:.2f} (customized)")
-            
-            # Validate parameters
-            emotion_exaggeration = max(0.0, min(2.0, emotion_exaggeration))
-            speed = max(0.5, min(2.0, speed))
-            cfg_weight = max(0.0, min(1.0, cfg_weight))
-            temperature = max(0.1, min(1.5, temperature))
+            emotion_exaggeration, cfg_weight, temperature, speed = self._resolve_generation_parameters(
+                emotion, emotion_exaggeration, cfg_weight, temperature, speed
+            )
             
             # Apply inner voice effects if enabled
             if inner_voice and inner_voice_type:
@@ -448,6 +566,24 @@ class RealChatterboxProvider:
                     reference_audio = selected_voice['file_path']
                     print(f"   Voice cloning: {os.path.basename(reference_audio)} (Predefined voice)")
                 
+                # Result cache: cùng text + voice + params + model -> trả lại audio cũ
+                cache_key = None
+                if use_cache:
+                    cache_key = self.audio_result_cache.make_key(
+                        text, reference_audio,
+                        {
+                            "exaggeration": emotion_exaggeration,
+                            "cfg_weight": cfg_weight,
+                            "temperature": temperature,
+                            "speed": speed,
+                            "format": os.path.splitext(save_path)[1].lower(),
+                        },
+                        self.model_version
+                    )
+                    if self.audio_result_cache.fetch(cache_key, save_path):
+                        print(f"   [CACHE] Reused cached audio -> {save_path}")
+                        return {"success": True, "audio_path": save_path, "cached": True}
+                
                 # Generate real audio
                 success = self._generate_real_chatterbox_audio(
                     text=text,
@@ -461,6 +597,8 @@ class RealChatterboxProvider:
                 )
                 
                 if success:
+                    if cache_key:
+                        self.audio_result_cache.store(cache_key, save_path)
                     return {"success": True, "audio_path": save_path}
                 else:
                     # Fallback to demo
@@ -495,6 +633,40 @@ class RealChatterboxProvider:
             print("WARNING: Generation failed, creating demo file...")
             return self._generate_demo_audio(text, save_path, voice_name, emotion, emotion_exaggeration, speed, cfg_weight, temperature, voice_prompt)
     
+    def _resolve_generation_parameters(self, emotion: str, emotion_exaggeration: float, cfg_weight: float,
+                                       temperature: float, speed: float) -> tuple[float, float, float, float]:
+        """Apply emotion mapping (trừ khi user đã tùy chỉnh) rồi clamp về range hợp lệ"""
+        # Apply emotion-to-parameter mapping if emotion provided
+        if emotion and emotion != "neutral":
+            mapped_exaggeration, mapped_cfg = self._map_emotion_to_parameters(emotion, emotion_exaggeration)
+            print(f"   [THEATER] Emotion mapping: '{emotion}' -> exag={mapped_exaggeration:.2f}, cfg={mapped_cfg:.2f}")
+            
+            # Check if user has customized parameters (different from defaults)
+            # If exaggeration is close to 1.0 (neutral) or exactly the mapped value, use mapping
+            # Otherwise, assume user has customized and keep their values
+            user_customized_exag = abs(emotion_exaggeration - 1.0) > 0.05 and abs(emotion_exaggeration - mapped_exaggeration) > 0.05
+            user_customized_cfg = abs(cfg_weight - 0.6) > 0.05 and abs(cfg_weight - mapped_cfg) > 0.05
+            
+            if not user_customized_exag:
+                emotion_exaggeration = mapped_exaggeration
+                print(f"   [AUTO] Using mapped exaggeration: {mapped_exaggeration:.2f}")
+            else:
+                print(f"   [USER] Keeping user exaggeration: {emotion_exaggeration:.2f} (customized)")
+                
+            if not user_customized_cfg:
+                cfg_weight = mapped_cfg  
+                print(f"   [AUTO] Using mapped cfg_weight: {mapped_cfg:.2f}")
+            else:
+                print(f"   [USER] Keeping user cfg_weight: {cfg_weight:.2f} (customized)")
+        
+        # Validate parameters
+        emotion_exaggeration = max(0.0, min(2.0, emotion_exaggeration))
+        speed = max(0.5, min(2.0, speed))
+        cfg_weight = max(0.0, min(1.0, cfg_weight))
+        temperature = max(0.1, min(1.5, temperature))
+        
+        return emotion_exaggeration, cfg_weight, temperature, speed
+    
     def _generate_demo_audio(self, text: str, save_path: str, voice_name: Optional[str] = None,
                            emotion: str = "neutral", emotion_exaggeration: float = 1.0, speed: float = 1.0, 
                            cfg_weight: float = 0.5, temperature: float = 0.7, voice_prompt: Optional[str] = None) -> Dict[str, Any]:
@@ -583,77 +755,9 @@ class RealChatterboxProvider:
             return {"success": False, "error": f"Demo generation failed: {str(e)}"}
     
     def _map_emotion_to_parameters(self, emotion_label: str, base_exaggeration: float = 1.0) -> tuple[float, float]:
-        """Map emotion label to optimized ChatterboxTTS parameters"""
-        
-        # Enhanced emotion mapping table (matches backend implementation)
-        emotion_mapping = {
-            # Neutral - Objective narration
-            'neutral': {'exaggeration': 0.5, 'cfg_weight': 0.5},
-            'calm': {'exaggeration': 0.5, 'cfg_weight': 0.5},
-            'normal': {'exaggeration': 0.5, 'cfg_weight': 0.5},
-            
-            # Gentle/Contemplative - Deep inner thoughts
-            'gentle': {'exaggeration': 0.35, 'cfg_weight': 0.35},
-            'contemplative': {'exaggeration': 0.4, 'cfg_weight': 0.4},
-            'soft': {'exaggeration': 0.3, 'cfg_weight': 0.3},
-            'whisper': {'exaggeration': 0.3, 'cfg_weight': 0.3},
-            
-            # Happy/Cheerful - Positive emotions
-            'happy': {'exaggeration': 1.35, 'cfg_weight': 0.55},
-            'cheerful': {'exaggeration': 1.2, 'cfg_weight': 0.5},
-            'joyful': {'exaggeration': 1.5, 'cfg_weight': 0.6},
-            'friendly': {'exaggeration': 1.2, 'cfg_weight': 0.5},
-            
-            # Surprised - Shock, amazement
-            'surprised': {'exaggeration': 1.85, 'cfg_weight': 0.55},
-            'shocked': {'exaggeration': 2.0, 'cfg_weight': 0.6},
-            'amazed': {'exaggeration': 1.7, 'cfg_weight': 0.5},
-            
-            # Sad/Hurt - Heavy emotions
-            'sad': {'exaggeration': 0.4, 'cfg_weight': 0.35},
-            'hurt': {'exaggeration': 0.3, 'cfg_weight': 0.3},
-            'disappointed': {'exaggeration': 0.5, 'cfg_weight': 0.4},
-            'melancholy': {'exaggeration': 0.3, 'cfg_weight': 0.3},
-            
-            # Angry/Furious - Intense emotions
-            'angry': {'exaggeration': 2.0, 'cfg_weight': 0.7},
-            'furious': {'exaggeration': 2.2, 'cfg_weight': 0.8},
-            'irritated': {'exaggeration': 1.8, 'cfg_weight': 0.6},
-            'frustrated': {'exaggeration': 1.8, 'cfg_weight': 0.6},
-            
-            # Anxious/Worried - Tension
-            'anxious': {'exaggeration': 1.4, 'cfg_weight': 0.55},
-            'worried': {'exaggeration': 1.3, 'cfg_weight': 0.5},
-            'nervous': {'exaggeration': 1.5, 'cfg_weight': 0.6},
-            
-            # Mysterious - Suspense
-            'mysterious': {'exaggeration': 1.4, 'cfg_weight': 0.45},
-            'suspenseful': {'exaggeration': 1.2, 'cfg_weight': 0.4},
-            
-            # Commanding - Authority
-            'commanding': {'exaggeration': 1.75, 'cfg_weight': 0.8},
-            'authoritative': {'exaggeration': 2.0, 'cfg_weight': 0.9},
-            
-            # Additional common emotions
-            'excited': {'exaggeration': 1.6, 'cfg_weight': 0.6},
-            'fearful': {'exaggeration': 1.4, 'cfg_weight': 0.5},
-            'confident': {'exaggeration': 1.5, 'cfg_weight': 0.6},
-            'shy': {'exaggeration': 0.6, 'cfg_weight': 0.4},
-            'dramatic': {'exaggeration': 1.2, 'cfg_weight': 0.6},
-        }
-        
-        # Get mapping or use defaults
-        mapping = emotion_mapping.get(emotion_label.lower(), {'exaggeration': 1.0, 'cfg_weight': 0.5})
-        
-        # Apply mapping values
-        final_exaggeration = mapping['exaggeration']
-        cfg_weight = mapping['cfg_weight']
-        
-        # Clamp to valid ranges
-        final_exaggeration = max(0.0, min(2.5, final_exaggeration))
-        cfg_weight = max(0.0, min(1.0, cfg_weight))
-        
-        return final_exaggeration, cfg_weight
+        """Map emotion label to optimized ChatterboxTTS parameters (bảng compile sẵn, đã clamp)"""
+        record = CHATTERBOX_EMOTION_TABLE.resolve(emotion_label)
+        return record.exaggeration, record.cfg_weight
     
     def _apply_inner_voice_effects(self, text: str, inner_voice_type: str) -> str:
         """Apply inner voice text effects based on type"""
@@ -673,121 +777,91 @@ class RealChatterboxProvider:
     def _resolve_voice_selection(self, voice_name: Optional[str]) -> Dict[str, str]:
         """
         Resolve voice selection from voice_name parameter
-        Returns voice info including file path for voice cloning
+        Returns voice info including file path for voice cloning (lookup trong VoiceCatalog, không scan thư mục)
         """
-        available_voices = self.get_available_voices()
-        
-        # Loại bỏ mọi path và extension để tránh mismatch (e.g., "voices/Alice.wav" → "alice")
-        voice_name_clean = voice_name.strip().lower() if voice_name else ""
-
-        # Nếu bao gồm path, lấy basename
-        if voice_name_clean and ("/" in voice_name_clean or "\\" in voice_name_clean):
-            voice_name_clean = os.path.basename(voice_name_clean)
-
-        # Loại bỏ đuôi .wav nếu có
-        if voice_name_clean.endswith('.wav'):
-            voice_name_clean = voice_name_clean[:-4]
-
-        # Debug log để quan sát kết quả làm sạch
-        print(f"Resolving voice for requested name: '{voice_name}' -> cleaned: '{voice_name_clean}'")
-
-        # Nếu user không chỉ định, dùng giọng đầu tiên
-        if not voice_name_clean:
-            return available_voices[0]
-
-        # 1) Khớp chính xác (case-insensitive) – sử dụng dict mapping để tránh bỏ sót
-        try:
-            from tts.chatterbox_voices_integration import ChatterboxVoicesManager
-            voices_manager = ChatterboxVoicesManager()
-            voices_map = voices_manager.get_available_voices()  # key: id (lowercase)
-            if voice_name_clean in voices_map:
-                voice_info_obj = voices_map[voice_name_clean]
-                # Chuyển về dict để đồng bộ với available_voices format
-                selected_voice = {
-                    "id": voice_info_obj.voice_id,
-                    "name": voice_info_obj.name,
-                    "gender": voice_info_obj.gender,
-                    "description": voice_info_obj.description,
-                }
-
-                # Tìm file wav theo 3 biến thể tên
-                variations = [
-                    f"{voice_name_clean}.wav",
-                    f"{voice_name_clean.capitalize()}.wav",
-                    f"{voice_name_clean.upper()}.wav",
-                ]
-                for var in variations:
-                    candidate = voices_manager.voices_directory / var
-                    if candidate.exists():
-                        selected_voice["file_path"] = str(candidate)
-                        print(f"Voice found: {selected_voice['name']} -> {candidate}")
-                        break
-                else:
-                    print(f"WARNING: Voice file not found for '{voice_name_clean}', tried {variations}")
-
-                return selected_voice
-            else:
-                print(f"WARNING: Voice '{voice_name_clean}' NOT found in predefined voices. Available IDs: {', '.join(sorted(voices_map.keys()))}")
+        selected_voice = get_voice_catalog().resolve(voice_name)
+        if selected_voice is None:
+            raise RuntimeError("No voices available in voices/ directory")
+        return selected_voice
+    
+    def clear_voice_embedding_cache(self, include_disk: bool = True):
+        """Xóa bộ đệm conditionals giọng nói (memory + disk tier)."""
+        removed = self.voice_embedding_cache.clear(include_disk=include_disk)
+        print(f"[OK] Đã xóa {removed['memory']} mục (memory) và {removed['disk']} mục (disk) khỏi bộ đệm embedding giọng nói.")
 
-        except Exception as e:
-            print(f"WARNING: Voice lookup error: {e}")
+    def _synthesize_real_chatterbox_wav(self, text: str, reference_audio: Optional[str],
+                                        emotion_exaggeration: float, cfg_weight: float, temperature: float):
+        """Chạy model và trả về waveform tensor (1, n_samples) ở self.chatterbox_model.sr"""
+        # === Voice selection logic ===
+        if reference_audio and os.path.exists(reference_audio):
+            # Voice cloning mode
+            print(f"Using voice cloning: {os.path.basename(reference_audio)}")
 
-        # 2) Khớp một phần (contains) – ví dụ user gõ "alex" vẫn ra "alexander"
-        for voice in available_voices:
-            if voice_name_clean and voice_name_clean in voice['id'].lower():
-                return voice
+            # Reuse cached conditionals thay vì conditioning lại mỗi dòng
+            self.chatterbox_model.conds = self.voice_embedding_cache.get_or_prepare(
+                self.chatterbox_model, reference_audio, emotion_exaggeration
+            )
+        else:
+            # Fallback to default voice
+            print("Using default voice")
 
-        # Gender-based matching (for integration with other TTS providers)
-        voice_lower = voice_name.lower()
-        
-        if any(keyword in voice_lower for keyword in ['female', 'nữ', 'woman', 'girl']):
-            # Find female voice
-            female_voices = [v for v in available_voices if v['gender'] == 'female']
-            if female_voices:
-                return female_voices[0]  # Use first female voice
-                
-        elif any(keyword in voice_lower for keyword in ['male', 'nam', 'man', 'boy']):
-            # Find male voice
-            male_voices = [v for v in available_voices if v['gender'] == 'male']
-            if male_voices:
-                return male_voices[0]  # Use first male voice
-                
-        elif any(keyword in voice_lower for keyword in ['neutral', 'narrator', 'trung tính']):
-            # Find neutral voice
-            neutral_voices = [v for v in available_voices if v['gender'] == 'neutral']
-            if neutral_voices:
-                return neutral_voices[0]  # Use first neutral voice
+        return self.chatterbox_model.generate(
+            text,
+            exaggeration=emotion_exaggeration,
+            cfg_weight=cfg_weight,
+            temperature=temperature
+        )
+    
+    @property
+    def supports_waveform_generation(self) -> bool:
+        """generate_waveform() chỉ dùng được ở real mode (model đã load)"""
+        return self.is_initialized and not self.demo_mode and self.chatterbox_model is not None
+    
+    def generate_waveform(self,
+                          text: str,
+                          voice_sample_path: Optional[str] = None,
+                          emotion: str = "neutral",
+                          emotion_exaggeration: float = 1.0,
+                          speed: float = 1.0,
+                          voice_name: Optional[str] = None,
+                          cfg_weight: float = 0.5,
+                          temperature: float = 0.7,
+                          inner_voice: bool = False,
+                          inner_voice_type: Optional[str] = None,
+                          **_ignored) -> Optional[tuple]:
+        """
+        Generate TTS audio in memory - không ghi file.
         
-        # Vietnamese voice mapping (for compatibility with Google TTS voices)
-        vietnamese_voice_mapping = {
-            'vi-vn-standard-a': 'female_young',
-            'vi-vn-standard-b': 'male_young', 
-            'vi-vn-standard-c': 'female_mature',
-            'vi-vn-standard-d': 'male_mature',
-            'vi-vn-wavenet-a': 'female_gentle',
-            'vi-vn-wavenet-b': 'male_deep',
-            'vi-vn-wavenet-c': 'female_mature',
-            'vi-vn-wavenet-d': 'male_mature'
-        }
+        Returns:
+            (float32 mono numpy array, sample_rate) hoặc None nếu không ở real mode / lỗi
+            (caller nên fallback về generate_voice)
+        """
+        if not self.supports_waveform_generation:
+            return None
         
-        # Try Vietnamese voice mapping
-        voice_clean = voice_name.lower().replace('-', '').replace('_', '')
-        for vn_voice, chatterbox_voice in vietnamese_voice_mapping.items():
-            if vn_voice.replace('-', '') in voice_clean:
-                for voice in available_voices:
-                    if voice['id'] == chatterbox_voice:
-                        return voice
+        try:
+            emotion_exaggeration, cfg_weight, temperature, speed = self._resolve_generation_parameters(
+                emotion, emotion_exaggeration, cfg_weight, temperature, speed
+            )
+            if inner_voice and inner_voice_type:
+                text = self._apply_inner_voice_effects(text, inner_voice_type)
+            
+            if voice_sample_path and os.path.exists(voice_sample_path):
+                reference_audio = voice_sample_path
+            else:
+                reference_audio = self._resolve_voice_selection(voice_name).get('file_path')
+            
+            wav = self._synthesize_real_chatterbox_wav(text, reference_audio, emotion_exaggeration, cfg_weight, temperature)
+            if wav is None:
+                return None
+            samples = wav.detach().to("cpu").float().numpy().reshape(-1)
+            return samples, self.chatterbox_model.sr
         
-        # Fallback to first available voice
-        print(f"WARNING: Voice '{voice_name_clean}' not found, using default")
-        return available_voices[0]
+        except Exception as e:
+            print(f"ERROR: In-memory ChatterboxTTS generation failed: {e}")
+            logger.error(traceback.format_exc())
+            return None
     
-    def clear_voice_embedding_cache(self):
-        """Xóa bộ đệm embedding giọng nói trong bộ nhớ."""
-        count = len(self.voice_embedding_cache)
-        self.voice_embedding_cache.clear()
-        print(f"[OK] Đã xóa {count} mục khỏi bộ đệm embedding giọng nói.")
-
     def _generate_real_chatterbox_audio(self, 
                                        text: str, 
                                        save_path: str,
@@ -811,30 +885,7 @@ class RealChatterboxProvider:
                 print(f"WARNING: Voice prompt '{voice_prompt}' is not supported by ChatterboxTTS")
                 print(f"   Suggestion: Use Voice Clone mode with an audio sample instead")
             
-            # === Voice selection logic ===
-            if reference_audio and os.path.exists(reference_audio):
-                # Voice cloning mode
-                print(f"Using voice cloning: {os.path.basename(reference_audio)}")
-
-                # --- VOICE EMBEDDING CACHE LOGIC (placeholder) ---
-                # TODO: implement embedding cache to avoid recomputation
-
-                wav = self.chatterbox_model.generate(
-                    text, 
-                    audio_prompt_path=reference_audio,
-                    exaggeration=emotion_exaggeration,
-                    cfg_weight=cfg_weight,
-                    temperature=temperature
-                )
-            else:
-                # Fallback to default voice
-                print("Using default voice")
-                wav = self.chatterbox_model.generate(
-                    text,
-                    exaggeration=emotion_exaggeration,
-                    cfg_weight=cfg_weight,
-                    temperature=temperature
-                )
+            wav = self._synthesize_real_chatterbox_wav(text, reference_audio, emotion_exaggeration, cfg_weight, temperature)
             
             # Save audio file using torchaudio
             if wav is not None:
@@ -965,6 +1016,8 @@ class RealChatterboxProvider:
         """
         try:
             if self.chatterbox_model:
+                if model_registry:
+                    model_registry.unregister_model(self._registry_key())
                 # Clear model from memory
                 del self.chatterbox_model
                 self.chatterbox_model = None
@@ -978,6 +1031,28 @@ class RealChatterboxProvider:
         except Exception as e:
             logger.error(f"Cleanup failed: {e}")
     
+    def release_model(self):
+        """
+        Nhả model khỏi RAM/VRAM nhưng giữ instance: dùng khi TTSWorkerFarm chạy
+        (mỗi worker load model riêng, process cha không cần giữ thêm một bản).
+        generate_voice() tự load lại ở lần gọi kế tiếp.
+        """
+        if not self.is_initialized or self.demo_mode:
+            return
+        self.cleanup()
+        self._model_released = True
+    
+    def _reload_released_model(self) -> bool:
+        """Load lại model đã release_model(); False nếu provider bị cleanup() hẳn"""
+        if not getattr(self, "_model_released", False):
+            return False
+        with self._lock:
+            if not self.is_initialized:
+                print("Reloading Real Chatterbox TTS model released for worker farm...")
+                self._initialize_provider()
+                self._model_released = False
+        return self.is_initialized
+    
     def soft_cleanup(self):
         """
         Soft cleanup - chỉ dọn dẹp cache, không destroy model
@@ -1005,29 +1080,7 @@ class RealChatterboxProvider:
     def get_available_voices(self) -> List[Dict[str, str]]:
         """Get available voices - use 28 predefined voices from voices/ directory"""
         try:
-            # Load voices từ ChatterboxVoicesManager
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'ui'))
-            
-            from tts.chatterbox_voices_integration import ChatterboxVoicesManager
-            voices_manager = ChatterboxVoicesManager()
-            
-            available_chatterbox_voices = voices_manager.get_available_voices()
-            
-            # Convert to format expected by RealChatterboxProvider
-            available_voices = []
-            for voice_id, voice_data in available_chatterbox_voices.items():
-                available_voices.append({
-                    "id": voice_id,
-                    "name": voice_data.name,
-                    "gender": voice_data.gender,
-                    "description": f"Predefined voice: {voice_data.name} ({voice_data.gender})"
-                })
-            
-            print(f"Loaded {len(available_voices)} predefined voices from ChatterboxVoicesManager")
-            return available_voices
-            
+            return [voice.as_dict(include_path=False) for voice in get_voice_catalog().voices()]
         except Exception as e:
             print(f"WARNING: Failed to load predefined voices: {e}")
             # Không trả về danh sách mock – để trống để tránh nhầm lẫn
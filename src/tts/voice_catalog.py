@@ -0,0 +1,250 @@
+"""
+Voice Catalog
+Index giọng đọc build một lần cho RealChatterboxProvider, thay cho việc tạo
+ChatterboxVoicesManager (scan lại voices/) và probe file ở mỗi dòng thoại
+
+- voice_id (lowercase) -> VoiceRecord kèm đường dẫn WAV tuyệt đối (khớp tên file không phân biệt hoa thường)
+- Bucket theo gender + alias map (giọng Google TTS tiếng Việt -> giọng Chatterbox)
+- Kết quả resolve được memo theo tên đã làm sạch: resolve mỗi dòng là lookup dict, không chạm filesystem
+- Làm mới khi thư mục voices/ đổi mtime (watcher thread, VS_VOICE_CATALOG_WATCH_INTERVAL)
+  hoặc gọi invalidate_voice_catalog() (ví dụ sau /v1/voices/upload)
+"""
+import os
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tương thích giọng Google TTS tiếng Việt (so khớp sau khi bỏ '-' / '_')
+VIETNAMESE_VOICE_ALIASES = {
+    'vi-vn-standard-a': 'female_young',
+    'vi-vn-standard-b': 'male_young',
+    'vi-vn-standard-c': 'female_mature',
+    'vi-vn-standard-d': 'male_mature',
+    'vi-vn-wavenet-a': 'female_gentle',
+    'vi-vn-wavenet-b': 'male_deep',
+    'vi-vn-wavenet-c': 'female_mature',
+    'vi-vn-wavenet-d': 'male_mature',
+}
+
+GENDER_KEYWORDS = (
+    ("female", ('female', 'nữ', 'woman', 'girl')),
+    ("male", ('male', 'nam', 'man', 'boy')),
+    ("neutral", ('neutral', 'narrator', 'trung tính')),
+)
+
+
+@dataclass(frozen=True)
+class VoiceRecord:
+    """Một giọng trong catalog"""
+    voice_id: str
+    name: str
+    gender: str
+    description: str
+    file_path: Optional[str] = None
+
+    def as_dict(self, include_path: bool = True) -> Dict[str, str]:
+        voice = {
+            "id": self.voice_id,
+            "name": self.name,
+            "gender": self.gender,
+            "description": self.description,
+        }
+        if include_path and self.file_path:
+            voice["file_path"] = self.file_path
+        return voice
+
+
+def clean_voice_name(voice_name: Optional[str]) -> str:
+    """"voices/Alice.wav" -> "alice" """
+    cleaned = voice_name.strip().lower() if voice_name else ""
+    if "/" in cleaned or "\\" in cleaned:
+        cleaned = os.path.basename(cleaned.replace("\\", "/"))
+    if cleaned.endswith(".wav"):
+        cleaned = cleaned[:-4]
+    return cleaned
+
+
+class VoiceCatalog:
+    def __init__(self, watch_interval: Optional[float] = None):
+        self.watch_interval = (watch_interval if watch_interval is not None
+                               else float(os.getenv("VS_VOICE_CATALOG_WATCH_INTERVAL", "5.0")))
+        self._lock = threading.RLock()
+        self._voices: List[VoiceRecord] = []
+        self._by_id: Dict[str, VoiceRecord] = {}
+        self._by_gender: Dict[str, List[VoiceRecord]] = {}
+        self._aliases: Dict[str, VoiceRecord] = {}
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+        self.voices_directory: Optional[Path] = None
+        self._dir_mtime: Optional[int] = None
+        self._built = False
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.stats = {"builds": 0, "hits": 0, "misses": 0}
+
+    # ---- build ----
+
+    def _directory_mtime(self) -> Optional[int]:
+        if self.voices_directory is None:
+            return None
+        try:
+            return os.stat(self.voices_directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _build(self):
+        """Scan voices/ một lần (gọi khi đang giữ lock)"""
+        from .chatterbox_voices_integration import ChatterboxVoicesManager
+
+        manager = ChatterboxVoicesManager()
+        self.voices_directory = Path(manager.voices_directory).resolve()
+        self._dir_mtime = self._directory_mtime()
+
+        # Tên file thật theo stem lowercase -> không cần thử "alice.wav" / "Alice.wav" / "ALICE.wav"
+        files: Dict[str, str] = {}
+        if self.voices_directory.is_dir():
+            for entry in os.scandir(self.voices_directory):
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() == ".wav" and entry.is_file():
+                    files.setdefault(stem.lower(), os.path.abspath(entry.path))
+
+        voices, by_id, by_gender = [], {}, {}
+        for voice_id, voice in manager.get_available_voices().items():
+            record = VoiceRecord(voice_id=voice_id, name=voice.name, gender=voice.gender,
+                                 description=f"Predefined voice: {voice.name} ({voice.gender})",
+                                 file_path=files.get(voice_id))
+            voices.append(record)
+            by_id[voice_id] = record
+            by_gender.setdefault(voice.gender, []).append(record)
+
+        self._voices = voices
+        self._by_id = by_id
+        self._by_gender = by_gender
+        self._aliases = {
+            alias.replace('-', ''): by_id[target]
+            for alias, target in VIETNAMESE_VOICE_ALIASES.items() if target in by_id
+        }
+        self._resolved = {}
+        self._built = True
+        self.stats["builds"] += 1
+        logger.info(f"[OK] Voice catalog: {len(voices)} voices from {self.voices_directory}")
+
+    def _ensure_built(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._build()
+                    self._start_watcher()
+
+    def invalidate(self):
+        """Build lại ở lần dùng kế tiếp (sau khi thêm/xóa file giọng)"""
+        with self._lock:
+            self._built = False
+
+    def refresh_if_changed(self) -> bool:
+        self._ensure_built()
+        with self._lock:
+            if self._directory_mtime() == self._dir_mtime:
+                return False
+            self._build()
+            return True
+
+    def _start_watcher(self):
+        if self.watch_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(target=self._watch_loop, name="voice-catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.refresh_if_changed()
+            except Exception as e:
+                logger.warning(f"[WARNING] Voice catalog refresh failed: {e}")
+
+    def shutdown(self):
+        self._stop.set()
+
+    # ---- lookup ----
+
+    def voices(self) -> List[VoiceRecord]:
+        self._ensure_built()
+        return list(self._voices)
+
+    def get(self, voice_id: str) -> Optional[VoiceRecord]:
+        self._ensure_built()
+        return self._by_id.get(clean_voice_name(voice_id))
+
+    def by_gender(self, gender: str) -> List[VoiceRecord]:
+        self._ensure_built()
+        return list(self._by_gender.get(gender, []))
+
+    def _match(self, voice_name: str, cleaned: str) -> Optional[Dict[str, Any]]:
+        """Thứ tự giống logic cũ: exact -> partial -> gender keyword -> alias tiếng Việt -> giọng đầu tiên"""
+        # 1) Khớp chính xác (kèm file WAV để voice cloning)
+        record = self._by_id.get(cleaned)
+        if record is not None:
+            if not record.file_path:
+                print(f"WARNING: Voice file not found for '{cleaned}' in {self.voices_directory}")
+            return record.as_dict()
+
+        # 2) Khớp một phần - user gõ "alex" vẫn ra "alexander"
+        for record in self._voices:
+            if cleaned in record.voice_id:
+                return record.as_dict(include_path=False)
+
+        # 3) Theo gender keyword (tích hợp với provider khác)
+        voice_lower = voice_name.lower()
+        for gender, keywords in GENDER_KEYWORDS:
+            if any(keyword in voice_lower for keyword in keywords):
+                bucket = self._by_gender.get(gender)
+                if bucket:
+                    return bucket[0].as_dict(include_path=False)
+                break
+
+        # 4) Giọng Google TTS tiếng Việt
+        voice_compact = voice_lower.replace('-', '').replace('_', '')
+        for alias, record in self._aliases.items():
+            if alias in voice_compact:
+                return record.as_dict(include_path=False)
+
+        print(f"WARNING: Voice '{cleaned}' not found, using default")
+        return None
+
+    def resolve(self, voice_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Voice info (dict như get_available_voices, có file_path nếu khớp chính xác); None nếu catalog rỗng"""
+        self._ensure_built()
+        cleaned = clean_voice_name(voice_name)
+        cached = self._resolved.get(cleaned)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return dict(cached)
+
+        self.stats["misses"] += 1
+        if not self._voices:
+            return None
+        voice = self._match(voice_name, cleaned) if cleaned else None
+        if voice is None:
+            voice = self._voices[0].as_dict(include_path=False)
+        self._resolved[cleaned] = voice
+        return dict(voice)
+
+
+_catalog: Optional[VoiceCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_voice_catalog() -> VoiceCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = VoiceCatalog()
+        return _catalog
+
+
+def invalidate_voice_catalog():
+    """Gọi sau khi thêm/xóa file trong voices/ (upload API, UI)"""
+    get_voice_catalog().invalidate()
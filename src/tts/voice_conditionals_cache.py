@@ -0,0 +1,131 @@
+"""
+Voice Conditionals Cache
+Cache speaker conditioning (``model.conds``) của ChatterboxTTS theo nội dung file WAV tham chiếu
+
+- Tier 1: in-memory LRU (OrderedDict)
+- Tier 2: on-disk ``.pt`` files trong ``voices/.conditionals_cache/``
+Key = sha1(reference WAV) + exaggeration, nên đổi tên/di chuyển file vẫn hit cache.
+"""
+import os
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.file_hash import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "voices" / ".conditionals_cache"
+
+
+class VoiceConditionalsCache:
+    """
+    Two-tier cache cho Chatterbox voice conditionals.
+
+    Thread-safe; an toàn để dùng chung trong RealChatterboxProvider singleton.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_entries: int = 32):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def make_key(self, reference_audio: str, exaggeration: float) -> str:
+        """Cache key = content hash + exaggeration (2 chữ số thập phân)"""
+        return f"{file_content_hash(reference_audio)}_{exaggeration:.2f}"
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pt"
+
+    def _remember(self, key: str, conds: Any):
+        self._memory[key] = conds
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_prepare(self, model: Any, reference_audio: str, exaggeration: float) -> Any:
+        """
+        Trả về conditionals cho (reference_audio, exaggeration).
+
+        Thứ tự tra cứu: memory -> disk -> ``model.prepare_conditionals``.
+        Kết quả mới được ghi vào cả hai tier.
+        """
+        key = self.make_key(reference_audio, exaggeration)
+
+        with self._lock:
+            conds = self._memory.get(key)
+            if conds is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return conds
+
+            disk_path = self._disk_path(key)
+            if disk_path.exists():
+                try:
+                    conds_cls = type(model.conds) if model.conds is not None else None
+                    if conds_cls is None:
+                        from chatterbox.tts import Conditionals as conds_cls
+                    conds = conds_cls.load(disk_path, map_location=model.device)
+                    conds = conds.to(model.device)
+                    self._remember(key, conds)
+                    self.stats["disk_hits"] += 1
+                    return conds
+                except Exception as e:
+                    logger.warning(f"Corrupt conditionals cache entry {disk_path.name}: {e}")
+                    disk_path.unlink(missing_ok=True)
+
+            self.stats["misses"] += 1
+            model.prepare_conditionals(reference_audio, exaggeration=exaggeration)
+            conds = model.conds
+            self._remember(key, conds)
+
+            tmp_path = None
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Temp file riêng cho mỗi writer: worker farm nhiều process ghi chung cache_dir
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{key[:12]}_", suffix=".tmp", dir=str(self.cache_dir))
+                os.close(fd)
+                conds.save(tmp_path)
+                os.replace(tmp_path, disk_path)
+            except Exception as e:
+                logger.warning(f"Could not persist conditionals for {os.path.basename(reference_audio)}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            return conds
+
+    def clear(self, include_disk: bool = True) -> Dict[str, int]:
+        """Xóa memory tier (và disk tier nếu include_disk). Trả về số mục đã xóa."""
+        with self._lock:
+            memory_count = len(self._memory)
+            self._memory.clear()
+
+            disk_count = 0
+            if include_disk and self.cache_dir.exists():
+                for entry in self.cache_dir.glob("*.pt"):
+                    try:
+                        entry.unlink()
+                        disk_count += 1
+                    except OSError as e:
+                        logger.warning(f"Could not remove {entry}: {e}")
+
+            return {"memory": memory_count, "disk": disk_count}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss và kích thước cache"""
+        with self._lock:
+            disk_entries = len(list(self.cache_dir.glob("*.pt"))) if self.cache_dir.exists() else 0
+            return {
+                **self.stats,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "cache_dir": str(self.cache_dir),
+            }
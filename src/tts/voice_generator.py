@@ -17,12 +17,18 @@ except ImportError:
 # Import Chatterbox TTS Provider
 try:
     from .real_chatterbox_provider import RealChatterboxProvider
+    from core.lazy_imports import BackgroundWarmup
     CHATTERBOX_PROVIDER_AVAILABLE = True
     print("[SUCCESS] RealChatterboxProvider imported successfully")
 except ImportError as e:
     CHATTERBOX_PROVIDER_AVAILABLE = False
     print(f"[WARNING] RealChatterboxProvider not available: {e}")
 
+# Load model Chatterbox (torch + weights) ở background thread: VoiceGenerator() trả về ngay,
+# lần dùng provider đầu tiên mới chờ warm-up xong
+_chatterbox_warmup = BackgroundWarmup("chatterbox", RealChatterboxProvider.get_instance) \
+    if CHATTERBOX_PROVIDER_AVAILABLE else None
+
 # Import Inner Voice Processor
 try:
     import sys
@@ -46,24 +52,21 @@ class VoiceGenerator:
         self.elevenlabs_api_key = os.getenv('ELEVENLABS_API_KEY')
         self.google_api_key = os.getenv('GOOGLE_TTS_API_KEY')
         
-        # Initialize Chatterbox TTS Provider (Singleton)
-        self.chatterbox_provider = None
-        if CHATTERBOX_PROVIDER_AVAILABLE:
-            try:
-                self.chatterbox_provider = RealChatterboxProvider.get_instance()
-                print(f"[MIC] REAL Chatterbox TTS Status: {self.chatterbox_provider.get_device_info()}")
-            except Exception as e:
-                print(f"[WARNING] Failed to initialize Real Chatterbox TTS: {e}")
+        # Initialize Chatterbox TTS Provider (Singleton) - warm-up ở background, VS_TTS_WARMUP=0 để load khi dùng lần đầu
+        self._chatterbox_provider = None
+        self._chatterbox_resolved = not CHATTERBOX_PROVIDER_AVAILABLE
+        if CHATTERBOX_PROVIDER_AVAILABLE and os.getenv("VS_TTS_WARMUP", "1") != "0":
+            _chatterbox_warmup.start()
         
         # Initialize Inner Voice Processor
         self.inner_voice_processor = None
         if INNER_VOICE_AVAILABLE:
             try:
                 self.inner_voice_processor = InnerVoiceProcessor()
-                if self.inner_voice_processor.ffmpeg_available:
+                if self.inner_voice_processor.dsp_available or self.inner_voice_processor.ffmpeg_available:
                     print("[THEATER] Inner Voice Processor initialized successfully")
                 else:
-                    print("[WARNING] Inner Voice Processor initialized but FFmpeg not available")
+                    print("[WARNING] Inner Voice Processor initialized but neither NumPy DSP nor FFmpeg available")
             except Exception as e:
                 print(f"[WARNING] Failed to initialize Inner Voice Processor: {e}")
                 self.inner_voice_processor = None
@@ -145,9 +148,12 @@ class VoiceGenerator:
         
         return providers
     
-    def generate_voice_chatterbox(self, text, save_path, voice_sample_path=None, emotion_exaggeration=1.0, speed=1.0, voice_name=None, cfg_weight=0.5, voice_prompt=None):
-        """Tạo giọng nói bằng REAL Chatterbox TTS với TRUE cfg_weight và emotion control + PROMPT-BASED VOICE"""
-        if not self.chatterbox_provider or not self.chatterbox_provider.is_initialized:
+    def generate_voice_chatterbox(self, text, save_path, voice_sample_path=None, emotion_exaggeration=1.0, speed=1.0, voice_name=None, cfg_weight=0.5, voice_prompt=None, use_cache=True):
+        """
+        Tạo giọng nói bằng REAL Chatterbox TTS với TRUE cfg_weight và emotion control + PROMPT-BASED VOICE
+        use_cache=False: luôn sampling một take mới thay vì lấy audio từ result cache
+        """
+        if not self.chatterbox_provider:
             return {"success": False, "error": "Real Chatterbox TTS not available or not initialized"}
         
         return self.chatterbox_provider.generate_voice(
@@ -158,7 +164,8 @@ class VoiceGenerator:
             speed=speed,
             voice_name=voice_name,
             cfg_weight=cfg_weight,
-            voice_prompt=voice_prompt  # NEW: Support prompt-based voice generation
+            voice_prompt=voice_prompt,  # NEW: Support prompt-based voice generation
+            use_cache=use_cache
         )
     
     def generate_voice_auto_v2(self, text, save_path, provider="auto", language="vi", **kwargs):
@@ -222,6 +229,23 @@ class VoiceGenerator:
         else:
             return "en"
     
+    @property
+    def chatterbox_provider(self):
+        """RealChatterboxProvider (chờ warm-up nếu đang load), None nếu không khả dụng"""
+        if not self._chatterbox_resolved:
+            try:
+                self._chatterbox_provider = _chatterbox_warmup.get()
+                print(f"[MIC] REAL Chatterbox TTS Status: {self._chatterbox_provider.get_device_info()}")
+            except Exception as e:
+                print(f"[WARNING] Failed to initialize Real Chatterbox TTS: {e}")
+            self._chatterbox_resolved = True
+        return self._chatterbox_provider
+
+    @chatterbox_provider.setter
+    def chatterbox_provider(self, provider):
+        self._chatterbox_provider = provider
+        self._chatterbox_resolved = True
+
     def get_chatterbox_device_info(self):
         """Lấy thông tin device của Real Chatterbox TTS"""
         if self.chatterbox_provider:
@@ -230,7 +254,7 @@ class VoiceGenerator:
     
     def cleanup_chatterbox(self):
         """Cleanup Real Chatterbox TTS resources (Singleton safe)"""
-        if self.chatterbox_provider:
+        if self._chatterbox_provider:  # chưa load thì không có gì để cleanup
             # Sử dụng soft_cleanup cho Singleton để không destroy shared instance
             self.chatterbox_provider.soft_cleanup()
     
@@ -411,13 +435,108 @@ class VoiceGenerator:
         
         return {"success": True, "audio_files": audio_files}
     
-    def generate_audio_by_characters(self, script_data, output_dir, voice_mapping):
+    @staticmethod
+    def _lookup_voice_for_speaker(voice_mapping, speaker):
+        """Case-insensitive voice mapping lookup, None nếu không có"""
+        for map_key, map_voice in voice_mapping.items():
+            if map_key.lower() == speaker.lower():
+                return map_voice
+        return None
+    
+    @staticmethod
+    def _voice_file_hash(voice_name):
+        """Hash nội dung file WAV tham chiếu của giọng (None nếu giọng không có file)"""
+        try:
+            from .voice_catalog import get_voice_catalog
+            from core.file_hash import file_content_hash
+            
+            voice = get_voice_catalog().resolve(voice_name) or {}
+            file_path = voice.get('file_path')
+            return file_content_hash(file_path) if file_path and os.path.exists(file_path) else None
+        except Exception:
+            return None
+    
+    @classmethod
+    def _dialogue_fingerprint(cls, manifest, dialogue, voice_name):
+        return manifest.fingerprint(
+            speaker=dialogue['speaker'],
+            text=dialogue['text'],
+            voice=voice_name,
+            voice_file=cls._voice_file_hash(voice_name),  # file giọng được thu lại/thay thế -> render lại
+            emotion=dialogue.get('emotion', 'neutral'),
+            inner_voice=dialogue.get('inner_voice', False),
+            inner_voice_type=dialogue.get('inner_voice_type'),
+        )
+    
+    def _prerender_with_worker_farm(self, script_data, output_dir, voice_mapping, manifest, num_workers, torch_threads=None,
+                                    use_cache=True):
+        """
+        Tổng hợp trước mọi dialogue cần render trên TTSWorkerFarm (multi-process).
+        Trả về {slot: result}; vòng lặp chính dùng kết quả này thay vì gọi TTS tuần tự.
+        """
+        from core.tts_worker_farm import TTSWorkerFarm
+        
+        slots, requests = [], []
+        for segment_idx, segment in enumerate(script_data.get('segments', [])):
+            for dialogue_idx, dialogue in enumerate(segment.get('dialogues', [])):
+                voice_name = self._lookup_voice_for_speaker(voice_mapping, dialogue['speaker']) or 'abigail'
+                slot = f"s{segment_idx+1}_d{dialogue_idx+1}"
+                if manifest.peek(slot, self._dialogue_fingerprint(manifest, dialogue, voice_name)):
+                    continue
+                slots.append(slot)
+                requests.append({
+                    "text": dialogue['text'],
+                    "save_path": os.path.join(output_dir, f"{slot}_{dialogue['speaker']}.mp3"),
+                    "voice_name": voice_name,
+                    "use_cache": use_cache,
+                })
+        
+        if not requests:
+            return {}
+        
+        self._release_parent_model()
+        print(f"[FACTORY] Pre-rendering {len(requests)} dialogues on {num_workers} worker processes...")
+        with TTSWorkerFarm(num_workers=num_workers, torch_threads=torch_threads) as farm:
+            results = farm.generate(requests)
+        return dict(zip(slots, results))
+    
+    def _release_parent_model(self):
+        """
+        Mỗi worker của farm load model riêng -> nhả model của process cha để không giữ N+1 bản trong RAM.
+        Slot lỗi rơi về generate_voice_chatterbox, provider tự load lại khi đó.
+        """
+        if not CHATTERBOX_PROVIDER_AVAILABLE or _chatterbox_warmup.state == "pending":
+            return  # chưa load (VS_TTS_WARMUP=0) -> không load chỉ để nhả
+        provider = self.chatterbox_provider  # warm-up đang chạy thì chờ xong rồi mới nhả
+        if provider:
+            provider.release_model()
+    
+    def generate_audio_by_characters(self, script_data, output_dir, voice_mapping, incremental=True,
+                                     num_workers=0, torch_threads=None):
         """
         Tạo audio theo nhân vật từ script data có format mới
         script_data: {"segments": [...], "characters": [...]}
         voice_mapping: {"narrator": "vi-VN-Standard-A", ...}
+        incremental: chỉ tổng hợp lại các dialogue thay đổi so với lần render trước;
+            incremental=False là regenerate - mọi dialogue được sampling lại, không lấy từ result cache
+        num_workers: > 1 để tổng hợp trên worker farm nhiều process (CPU nhiều core)
+        torch_threads: số torch threads mỗi worker (mặc định chia đều số core)
         """
+        from core.render_manifest import RenderManifest
+        
         os.makedirs(output_dir, exist_ok=True)
+        manifest = RenderManifest(output_dir)
+        if not incremental:
+            manifest.dialogues.clear()
+            manifest.merges.clear()
+        segment_fingerprints = []
+        
+        prerendered = {}
+        if num_workers and num_workers > 1:
+            prerendered = self._prerender_with_worker_farm(
+                script_data, output_dir, voice_mapping, manifest, num_workers, torch_threads,
+                use_cache=incremental
+            )
         
         all_audio_files = []
         character_audio_files = {}  # Track files by character
@@ -430,6 +549,7 @@ class VoiceGenerator:
             # Xử lý từng segment
             for segment_idx, segment in enumerate(script_data.get('segments', [])):
                 segment_audio_files = []
+                dialogue_fingerprints = []
                 
                 # Xử lý từng dialogue trong segment
                 for dialogue_idx, dialogue in enumerate(segment.get('dialogues', [])):
@@ -437,11 +557,7 @@ class VoiceGenerator:
                     text = dialogue['text']
                     
                     # Case-insensitive voice mapping lookup
-                    voice_name = None
-                    for map_key, map_voice in voice_mapping.items():
-                        if map_key.lower() == speaker.lower():
-                            voice_name = map_voice
-                            break
+                    voice_name = self._lookup_voice_for_speaker(voice_mapping, speaker)
                     
                     dialogue_count = segment_idx * 10 + dialogue_idx + 1  # Unique number
                     if voice_name is None:
@@ -454,15 +570,29 @@ class VoiceGenerator:
                     inner_voice = dialogue.get('inner_voice', False)
                     
                     # Tên file cho dialogue này
-                    audio_filename = f"s{segment_idx+1}_d{dialogue_idx+1}_{speaker}.mp3"
+                    slot = f"s{segment_idx+1}_d{dialogue_idx+1}"
+                    audio_filename = f"{slot}_{speaker}.mp3"
                     audio_path = os.path.join(output_dir, audio_filename)
                     
-                    # Tạo audio với Chatterbox TTS
-                    result = self.generate_voice_chatterbox(
-                        text=text,
-                        save_path=audio_path,
-                        voice_name=voice_name
-                    )
+                    # Incremental re-render: dialogue không đổi -> dùng lại file cũ
+                    fingerprint = self._dialogue_fingerprint(manifest, dialogue, voice_name)
+                    dialogue_fingerprints.append(fingerprint)
+                    cached_path = manifest.lookup(slot, fingerprint)
+                    if cached_path:
+                        segment_audio_files.append(cached_path)
+                        character_audio_files[speaker].append(cached_path)
+                        print(f"[SKIP] Unchanged dialogue reused: {os.path.basename(cached_path)}")
+                        continue
+                    
+                    # Tạo audio với Chatterbox TTS (dùng kết quả worker farm nếu đã có)
+                    result = prerendered.pop(slot, None)
+                    if not result or not result.get("success"):
+                        result = self.generate_voice_chatterbox(
+                            text=text,
+                            save_path=audio_path,
+                            voice_name=voice_name,
+                            use_cache=incremental
+                        )
                     
                     if result["success"]:
                         final_audio_path = audio_path
@@ -503,6 +633,7 @@ class VoiceGenerator:
                         
                         segment_audio_files.append(final_audio_path)
                         character_audio_files[speaker].append(final_audio_path)
+                        manifest.record(slot, fingerprint, final_audio_path)
                         
                         # Update filename display
                         display_filename = os.path.basename(final_audio_path)
@@ -510,40 +641,57 @@ class VoiceGenerator:
                         print(f"[OK] Created audio: {display_filename} ({voice_name}) {inner_indicator}")
                     else:
                         print(f"[EMOJI] Failed to create audio for {speaker}: {result.get('error')}")
+                        manifest.save()
                         return {"success": False, "error": f"Error tạo audio cho {speaker}: {result.get('error')}"}
                 
                 # Ghép các dialogue trong segment thành 1 file
                 if segment_audio_files:
                     segment_final_path = os.path.join(output_dir, f"segment_{segment_idx+1}_complete.mp3")
+                    segment_fingerprints.extend(dialogue_fingerprints)
+                    segment_fingerprints.append(f"segment_{segment_idx+1}")
                     
-                    if len(segment_audio_files) > 1:
+                    if manifest.merge_is_current(segment_final_path, dialogue_fingerprints):
+                        all_audio_files.append(segment_final_path)
+                    elif len(segment_audio_files) > 1:
                         merge_result = self.merge_audio_files(segment_audio_files, segment_final_path)
                         if merge_result["success"]:
                             all_audio_files.append(segment_final_path)
                         else:
+                            manifest.save()
                             return {"success": False, "error": f"Error ghép segment {segment_idx+1}"}
                     else:
                         # Chỉ có 1 file, copy luôn
                         import shutil
                         shutil.copy2(segment_audio_files[0], segment_final_path)
                         all_audio_files.append(segment_final_path)
+                    manifest.record_merge(segment_final_path, dialogue_fingerprints)
+                
+                manifest.save()
             
             # Tạo file hoàn chỉnh cuối cùng
             final_audio_path = os.path.join(output_dir, "final_complete_audio.mp3")
-            if len(all_audio_files) > 1:
+            if manifest.merge_is_current(final_audio_path, segment_fingerprints):
+                pass
+            elif len(all_audio_files) > 1:
                 merge_result = self.merge_audio_files(all_audio_files, final_audio_path)
                 if not merge_result["success"]:
                     return {"success": False, "error": "Error tạo file audio cuối cùng"}
             else:
                 import shutil
                 shutil.copy2(all_audio_files[0], final_audio_path)
+            manifest.record_merge(final_audio_path, segment_fingerprints)
+            manifest.save()
+            
+            print(f"[STATS] Incremental render: {manifest.rendered} synthesized, {manifest.reused} reused")
             
             return {
                 "success": True,
                 "final_audio_path": final_audio_path,
                 "segment_audio_files": all_audio_files,
                 "character_audio_files": character_audio_files,
-                "output_dir": output_dir
+                "output_dir": output_dir,
+                "dialogues_rendered": manifest.rendered,
+                "dialogues_reused": manifest.reused
             }
             
         except Exception as e:
@@ -180,67 +180,63 @@ from .emotion_config_tab import EmotionConfigTab
 from .macos_styles import get_macos_window_size, get_macos_stylesheet
 
 # Import pipeline
+# VideoPipeline / VoiceGenerator (openai, ffmpeg, TTS stack) và pydub được import ở lần dùng đầu
+# tiên để import ui.advanced_window nhanh - main.py import module này ngay sau splash screen
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from core.video_pipeline import VideoPipeline
 from video.effects_presets import EffectsPresets
 from ai.prompt_templates import PromptTemplates
 from core.api_manager import APIManager
-from tts.voice_generator import VoiceGenerator
+from core.lazy_imports import module_available
 
 # Import Chatterbox-Audiobook inspired processors
-from core.pause_processor import PauseProcessor
-from core.audio_combiner import AudioCombiner
 from core.voice_library import VoiceLibrary
 
 # Audio processing
-try:
-    from pydub import AudioSegment
-    from pydub.utils import which
+PYDUB_AVAILABLE = module_available("pydub")
+_pydub_configured = False
+
+# Setup ffmpeg/ffprobe paths for PyDub
+def setup_pydub_ffmpeg():
+    """Setup ffmpeg and ffprobe paths for PyDub (một lần, gọi khi khởi tạo cửa sổ chính)"""
+    global _pydub_configured
+    if _pydub_configured or not PYDUB_AVAILABLE:
+        return
+    _pydub_configured = True
     
     # Configure PyDub to find ffprobe on Windows
-    import os
-    import shutil
-    
-    # Setup ffmpeg/ffprobe paths for PyDub
-    def setup_pydub_ffmpeg():
-        """Setup ffmpeg and ffprobe paths for PyDub"""
-        
-        # Try to find ffprobe
-        ffprobe_paths = [
-            os.path.join(os.getcwd(), "tools", "ffmpeg", "ffprobe.exe"),  # Local tools
-            shutil.which("ffprobe"),  # System PATH
-            r"C:\ffmpeg\bin\ffprobe.exe",
-            r"C:\Program Files\ffmpeg\bin\ffprobe.exe"
-        ]
-        
-        ffmpeg_paths = [
-            os.path.join(os.getcwd(), "tools", "ffmpeg", "ffmpeg.exe"),  # Local tools  
-            shutil.which("ffmpeg"),  # System PATH
-            r"C:\ffmpeg\bin\ffmpeg.exe",
-            r"C:\Program Files\ffmpeg\bin\ffmpeg.exe"
-        ]
-        
-        # Configure ffprobe
-        for path in ffprobe_paths:
-            if path and os.path.exists(path):
-                AudioSegment.converter = path.replace("ffprobe", "ffmpeg")  # Set ffmpeg path
-                AudioSegment.ffprobe = path  # Set ffprobe path
-                print(f"[OK] PyDub configured - ffprobe: {path}")
-                break
-        
-        # Configure ffmpeg as backup
-        for path in ffmpeg_paths:
-            if path and os.path.exists(path):
-                if not hasattr(AudioSegment, 'converter') or not AudioSegment.converter:
-                    AudioSegment.converter = path
-                    print(f"[OK] PyDub configured - ffmpeg: {path}")
-                break
+    from pydub import AudioSegment
     
-    # Setup paths
-    setup_pydub_ffmpeg()
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
+    # Try to find ffprobe
+    ffprobe_paths = [
+        os.path.join(os.getcwd(), "tools", "ffmpeg", "ffprobe.exe"),  # Local tools
+        shutil.which("ffprobe"),  # System PATH
+        r"C:\ffmpeg\bin\ffprobe.exe",
+        r"C:\Program Files\ffmpeg\bin\ffprobe.exe"
+    ]
+    
+    ffmpeg_paths = [
+        os.path.join(os.getcwd(), "tools", "ffmpeg", "ffmpeg.exe"),  # Local tools  
+        shutil.which("ffmpeg"),  # System PATH
+        r"C:\ffmpeg\bin\ffmpeg.exe",
+        r"C:\Program Files\ffmpeg\bin\ffmpeg.exe"
+    ]
+    
+    # Configure ffprobe
+    for path in ffprobe_paths:
+        if path and os.path.exists(path):
+            AudioSegment.converter = path.replace("ffprobe", "ffmpeg")  # Set ffmpeg path
+            AudioSegment.ffprobe = path  # Set ffprobe path
+            print(f"[OK] PyDub configured - ffprobe: {path}")
+            break
+    
+    # Configure ffmpeg as backup
+    for path in ffmpeg_paths:
+        if path and os.path.exists(path):
+            if not hasattr(AudioSegment, 'converter') or not AudioSegment.converter:
+                AudioSegment.converter = path
+                print(f"[OK] PyDub configured - ffmpeg: {path}")
+            break
+
 
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
@@ -267,6 +263,7 @@ class VideoGenerationThread(QThread):
         self.custom_images_folder = custom_images_folder
         self.voice_name = voice_name
         self.project_folder = project_folder
+        from core.video_pipeline import VideoPipeline
         self.pipeline = VideoPipeline()
     
     def run(self):
@@ -287,6 +284,22 @@ class VideoGenerationThread(QThread):
         self.finished.emit(result)
 
 class AdvancedMainWindow(QMainWindow):
+    @property
+    def pipeline(self):
+        """VideoPipeline - import và khởi tạo ở lần dùng đầu tiên"""
+        if self._pipeline is None:
+            from core.video_pipeline import VideoPipeline
+            self._pipeline = VideoPipeline()
+        return self._pipeline
+    
+    @property
+    def voice_generator(self):
+        """VoiceGenerator - import và khởi tạo ở lần dùng đầu tiên"""
+        if self._voice_generator is None:
+            from tts.voice_generator import VoiceGenerator
+            self._voice_generator = VoiceGenerator()
+        return self._voice_generator
+    
     def reload_code(self):
         """Reload code without restarting app"""
         try:
@@ -325,10 +338,11 @@ class AdvancedMainWindow(QMainWindow):
         else:
             self.setGeometry(100, 100, 1000, 700)
         
-        # Khởi tạo pipeline và API manager
-        self.pipeline = VideoPipeline()
+        # Khởi tạo pipeline và API manager (pipeline, voice generator tạo ở lần dùng đầu tiên)
+        setup_pydub_ffmpeg()
+        self._pipeline = None
+        self._voice_generator = None
         self.api_manager = APIManager()
-        self.voice_generator = VoiceGenerator()
         self.current_project_id = None
         self.current_script_data = None  # Store generated script data
         
@@ -1,12 +1,45 @@
 import ffmpeg
 import os
+import math
+import shutil
+import tempfile
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Fast-render: ảnh tĩnh encode với -tune stillimage ở fps thấp, zoompan chỉ khi cần,
+# crossfade chỉ re-encode đoạn overlap còn lại stream copy. VS_FAST_RENDER=0 để dùng lại cách cũ.
+FAST_RENDER = os.getenv("VS_FAST_RENDER", "1").lower() not in ("0", "false", "no")
+STILL_FPS = int(os.getenv("VS_STILL_FPS", "5"))
+MOTION_FPS = 25
+KEYFRAME_INTERVAL = 2  # giây - điểm cắt stream copy cho crossfade
+VIDEO_TIMESCALE = "12800"  # timescale cố định để segment khác fps vẫn concat copy được
+AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2']
+
 class VideoComposer:
-    def __init__(self):
+    def __init__(self, fast_render=None, max_workers=None):
         self.temp_dir = "temp_video"
         Path(self.temp_dir).mkdir(exist_ok=True)
+        self.fast_render = FAST_RENDER if fast_render is None else fast_render
+        self.max_workers = max_workers or max(2, (os.cpu_count() or 2) // 2)
+    
+    def _run_ffmpeg(self, cmd):
+        """Chạy ffmpeg/ffprobe, raise RuntimeError kèm stderr khi lỗi"""
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg error (code: {result.returncode}): {result.stderr.strip()[-300:]}")
+        return result.stdout
+    
+    def _video_args(self, fps, still=False):
+        """Encoder settings chung cho segment và đoạn transition - phải giống nhau để concat copy"""
+        args = [
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'high', '-level', '4.1',
+            '-pix_fmt', 'yuv420p', '-r', str(fps), '-g', str(fps * KEYFRAME_INTERVAL),
+            '-bf', '0', '-sc_threshold', '0', '-video_track_timescale', VIDEO_TIMESCALE
+        ]
+        if still:
+            args += ['-tune', 'stillimage']
+        return args
     
     def create_segment_video(self, image_path, audio_path, output_path, effects=None):
         """Tạo video từ 1 ảnh + 1 audio với hiệu ứng"""
@@ -15,6 +48,9 @@ class VideoComposer:
             probe = ffmpeg.probe(audio_path)
             duration = float(probe['streams'][0]['duration'])
             
+            if self.fast_render:
+                return self._create_segment_video_fast(image_path, audio_path, output_path, duration, effects)
+            
             # Tạo input streams
             image_input = ffmpeg.input(image_path, loop=1, t=duration)
             audio_input = ffmpeg.input(audio_path)
@@ -49,6 +85,34 @@ class VideoComposer:
         except Exception as e:
             return {"success": False, "error": f"Error tạo video segment: {str(e)}"}
     
+    def _create_segment_video_fast(self, image_path, audio_path, output_path, duration, effects=None):
+        """
+        Fast-render segment: ảnh tĩnh -> loop ở STILL_FPS với -tune stillimage (hầu hết frame là skip block);
+        có zoom -> zoompan sinh đủ frame từ một frame ảnh duy nhất ở MOTION_FPS
+        """
+        zoom_factor = float(effects.get('zoom_factor', 1.1)) if effects and effects.get('zoom', False) else 1.0
+        
+        if zoom_factor > 1.0:
+            frames = max(1, int(math.ceil(duration * MOTION_FPS)))
+            video_filter = (
+                f"scale=1920:1080,setsar=1,zoompan=z='min(zoom+0.0015,{zoom_factor})':d={frames}"
+                f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1920x1080:fps={MOTION_FPS}"
+            )
+            image_args = ['-i', image_path]
+            video_args = self._video_args(MOTION_FPS)
+        else:
+            video_filter = "scale=1920:1080,setsar=1"
+            image_args = ['-loop', '1', '-framerate', str(STILL_FPS), '-i', image_path]
+            video_args = self._video_args(STILL_FPS, still=True)
+        
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error', *image_args, '-i', audio_path,
+            '-map', '0:v', '-map', '1:a', '-vf', video_filter, *video_args, *AUDIO_ARGS,
+            '-t', f"{duration:.3f}", output_path
+        ]
+        self._run_ffmpeg(cmd)
+        return {"success": True, "path": output_path, "duration": duration}
+    
     def merge_segments(self, segment_paths, output_path, transitions=None):
         """Ghép nhiều segment thành video hoàn chỉnh"""
         try:
@@ -61,6 +125,11 @@ class VideoComposer:
             # Ghép video
             if transitions and transitions.get('crossfade', False):
                 # Ghép với hiệu ứng chuyển cảnh (phức tạp hơn)
+                if self.fast_render:
+                    result = self._merge_with_overlap_transitions(segment_paths, output_path, transitions)
+                    if result["success"]:
+                        return result
+                    print(f"[WARNING] Overlap crossfade failed ({result['error']}), falling back to full re-encode")
                 return self._merge_with_transitions(segment_paths, output_path, transitions)
             else:
                 # Ghép đơn giản
@@ -70,8 +139,7 @@ class VideoComposer:
                     '-y', output_path
                 ]
                 
-                result = subprocess.run(cmd, capture_output=True, text=True,
-                                       stderr=subprocess.DEVNULL)  # Suppress FFmpeg stderr
+                result = subprocess.run(cmd, capture_output=True, text=True)
                 if result.returncode == 0:
                     return {"success": True, "path": output_path}
                 else:
@@ -80,6 +148,115 @@ class VideoComposer:
         except Exception as e:
             return {"success": False, "error": f"Error ghép video: {str(e)}"}
     
+    def _probe_packets(self, path):
+        """(duration, pts frame video, pts keyframe) của một segment - đọc packet, không decode"""
+        duration = float(ffmpeg.probe(path)['format']['duration'])
+        output = self._run_ffmpeg([
+            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', path
+        ])
+        frames, keyframes = [], []
+        for line in output.splitlines():
+            pts, _, flags = line.partition(',')
+            if not pts or pts == 'N/A':
+                continue
+            frames.append(float(pts))
+            if 'K' in flags:
+                keyframes.append(float(pts))
+        return duration, sorted(frames), sorted(keyframes)
+    
+    def _merge_with_overlap_transitions(self, segment_paths, output_path, transitions):
+        """
+        Crossfade chỉ re-encode vùng overlap:
+        - Phần giữa mỗi segment (từ keyframe đầu tiên sau fade tới điểm bắt đầu fade-out) stream copy
+        - Mỗi transition = xfade(đuôi segment trước, đầu segment sau tới keyframe đó), encode song song
+        - Audio ghép một lần bằng chuỗi acrossfade rồi mux với video đã concat copy
+        """
+        fade = float(transitions.get('fade_duration', 0.5))
+        if len(segment_paths) < 2 or fade <= 0:
+            return self.merge_segments(segment_paths, output_path)
+        
+        work_dir = tempfile.mkdtemp(prefix="xfade_", dir=self.temp_dir)
+        try:
+            timings = [self._probe_packets(path) for path in segment_paths]
+            
+            # Điểm bắt đầu phần copy (keyframe) và điểm bắt đầu fade-out (biên frame) của từng segment
+            heads, tails = [], []
+            for index, (duration, frames, keyframes) in enumerate(timings):
+                head = 0.0 if index == 0 else next((k for k in keyframes if k >= fade - 1e-3), None)
+                if index == len(timings) - 1:
+                    tail = duration
+                else:
+                    tail = max((t for t in frames if t <= duration - fade + 1e-3), default=None)
+                if head is None or tail is None or tail <= head:
+                    return {"success": False, "error": f"Segment {index + 1} quá ngắn cho crossfade {fade}s"}
+                heads.append(head)
+                tails.append(tail)
+            
+            pieces, commands = [], []
+            for index, path in enumerate(segment_paths):
+                if index > 0:
+                    prev_path = segment_paths[index - 1]
+                    tail_length = timings[index - 1][0] - tails[index - 1]
+                    piece = os.path.join(work_dir, f"transition_{index:04d}.mp4")
+                    graph = (
+                        f"[0:v]fps={MOTION_FPS},settb=AVTB,setpts=PTS-STARTPTS[a];"
+                        f"[1:v]fps={MOTION_FPS},settb=AVTB,setpts=PTS-STARTPTS[b];"
+                        f"[a][b]xfade=transition=fade:duration={fade}:offset={max(0.0, tail_length - fade):.6f},"
+                        f"format=yuv420p[v]"
+                    )
+                    commands.append([
+                        'ffmpeg', '-y', '-loglevel', 'error',
+                        '-ss', f"{tails[index - 1]:.6f}", '-i', prev_path,
+                        '-t', f"{heads[index]:.6f}", '-i', path,
+                        '-filter_complex', graph, '-map', '[v]', '-an',
+                        *self._video_args(MOTION_FPS), piece
+                    ])
+                    pieces.append(piece)
+                
+                piece = os.path.join(work_dir, f"body_{index:04d}.mp4")
+                cmd = ['ffmpeg', '-y', '-loglevel', 'error']
+                if heads[index] > 0:
+                    cmd += ['-ss', f"{heads[index]:.6f}"]
+                cmd += ['-i', path]
+                if index < len(segment_paths) - 1:
+                    cmd += ['-t', f"{tails[index] - heads[index]:.6f}"]
+                cmd += ['-map', '0:v', '-c', 'copy', '-avoid_negative_ts', 'make_zero', piece]
+                commands.append(cmd)
+                pieces.append(piece)
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(self._run_ffmpeg, commands))
+            
+            # Concat video (copy)
+            list_file = os.path.join(work_dir, "pieces.txt")
+            with open(list_file, 'w') as f:
+                for piece in pieces:
+                    f.write(f"file '{os.path.abspath(piece)}'\n")
+            video_only = os.path.join(work_dir, "video.mp4")
+            self._run_ffmpeg([
+                'ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                '-i', list_file, '-c', 'copy', video_only
+            ])
+            
+            # Audio: acrossfade nối tiếp, mux với video copy
+            cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-i', video_only]
+            for path in segment_paths:
+                cmd += ['-i', path]
+            audio_graph, label = [], "[1:a]"
+            for index in range(2, len(segment_paths) + 1):
+                audio_graph.append(f"{label}[{index}:a]acrossfade=d={fade}[a{index}]")
+                label = f"[a{index}]"
+            cmd += ['-filter_complex', ";".join(audio_graph), '-map', '0:v', '-map', label,
+                    '-c:v', 'copy', *AUDIO_ARGS, output_path]
+            self._run_ffmpeg(cmd)
+            
+            return {"success": True, "path": output_path}
+        except Exception as e:
+            return {"success": False, "error": f"Error ghép với transitions: {str(e)}"}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
     def _merge_with_transitions(self, segment_paths, output_path, transitions):
         """Ghép video với hiệu ứng chuyển cảnh"""
         try:
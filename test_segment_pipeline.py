@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Segment Stage Pipeline
+SegmentStagePipeline với StubImageGenerator + stub voice/encode stage: kết quả đúng thứ tự
+segment dù các stage xong lệch nhau, và cancel() dừng phần việc còn lại
+"""
+
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+from core.segment_pipeline import SegmentStagePipeline
+
+SEGMENTS = [{"id": i + 1, "image_prompt": f"scene {i + 1}", "narration": f"line {i + 1}"} for i in range(5)]
+
+
+@pytest.fixture
+def image_stage(tmp_path):
+    pytest.importorskip("PIL")
+    pytest.importorskip("openai")
+    pytest.importorskip("requests")
+    pytest.importorskip("dotenv")
+    from image.image_generator import StubImageGenerator
+
+    image_gen = StubImageGenerator()
+
+    def stage(segment):
+        image_path = str(tmp_path / "images" / f"segment_{segment['id']}.jpg")
+        result = image_gen.generate_and_save_image(segment["image_prompt"], image_path)
+        if not result["success"]:
+            return {"success": False, "error": result["error"]}
+        return {"success": True, "image_path": image_path}
+
+    return stage
+
+
+def encode_stage(segment, image_result, voice_result):
+    return {"success": True, "segment_id": segment["id"],
+            "image_path": image_result["image_path"], "audio_path": voice_result["audio_path"]}
+
+
+def test_results_keep_segment_order(image_stage, tmp_path):
+    def voice_stage(segment):
+        # Segment đầu xong sau cùng -> thứ tự hoàn thành ngược với thứ tự segment
+        time.sleep(0.02 * (len(SEGMENTS) - segment["id"]))
+        return {"success": True, "audio_path": str(tmp_path / f"segment_{segment['id']}.mp3")}
+
+    pipeline = SegmentStagePipeline(image_stage, voice_stage, encode_stage,
+                                    image_workers=2, voice_workers=len(SEGMENTS), encode_workers=2)
+    result = pipeline.run(SEGMENTS)
+
+    assert result["success"], result.get("error")
+    assert [stages["encode"]["segment_id"] for stages in result["results"]] == [s["id"] for s in SEGMENTS]
+    for segment, stages in zip(SEGMENTS, result["results"]):
+        assert stages["image"]["image_path"].endswith(f"segment_{segment['id']}.jpg")
+        assert os.path.exists(stages["image"]["image_path"])
+        assert stages["encode"]["audio_path"] == stages["voice"]["audio_path"]
+    assert result["progress"] == {"image": len(SEGMENTS), "voice": len(SEGMENTS), "encode": len(SEGMENTS)}
+
+
+def test_cancel_stops_remaining_work(image_stage, tmp_path):
+    voice_calls, encode_calls = [], []
+    lock = threading.Lock()
+
+    def voice_stage(segment):
+        with lock:
+            voice_calls.append(segment["id"])
+        pipeline.cancel()  # 1 voice worker: các segment sau chưa bắt đầu
+        return {"success": True, "audio_path": str(tmp_path / f"segment_{segment['id']}.mp3")}
+
+    def counting_encode_stage(segment, image_result, voice_result):
+        with lock:
+            encode_calls.append(segment["id"])
+        return encode_stage(segment, image_result, voice_result)
+
+    pipeline = SegmentStagePipeline(image_stage, voice_stage, counting_encode_stage,
+                                    image_workers=1, voice_workers=1, encode_workers=1)
+    result = pipeline.run(SEGMENTS)
+
+    assert not result["success"]
+    assert result["error"] == "Pipeline cancelled"
+    assert voice_calls == [SEGMENTS[0]["id"]]
+    assert encode_calls == []
+    assert pipeline.cancelled
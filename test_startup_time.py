@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Startup Time - Regression test cho lazy imports
+Import entry point của app desktop và API phải nhanh (< STARTUP_BUDGET giây) và không
+được kéo theo ML stack (torch, chatterbox, whisper) - những thứ đó load ở background warm-up
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+
+STARTUP_BUDGET = float(os.getenv("VS_STARTUP_BUDGET", "1.0"))
+HEAVY_MODULES = ("torch", "torchaudio", "chatterbox", "whisper", "faster_whisper", "ui.advanced_window",
+                 "core.video_pipeline", "pydub")
+
+# (module, sys.path entry) - mỗi module được import trong một interpreter mới
+ENTRY_POINTS = [
+    ("main", SRC_DIR),                       # desktop app: src/main.py
+    ("ui.advanced_window", SRC_DIR),         # cửa sổ chính, main.py import ngay sau splash
+    ("backend.app.main", PROJECT_ROOT),      # FastAPI server
+    ("tts.real_chatterbox_provider", SRC_DIR),
+    ("tts.voice_generator", SRC_DIR),
+]
+
+PROBE = """
+import sys, time, json, importlib
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+try:
+    importlib.import_module({module!r})
+except ModuleNotFoundError as e:
+    print(json.dumps({{"missing": e.name}}))
+    sys.exit(0)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules and m != {module!r}]}}))
+"""
+
+
+def is_first_party(name):
+    """Package/module của repo (src/ hoặc project root), không phải third-party dependency"""
+    return any(os.path.isdir(os.path.join(root, name)) or os.path.isfile(os.path.join(root, name + ".py"))
+               for root in (SRC_DIR, PROJECT_ROOT))
+
+
+def measure_import(module, path):
+    """
+    Import module trong subprocess sạch, trả về (elapsed_seconds, heavy modules đã bị import).
+    Chỉ skip khi thiếu một dependency third-party (PySide6, fastapi...); mọi lỗi khác là fail.
+    """
+    code = PROBE.format(path=path, module=module, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=PROJECT_ROOT)
+    if completed.returncode != 0:
+        last_line = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+        pytest.fail(f"{module} failed to import: {last_line}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if "missing" in result:
+        missing = (result["missing"] or "").split(".")[0]
+        if not missing or is_first_party(missing):
+            pytest.fail(f"{module} failed to import: missing first-party module {result['missing']!r}")
+        pytest.skip(f"{module} needs optional dependency {missing!r}, not installed in this environment")
+    return result["elapsed"], result["loaded"]
+
+
+@pytest.mark.parametrize("module,path", ENTRY_POINTS)
+def test_import_is_fast_and_lazy(module, path):
+    elapsed, loaded = measure_import(module, path)
+    assert not loaded, f"{module} eagerly imports heavy modules: {loaded}"
+    assert elapsed < STARTUP_BUDGET, f"{module} import took {elapsed:.2f}s (budget {STARTUP_BUDGET:.1f}s)"
+
+
+if __name__ == "__main__":
+    print("[ROCKET] STARTUP TIME TEST")
+    print("=" * 50)
+    for module, path in ENTRY_POINTS:
+        try:
+            elapsed, loaded = measure_import(module, path)
+        except pytest.skip.Exception as e:
+            print(f"[WARNING] {module}: skipped ({e})")
+            continue
+        except pytest.fail.Exception as e:
+            print(f"[EMOJI] {module}: {e}")
+            continue
+        status = "[OK]" if elapsed < STARTUP_BUDGET and not loaded else "[EMOJI]"
+        print(f"{status} {module}: {elapsed:.3f}s" + (f" - heavy modules: {loaded}" if loaded else ""))